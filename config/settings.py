@@ -29,7 +29,11 @@ DATA_SOURCES = {
 QUALITY_CHECKS = {
     'max_null_percentage': 0.3,  # Máximo 30% de nulos por coluna
     'min_rows_expected': 100,    # Mínimo de linhas esperadas
-    'date_range_validation': True
+    'date_range_validation': True,  # Datas entre 01/01 do ano alvo e 31/12 do ano seguinte
+    'distinct_sketch_size': 4096,  # Hashes mínimos por coluna (KMV): exato até esse nº de distintos, estimado acima
+    'null_check_exclude': ['instituicao_alvo'],  # Colunas nulas por definição (sem instituição alvo)
+    'report_path': '../data/bronze/consumidor_gov_quality_report.json',
+    'state_path': '../data/bronze/consumidor_gov_quality_state.npz'   # Perfis por arquivo do modo incremental
 }
 
 # ==========================================
@@ -39,7 +43,99 @@ QUALITY_CHECKS = {
 PROCESSING_CONFIG = {
     'target_year': 2025,
     'date_format': '%Y-%m-%d',
-    'chunk_size': 10000
+    'chunk_size': 10000,
+    'execution_mode': 'batch',   # 'batch', 'parallel' (process pool), 'streaming' (chunks) ou 'incremental' (manifesto)
+    'max_workers': None          # Workers do modo 'parallel' (None = nº de CPUs)
+}
+
+# ==========================================
+# PIPELINE BRONZE -> SILVER -> GOLD
+# ==========================================
+
+PIPELINE_CONFIG = {
+    'version': 2,                # Versão única dos datasets das três camadas
+    'checkpoints': [],           # Camadas intermediárias persistidas pelo run_pipeline ('bronze', 'silver')
+    'bronze_stem': '../data/silver/consumidor_gov_bronze_v{version}',
+    'silver_stem': '../data/silver/consumidor_gov_silver_v{version}',
+    'gold_dir': '../data/gold'
+}
+
+# ==========================================
+# INSTRUMENTAÇÃO (TEMPO, CPU, MEMÓRIA POR TAREFA)
+# ==========================================
+
+INSTRUMENTATION_CONFIG = {
+    'enabled': True,
+    'output_dir': '../data/runs',            # <run_id>.json por execução de DAG/pipeline
+    'history_file': 'tarefas_historico.csv'  # Tarefas de todas as execuções (regressões entre atualizações)
+}
+
+# ==========================================
+# CATÁLOGO DE DATASETS (VERSÕES E PARTIÇÕES)
+# ==========================================
+
+CATALOG_CONFIG = {
+    'catalog_path': '../data/catalog.json',
+    # Raiz própria das partições (<data_dir>/<dataset>/<partição>/part-<hash>.<ext>),
+    # separada das pastas de origem (ex.: data/bronze/consumidor_gov, com os CSVs brutos)
+    'data_dir': '../data/catalog',
+    'hash_algorithm': 'sha256',
+    # Metadados da execução: mudam a cada processamento sem mudar o conteúdo, então
+    # ficam fora do hash da partição (senão nenhuma partição seria reaproveitada)
+    'hash_exclude_columns': ['processed_at', 'file_origin'],
+    'keep_versions': 3,              # Versões mantidas por dataset; partições sem referência são apagadas
+    'datasets': {
+        # Nome no catálogo e colunas de particionamento ({nome da chave: coluna})
+        # file_key: modos streaming e incremental gravam uma partição por arquivo de origem
+        'bronze': {'name': 'bronze/consumidor_gov', 'partition_by': {'ano': 'Ano Abertura', 'mes': 'Mês Abertura'},
+                   'file_key': 'arquivo'},
+        'silver': {'name': 'silver/consumidor_gov',
+                   'partition_by': {'ano': 'ano_abertura', 'mes': 'mes_abertura', 'uf': 'uf'}}
+    },
+    'period_keys': ['ano', 'mes'],   # Chaves de partição usadas na poda por período (AAAA-MM)
+    'gold_prefix': 'gold/',          # Datasets Gold: gold/<recorte>, partição uf=<UF> (ou 'brasil', nacionais)
+    'national_partition': 'brasil'   # Partição única dos datasets Gold nacionais (cubo, normalização, outliers)
+}
+
+# ==========================================
+# INGESTÃO INCREMENTAL (MANIFESTO)
+# ==========================================
+
+INCREMENTAL_CONFIG = {
+    'manifest_path': '../data/bronze/consumidor_gov_manifest.json',
+    'partitions_dir': '../data/silver/consumidor_gov_bronze_partitions',
+    'hash_algorithm': 'sha256',
+    'hash_block_size': 8 * 1024 * 1024
+}
+
+# ==========================================
+# DEDUPLICAÇÃO (ÍNDICE DE HASHES)
+# ==========================================
+
+DEDUP_CONFIG = {
+    'key_columns': None,         # None = todas as colunas originais da fonte (sem metadados)
+    'metadata_columns': [
+        'data_source',
+        'file_origin',
+        'processed_at',
+        'file_month',
+        'is_agibank',
+        'instituicao_alvo'
+    ],
+    'index_path': '../data/bronze/consumidor_gov_dedup_index.npz',
+    'report_path': '../data/bronze/consumidor_gov_dedup_report.csv'
+}
+
+# ==========================================
+# ARMAZENAMENTO DAS CAMADAS
+# ==========================================
+
+STORAGE_CONFIG = {
+    'format': 'parquet',              # 'csv', 'parquet' ou 'feather'
+    'csv_separator': ';',
+    'csv_encoding': 'utf-8',
+    'parquet_compression': 'snappy',
+    'csv_chunk_size': 200000          # Linhas por chunk nas leituras CSV com filtro de linhas
 }
 
 # ==========================================
@@ -59,6 +155,63 @@ CONSUMIDOR_GOV_DELETE_COLUMNS = {
     ]
 }
 
+# ==========================================
+# SCHEMA CONSUMIDOR.GOV (LEITURA)
+# ==========================================
+
+# Colunas mantidas e seus tipos na leitura. As colunas de
+# CONSUMIDOR_GOV_DELETE_COLUMNS nunca são lidas (usecols).
+CONSUMIDOR_GOV_SCHEMA = {
+    'dtypes': {
+        'Região': 'category',
+        'UF': 'category',
+        'Cidade': 'object',
+        'Sexo': 'category',
+        'Faixa Etária': 'category',
+        'Ano Abertura': 'Int64',
+        'Mês Abertura': 'Int64',
+        'Data Abertura': 'object',
+        'Data Resposta': 'object',
+        'Data Finalização': 'object',
+        'Prazo Resposta': 'object',
+        'Tempo Resposta': 'float64',
+        'Nome Fantasia': 'object',
+        'Segmento de Mercado': 'category',
+        'Área': 'category',
+        'Assunto': 'object',
+        'Grupo Problema': 'category',
+        'Problema': 'object',
+        'Como Comprou Contratou': 'category',
+        'Procurou Empresa': 'category',
+        'Respondida': 'category',
+        'Situação': 'category',
+        'Avaliação Reclamação': 'category',
+        'Nota do Consumidor': 'float64'
+    },
+    'date_columns': [
+        'Data Abertura',
+        'Data Resposta',
+        'Data Finalização',
+        'Prazo Resposta'
+    ],
+    'date_format': '%d/%m/%Y',
+    # Colunas adicionadas pela Bronze (add_metadata_columns / filter_agibank_records)
+    'metadata_dtypes': {
+        'data_source': 'object',
+        'file_origin': 'object',
+        'processed_at': 'datetime64[us]',
+        'file_month': 'object',
+        'is_agibank': 'bool',
+        'instituicao_alvo': 'object'
+    }
+}
+
+SCHEMA_EXPLORATION_CONFIG = {
+    'sample_rows': 1000,         # Linhas lidas por arquivo para inferir tipos
+    'cache_path': '../data/bronze/consumidor_gov_schema_cache.json',
+    'fail_on_drift': False       # True = interrompe a DAG se houver drift de colunas
+}
+
 # ==========================================
 # FILTROS ESPECÍFICOS AGIBANK
 # ==========================================
@@ -74,6 +227,17 @@ AGIBANK_FILTERS = {
     ]
 }
 
+# Instituições identificadas na mesma passada (chave -> nomes/variações).
+# A ordem define a prioridade quando um nome casa com mais de uma instituição.
+INSTITUTION_TARGETS = {
+    'agibank': AGIBANK_FILTERS['bank_names'],
+    'bmg': ['Banco BMG', 'BMG'],
+    'pan': ['Banco PAN', 'Banco Pan S.A.'],   # 'PAN' isolado casaria com textos sem relação
+    'c6': ['C6 Bank', 'Banco C6'],
+    'nubank': ['Nubank', 'Nu Pagamentos'],
+    'mercantil': ['Banco Mercantil', 'Mercantil do Brasil']
+}
+
 # ==========================================
 # COLUNAS TEMPORAIS
 # ==========================================
@@ -90,11 +254,45 @@ TEMPORAL_COLUMNS_CONFIG = {
     'processed_at_format': '%Y-%m-%d %H:%M:%S.%f'
 }
 
+# ==========================================
+# DICIONÁRIO PERSISTENTE DE CATEGORIAS (SILVER)
+# ==========================================
+
+CATEGORY_REGISTRY_CONFIG = {
+    # Colunas Silver com códigos estáveis entre execuções e meses
+    'columns': [
+        'uf',
+        'regiao',
+        'sexo',
+        'respondida',
+        'situacao',
+        'faixa_etaria',
+        'segmento_de_mercado',
+        'area',
+        'problema',
+        'nome_fantasia'
+    ],
+    'registry_path': '../data/silver/consumidor_gov_categories.json'
+}
+
 # ==========================================
 # CONFIGURAÇÕES GOLD - RECORTES SP
 # ==========================================
 
 
+GOLD_CLIPPING_CONFIG = {
+    'ufs': ['SP'],               # UFs recortadas pela DAG Gold ('all' = todas as UFs presentes na Silver)
+    'parallel': True,            # Recortes das UFs em um process pool (quando há mais de uma UF)
+    'max_workers': None,         # None = nº de CPUs
+    'period': None,              # (início, fim) 'AAAA-MM' lidos da Silver; None = todos os meses
+    # Cubo, normalização e outliers nacionais: sempre da Silver completa (todas as UFs
+    # e meses), com uma leitura à parte quando os recortes usam só parte dela
+    'national': True,
+    # Cópia CSV de cada recorte por UF em gold_dir, nos nomes fixos lidos pelos notebooks
+    # e pelo BI (sp_consumidor_completo_v1.csv, ...); None = recortes só no catálogo
+    'csv_export': '{uf}_{name}_v1.csv'
+}
+
 SP_CITIES_CONFIG = {
     'max_cities': 645,                    
     'validate_suspicious': True,
@@ -102,6 +300,60 @@ SP_CITIES_CONFIG = {
     'show_low_frequency': True
 }
 
+MUNICIPALITY_REFERENCE_CONFIG = {
+    # Tabelas oficiais com código IBGE (7 dígitos) e nome do município; a UF vem do código
+    'reference_paths': ['../data/gold/normalizacao_censo/codigos_municipios_regioes.csv'],
+    'separator': ';',
+    'encoding': 'latin1',
+    'code_column': 'cod_ibge',
+    'name_column': 'municipio',
+    'fuzzy_cutoff': 0.88        # Similaridade mínima (difflib) para nomes sem casamento exato
+}
+
+# Código IBGE da UF (dois primeiros dígitos do código do município)
+IBGE_UF_CODES = {
+    11: 'RO', 12: 'AC', 13: 'AM', 14: 'RR', 15: 'PA', 16: 'AP', 17: 'TO',
+    21: 'MA', 22: 'PI', 23: 'CE', 24: 'RN', 25: 'PB', 26: 'PE', 27: 'AL', 28: 'SE', 29: 'BA',
+    31: 'MG', 32: 'ES', 33: 'RJ', 35: 'SP',
+    41: 'PR', 42: 'SC', 43: 'RS',
+    50: 'MS', 51: 'MT', 52: 'GO', 53: 'DF'
+}
+
+# Normalização pelo Censo 2022 (census_normalization): população por UF e por município
+CENSUS_NORMALIZATION_CONFIG = {
+    'uf_population': {
+        'path': '../data/gold/limpo/brasil/censo2022_estados_completo.csv',
+        'separator': ',',
+        'encoding': 'utf-8',
+        'uf_column': 'sigla',
+        'population_column': 'populacao_2022'
+    },
+    # Tabelas de população municipal: por código IBGE (code_column) ou por nome + UF fixa
+    'municipality_population': [
+        {
+            'path': '../data/gold/normalizacao_censo/populacao_municipios_sp_2022_limpo.csv',
+            'separator': ',',
+            'encoding': 'utf-8-sig',
+            'code_column': None,
+            'name_column': 'municipio_upper',
+            'population_column': 'populacao_limpa',
+            'uf': 'SP'
+        }
+    ],
+    'rate_base': 100000,             # Taxas por 100 mil habitantes
+    'rates': {                       # Coluna da taxa -> contagem normalizada
+        'reclamacoes_100k': 'registros',
+        'reclamacoes_agibank_100k': 'registros_agibank'
+    }
+}
+
+CITY_CORRECTIONS_CONFIG = {
+    # Tabela uf;cidade_original;cidade_corrigida (uf vazia = regra válida para todas as UFs)
+    'table_path': '../config/correcoes_cidades.csv',
+    'separator': ';',
+    'report_path': '../data/gold/{uf}_correcoes_cidades_aplicadas.csv'
+}
+
 AGE_GROUPS_CONFIG = {
     'target_groups': ['entre 31 a 40 anos', 'entre 41 a 50 anos', 'entre 21 a 30 anos']
 }
@@ -109,4 +361,79 @@ AGE_GROUPS_CONFIG = {
 BUSINESS_SECTORS_CONFIG = {
     'banking_keywords': ['banco', 'financeira', 'administradora', 'cartão'],
     'focus_problems': ['cobrança', 'atendimento', 'produto', 'serviço']
-}
\ No newline at end of file
+}
+
+# ==========================================
+# CONFIGURAÇÕES GOLD - AGREGADOS, OUTLIERS E CUBO
+# ==========================================
+
+# Dimensões dos recortes Gold - cada entrada gera um agregado (gold_aggregations)
+#   column: coluna de agrupamento
+#   label: nome das medidas (total_<label>, <label>_agibank)
+#   percentages: percentual_total, percentual_agibank e/ou taxa_resposta_pct
+#   filter: recorte opcional das linhas ({'column', 'pattern'} - regex, sem diferenciar maiúsculas)
+#   group: recorte ao qual o agregado pertence ('regional', 'etario' ou 'setorial')
+GOLD_DIMENSIONS = {
+    'ranking_cidades': {
+        'column': 'cidade',
+        'label': 'reclamacoes',
+        'percentages': ['percentual_agibank', 'taxa_resposta_pct'],
+        'group': 'regional'
+    },
+    'analise_etaria': {
+        'column': 'faixa_etaria',
+        'label': 'reclamacoes',
+        'percentages': ['percentual_total', 'percentual_agibank', 'taxa_resposta_pct'],
+        'group': 'etario'
+    },
+    'segments': {
+        'column': 'segmento_de_mercado',
+        'label': 'reclamacoes',
+        'percentages': [],
+        'group': 'setorial'
+    },
+    'banking_comparison': {
+        'column': 'nome_fantasia',
+        'label': 'reclamacoes',
+        'percentages': [],
+        'filter': {'column': 'area', 'pattern': 'banco.*financeira.*administradora.*cartão'},
+        'group': 'setorial'
+    },
+    'problems_general': {
+        'column': 'problema',
+        'label': 'ocorrencias',
+        'percentages': [],
+        'group': 'setorial'
+    }
+}
+
+# Outliers Gold (outliers): IQR e Z-score por grupo em uma única passada agrupada
+OUTLIER_CONFIG = {
+    'record_columns': ['tempo_resposta', 'nota_do_consumidor'],     # Colunas dos registros Silver
+    'rate_columns': ['populacao', 'reclamacoes_100k'],              # Colunas do agregado municipal normalizado
+    'groupings': {                # Nome -> colunas de agrupamento ([] = base inteira)
+        'brasil': [],
+        'uf': ['uf'],
+        'instituicao': ['nome_fantasia'],
+        'segmento': ['segmento_de_mercado']
+    },
+    'flag_grouping': 'uf',        # Agrupamento das colunas de flag gravadas nos registros
+    'iqr_factor': 1.5,
+    'zscore_threshold': 3.0,
+    'min_group_size': 10          # Grupos menores não recebem flags (estatísticas instáveis)
+}
+
+# Cubo Gold: medidas aditivas pré-agregadas no grão das dimensões abaixo (gold_cube)
+GOLD_CUBE_CONFIG = {
+    'dimensions': [
+        'uf',
+        'cidade',
+        'faixa_etaria',
+        'segmento_de_mercado',
+        'area',
+        'problema',
+        'nome_fantasia',
+        'mes'                    # Derivada de data_abertura (AAAA-MM)
+    ],
+    'month_source': 'data_abertura'
+}
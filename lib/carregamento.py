@@ -1,39 +1,372 @@
 # lib/carregamento.py
 
 import pandas as pd
+from pandas.errors import ParserWarning
+from collections import OrderedDict
+from functools import wraps
 from pathlib import Path
+import codecs
+import csv
+import hashlib
+import io
+import re
+import sys
+import warnings
 
 
 RAIZ_PROJETO = Path(__file__).parent.parent
+if str(RAIZ_PROJETO) not in sys.path:
+    sys.path.append(str(RAIZ_PROJETO))
+# Módulos de src importam uns aos outros sem o prefixo do pacote: a lib usa a
+# mesma convenção, para que cada módulo seja carregado uma única vez
+if str(RAIZ_PROJETO / 'src') not in sys.path:
+    sys.path.append(str(RAIZ_PROJETO / 'src'))
+
+from storage import (
+    FORMAT_EXTENSIONS, dataset_columns, read_csv_filtered, read_dataset, resolve_dataset_path
+)
+from catalog import load_catalog, dataset_partitions, period_range, concat_partitions
+
 CAMINHO_DATA = RAIZ_PROJETO / 'data'
 CAMINHO_SILVER = CAMINHO_DATA / 'silver'
 CAMINHO_GOLD = CAMINHO_DATA / 'gold'
 
+CAMINHO_CATALOGO = CAMINHO_DATA / 'catalog.json'
+CAMINHO_PARTICOES = CAMINHO_DATA / 'catalog'   # Raiz das partições do catálogo (CATALOG_CONFIG['data_dir'])
+CAMINHO_DICIONARIO = CAMINHO_SILVER / 'consumidor_gov_categories.json'   # CATEGORY_REGISTRY_CONFIG['registry_path']
+
+# Datasets do catálogo usados por padrão (versão mais recente); os arquivos
+# abaixo só são usados quando o dataset ainda não está no catálogo
+DATASET_SILVER = 'silver/consumidor_gov'
+DATASET_SP_COMPLETO = ('gold/consumidor_completo', 'uf=SP')
+DATASET_SP_AGIBANK = ('gold/agibank_only', 'uf=SP')
+DATASET_SP_SETORIAL = ('gold/setorial_segments', 'uf=SP')
+
 ARQUIVO_SILVER_PADRAO = 'consumidor_gov_silver_v1.csv'
 ARQUIVO_SP_COMPLETO = 'sp_consumidor_completo_v1.csv'
 ARQUIVO_SP_AGIBANK = 'sp_agibank_only_v1.csv'
 ARQUIVO_SP_SETORIAL = 'sp_setorial_segments_v1.csv'
 
+FORMATOS_COLUNARES = ('.parquet', '.feather')
+
+# Cache dos carregamentos: chave = caminho + mtime/tamanho do arquivo + projeção/filtros.
+# Um arquivo regravado muda a chave, então o cache antigo nunca é servido.
+CAMINHO_CACHE = CAMINHO_DATA / 'cache'
+LIMITE_CACHE_MEMORIA_MB = 1024   # Orçamento do LRU em memória (por processo)
+USAR_CACHE_DISCO = True          # Cópia Feather das bases CSV em CAMINHO_CACHE
+
+_cache_memoria = OrderedDict()   # chave -> (DataFrame, bytes)
+
+
+def _hash(valor) -> str:
+    return hashlib.sha1(repr(valor).encode('utf-8')).hexdigest()[:16]
+
+
+def _chave_cache(caminho, colunas: list = None, filtros: list = None) -> tuple:
+    # caminho: arquivo único ou lista de partições do catálogo
+    caminhos = caminho if isinstance(caminho, list) else [caminho]
+    infos = [parte.stat() for parte in caminhos]
+    return (
+        '|'.join(str(parte.resolve()) for parte in caminhos),
+        tuple(info.st_mtime_ns for info in infos),
+        tuple(info.st_size for info in infos),
+        None if colunas is None else tuple(colunas),
+        repr(filtros) if filtros else None   # Valores de filtro podem ser listas (não hasheáveis)
+    )
+
+
+def _arquivo_cache_disco(chave: tuple) -> Path:
+    # <origem>-<versão do arquivo>-<projeção>: permite descartar versões antigas da mesma origem
+    return CAMINHO_CACHE / f"{_hash(chave[0])}-{_hash(chave[1:3])}-{_hash(chave[3:])}.feather"
+
+
+def _buscar_cache(chave: tuple):
+    if chave in _cache_memoria:
+        _cache_memoria.move_to_end(chave)
+        print("Base servida do cache em memória")
+        return _cache_memoria[chave][0]
+
+    arquivo = _arquivo_cache_disco(chave)
+    if USAR_CACHE_DISCO and arquivo.exists():
+        df = pd.read_feather(arquivo)
+        print(f"Base servida do cache em disco: {arquivo.name}")
+        _guardar_memoria(chave, df)
+        return df
+
+    return None
+
+
+def _guardar_memoria(chave: tuple, df: pd.DataFrame):
+    tamanho = int(df.memory_usage(deep=True).sum())
+    limite = LIMITE_CACHE_MEMORIA_MB * 1024**2
+
+    if tamanho > limite:
+        return
+
+    # Versões anteriores do mesmo arquivo de origem não serão mais lidas
+    for antiga in [k for k in _cache_memoria if k[0] == chave[0] and k[1:3] != chave[1:3]]:
+        del _cache_memoria[antiga]
+
+    _cache_memoria[chave] = (df, tamanho)
+    _cache_memoria.move_to_end(chave)
+
+    # Remove as bases menos usadas até caber no orçamento
+    while sum(item[1] for item in _cache_memoria.values()) > limite:
+        _cache_memoria.popitem(last=False)
+
+
+def _guardar_disco(chave: tuple, df: pd.DataFrame):
+    arquivo = _arquivo_cache_disco(chave)
+    origem, versao = arquivo.name.split('-')[:2]
+
+    CAMINHO_CACHE.mkdir(parents=True, exist_ok=True)
+
+    # Versões anteriores do mesmo arquivo de origem não serão mais lidas
+    for antigo in CAMINHO_CACHE.glob(f"{origem}-*.feather"):
+        if not antigo.name.startswith(f"{origem}-{versao}-"):
+            antigo.unlink()
+
+    temporario = arquivo.with_suffix('.tmp')
+    try:
+        df.reset_index(drop=True).to_feather(temporario)
+        temporario.replace(arquivo)
+    except Exception as e:
+        # Colunas com tipos misturados não cabem no Feather: fica só o cache em memória
+        print(f"Cache em disco ignorado: {str(e)[:80]}")
+        temporario.unlink(missing_ok=True)
+
+
+def _existe(caminho) -> bool:
+    caminhos = caminho if isinstance(caminho, list) else [caminho]
+    return all(parte.exists() for parte in caminhos)
+
+
+def _memoizado(pasta: Path, arquivo_padrao: str, dataset=None):
+    """Envolve um carregador com o cache em memória (LRU) e em disco
 
-def carregar_base_silver(caminho: str = None) -> pd.DataFrame:
-    """Carrega base Silver (Brasil completo)"""
-    if caminho is None:
-        caminho = CAMINHO_SILVER / ARQUIVO_SILVER_PADRAO
+    O carregador ganha o parâmetro usar_cache; o DataFrame devolvido é sempre uma
+    cópia, então alterações no notebook não contaminam o cache.
+    """
+    def decorador(carregar):
+        @wraps(carregar)
+        def carregar_com_cache(caminho: str = None, colunas: list = None, filtros: list = None,
+                               usar_cache: bool = True) -> pd.DataFrame:
+            caminho = _resolver_caminho(caminho, pasta, arquivo_padrao, dataset)
+
+            if not usar_cache or not _existe(caminho):
+                return carregar(caminho, colunas, filtros)
+
+            chave = _chave_cache(caminho, colunas, filtros)
+            df = _buscar_cache(chave)
+
+            if df is None:
+                df = carregar(caminho, colunas, filtros)
+                _guardar_memoria(chave, df)
+                # Bases colunares já são rápidas de ler: o cache em disco é só para CSV
+                if USAR_CACHE_DISCO and not isinstance(caminho, list) and caminho.suffix not in FORMATOS_COLUNARES:
+                    _guardar_disco(chave, df)
+
+            return df.copy()
+
+        return carregar_com_cache
+
+    return decorador
+
+
+def limpar_cache(disco: bool = False):
+    """Esvazia o cache em memória (e, com disco=True, os arquivos de CAMINHO_CACHE)"""
+    _cache_memoria.clear()
+
+    if disco and CAMINHO_CACHE.exists():
+        for arquivo in CAMINHO_CACHE.glob('*.feather'):
+            arquivo.unlink()
+
+    print("Cache de carregamento limpo")
+
+
+def info_cache():
+    """Exibe as bases mantidas no cache em memória"""
+    total_mb = sum(tamanho for _, tamanho in _cache_memoria.values()) / (1024**2)
+    print(f"Cache em memória: {len(_cache_memoria)} bases, {total_mb:.1f} MB de {LIMITE_CACHE_MEMORIA_MB} MB")
+
+    for chave, (df, tamanho) in _cache_memoria.items():
+        caminhos = [Path(parte) for parte in chave[0].split('|')]
+        # Partições do catálogo: pasta do dataset e número de partições
+        rotulo = caminhos[0].name
+        if rotulo.startswith('part-'):
+            pasta = caminhos[0].parent
+            while '=' in pasta.name:
+                pasta = pasta.parent
+            rotulo = f"{pasta.name} ({len(caminhos)} partições)"
+        print(f"   {rotulo:<50} {len(df):>12,} registros {tamanho / (1024**2):>8.1f} MB")
+
+
+def _caminhos_catalogo(dataset, valores=None, periodo=None):
+    """Partições da versão mais recente de um dataset do catálogo (None se ausente)
+
+    dataset: nome ou (nome, partição)
+    valores/periodo: poda das partições, ex.: {'uf': ['SP']} e ('2025-01', '2025-06')
+    """
+    nome, particao = dataset if isinstance(dataset, tuple) else (dataset, None)
+
+    try:
+        particoes = dataset_partitions(
+            nome, catalog=load_catalog(CAMINHO_CATALOGO), data_dir=CAMINHO_PARTICOES, values=valores, period=periodo
+        )
+    except KeyError:
+        return None
+
+    if particao is not None:
+        return [particoes[particao]] if particao in particoes else None
+
+    return list(particoes.values())
+
+
+def _resolver_caminho(caminho: str, pasta: Path, arquivo_padrao: str, dataset=None):
+    """Resolve o caminho do arquivo: caminho informado, versão mais recente no
+    catálogo (arquivo único ou lista de partições) ou a versão colunar do arquivo padrão"""
+    if caminho is not None:
+        return caminho if isinstance(caminho, list) else Path(caminho)
+
+    if dataset is not None:
+        caminhos = _caminhos_catalogo(dataset)
+        if caminhos:
+            return caminhos[0] if len(caminhos) == 1 else caminhos
+
+    try:
+        return resolve_dataset_path((pasta / arquivo_padrao).with_suffix(''))
+    except FileNotFoundError:
+        return pasta / arquivo_padrao
+
+
+TAMANHO_AMOSTRA_CSV = 1024 * 1024   # Bytes lidos para detectar encoding, separador e aspas
+SEPARADORES_CSV = ';,\t|'
+
+
+def _detectar_formato_csv(caminho: Path) -> dict:
+    """Detecta encoding, separador e aspas de um CSV a partir de uma amostra de bytes
+
+    A amostra é lida uma única vez; as aspas são validadas contando, na amostra,
+    as linhas cujo número de campos diverge do cabeçalho com e sem aspas.
+    """
+    with open(caminho, 'rb') as f:
+        amostra = f.read(TAMANHO_AMOSTRA_CSV)
+
+    if amostra.startswith(codecs.BOM_UTF8):
+        encoding = 'utf-8-sig'
     else:
-        caminho = Path(caminho)
-    
-    print(f"Carregando de: {caminho}")
+        try:
+            # final=False: a amostra pode cortar um caractere multibyte no fim
+            codecs.getincrementaldecoder('utf-8')().decode(amostra, final=False)
+            encoding = 'utf-8'
+        except UnicodeDecodeError:
+            encoding = 'latin-1'
+
+    texto = amostra.decode(encoding, errors='ignore')
+    if len(amostra) == TAMANHO_AMOSTRA_CSV and '\n' in texto:
+        texto = texto[:texto.rindex('\n')]   # Descarta a última linha incompleta
+
+    try:
+        dialeto = csv.Sniffer().sniff(texto[:64 * 1024], delimiters=SEPARADORES_CSV)
+        sep, quotechar = dialeto.delimiter, dialeto.quotechar
+    except csv.Error:
+        primeira_linha = texto.split('\n', 1)[0]
+        sep = max(SEPARADORES_CSV, key=primeira_linha.count)
+        quotechar = '"'
+
+    def divergentes(quoting):
+        linhas = list(csv.reader(io.StringIO(texto), delimiter=sep, quotechar=quotechar, quoting=quoting))
+        if not linhas:
+            return 0
+        return sum(len(linha) != len(linhas[0]) for linha in linhas[1:] if linha)
+
+    com_aspas = divergentes(csv.QUOTE_MINIMAL)
+    sem_aspas = divergentes(csv.QUOTE_NONE)
+    quoting = csv.QUOTE_NONE if sem_aspas < com_aspas else csv.QUOTE_MINIMAL
+
+    print(f"Formato detectado: separador '{sep}', encoding {encoding}"
+          f"{', aspas ignoradas' if quoting == csv.QUOTE_NONE else ''}")
+    if min(com_aspas, sem_aspas):
+        print(f"⚠️ Amostra com {min(com_aspas, sem_aspas)} linhas de número de campos divergente")
+
+    return {'sep': sep, 'encoding': encoding, 'quotechar': quotechar, 'quoting': quoting}
+
+
+def _ler_csv(caminho: Path, colunas: list = None, filtros: list = None, sep: str = None) -> pd.DataFrame:
+    """Lê um CSV em uma única passada com o engine C, no formato detectado na amostra
+
+    Linhas malformadas são descartadas, mas reportadas (quantidade e números de linha).
+    sep: separador fixo (dispensa a detecção do separador)
+    """
+    formato = _detectar_formato_csv(caminho)
+    if sep is not None:
+        formato['sep'] = sep
+
+    with warnings.catch_warnings(record=True) as avisos:
+        warnings.simplefilter('always', ParserWarning)
+        df = read_csv_filtered(
+            caminho,
+            filtros,
+            columns=colunas,
+            on_bad_lines='warn',
+            low_memory=False,
+            **formato
+        )
+
+    linhas_ignoradas = [
+        int(numero)
+        for aviso in avisos if issubclass(aviso.category, ParserWarning)
+        for numero in re.findall(r'Skipping line (\d+)', str(aviso.message))
+    ]
+    for aviso in avisos:
+        if not issubclass(aviso.category, ParserWarning):
+            warnings.warn_explicit(aviso.message, aviso.category, aviso.filename, aviso.lineno)
+
+    if linhas_ignoradas:
+        exemplos = ', '.join(str(numero) for numero in linhas_ignoradas[:10])
+        print(f"⚠️ {len(linhas_ignoradas):,} linhas malformadas ignoradas (linhas {exemplos}"
+              f"{', ...' if len(linhas_ignoradas) > 10 else ''})")
+
+    return df
+
+
+def _ler_colunar(caminho: Path, colunas: list = None, filtros: list = None) -> pd.DataFrame:
+    """Lê Parquet/Feather com projeção de colunas e filtros de linha na leitura (pushdown),
+    preservando os dtypes gravados"""
+    df = read_dataset(caminho, columns=colunas, filters=filtros)
+
+    # Agregados Gold são gravados com a dimensão no índice
+    if df.index.name is not None:
+        df = df.reset_index()
+
+    return df
+
+
+@_memoizado(CAMINHO_SILVER, ARQUIVO_SILVER_PADRAO, DATASET_SILVER)
+def carregar_base_silver(caminho: str = None, colunas: list = None, filtros: list = None) -> pd.DataFrame:
+    """Carrega base Silver (Brasil completo)
+
+    colunas: projeção de colunas aplicada na leitura
+    filtros: filtros de linha [(coluna, operador, valor)] aplicados na leitura,
+        ex.: [('uf', '==', 'SP'), ('ano_abertura', '>=', 2024)]
+    """
+    caminho = _resolver_caminho(caminho, CAMINHO_SILVER, ARQUIVO_SILVER_PADRAO, DATASET_SILVER)
+    
+    if isinstance(caminho, list):
+        print(f"Carregando de: {DATASET_SILVER} (catálogo, {len(caminho)} partições)")
+    else:
+        print(f"Carregando de: {caminho}")
     
-    if not caminho.exists():
+    if not _existe(caminho):
         raise FileNotFoundError(f"Arquivo nao encontrado: {caminho}")
     
-    df = pd.read_csv(
-        caminho,
-        sep=';',
-        on_bad_lines='skip',
-        encoding='utf-8',
-        low_memory=False
-    )
+    if isinstance(caminho, list):
+        # Mesma concatenação do pipeline: categorias recodificadas pelo dicionário persistente
+        df = concat_partitions([_ler_colunar(parte, colunas, filtros) for parte in caminho], CAMINHO_DICIONARIO)
+    elif caminho.suffix in FORMATOS_COLUNARES:
+        df = _ler_colunar(caminho, colunas, filtros)
+    else:
+        df = _ler_csv(caminho, colunas, filtros, sep=';')
     
     print(f"Base carregada com sucesso!")
     print(f"Registros: {len(df):,}")
@@ -42,231 +375,208 @@ def carregar_base_silver(caminho: str = None) -> pd.DataFrame:
     return df
 
 
-def carregar_base_gold_sp(caminho: str = None) -> pd.DataFrame:
-    """Carrega base Gold (Sao Paulo completo) com detecção automática de separador"""
-    if caminho is None:
-        caminho = CAMINHO_GOLD / ARQUIVO_SP_COMPLETO
-    else:
-        caminho = Path(caminho)
+@_memoizado(CAMINHO_GOLD, ARQUIVO_SP_COMPLETO, DATASET_SP_COMPLETO)
+def carregar_base_gold_sp(caminho: str = None, colunas: list = None, filtros: list = None) -> pd.DataFrame:
+    """Carrega base Gold (Sao Paulo completo) com detecção automática de separador e encoding"""
+    caminho = _resolver_caminho(caminho, CAMINHO_GOLD, ARQUIVO_SP_COMPLETO, DATASET_SP_COMPLETO)
     
     print(f"Carregando SP (Gold) de: {caminho}")
     
     if not caminho.exists():
         raise FileNotFoundError(f"Arquivo nao encontrado: {caminho}")
     
-    # Detecta o separador lendo a primeira linha
-    with open(caminho, 'r', encoding='utf-8') as f:
-        primeira_linha = f.readline()
-        
-        if primeira_linha.count(';') > primeira_linha.count(','):
-            sep = ';'
-        elif primeira_linha.count(',') > primeira_linha.count(';'):
-            sep = ','
-        elif '\t' in primeira_linha:
-            sep = '\t'
-        else:
-            sep = ','  # Padrão
-    
-    print(f"Separador detectado: '{sep}'")
-    
-    # Lista de configurações para tentar
-    configs = [
-        # Tentativa 1: Engine C com separador detectado
-        {
-            'sep': sep,
-            'encoding': 'utf-8',
-            'on_bad_lines': 'skip',
-            'low_memory': False
-        },
-        # Tentativa 2: Engine Python (mais tolerante)
-        {
-            'sep': sep,
-            'encoding': 'utf-8',
-            'on_bad_lines': 'skip',
-            'engine': 'python'
-        },
-        # Tentativa 3: Latin-1 encoding
-        {
-            'sep': sep,
-            'encoding': 'latin-1',
-            'on_bad_lines': 'skip',
-            'low_memory': False
-        }
-    ]
+    if caminho.suffix in FORMATOS_COLUNARES:
+        df = _ler_colunar(caminho, colunas, filtros)
+        print(f"Registros: {len(df):,}")
+        print(f"Colunas: {len(df.columns)}")
+        return df
     
-    # Tenta cada configuração
-    for i, config in enumerate(configs, 1):
-        try:
-            print(f"Tentativa {i}...")
-            df = pd.read_csv(caminho, **config)
-            print(f"✅ Base SP carregada com sucesso (tentativa {i})!")
-            print(f"Registros: {len(df):,}")
-            print(f"Colunas: {len(df.columns)}")
-            return df
-        except Exception as e:
-            print(f"❌ Tentativa {i} falhou: {str(e)[:80]}")
-            if i == len(configs):
-                raise Exception(f"Todas as tentativas falharam. Último erro: {e}")
-
-
-def carregar_base_setorial(caminho: str = None) -> pd.DataFrame:
-    """Carrega base Setorial (Gold) com detecção automática de separador"""
-    if caminho is None:
-        caminho = CAMINHO_GOLD / ARQUIVO_SP_SETORIAL
-    else:
-        caminho = Path(caminho)
+    df = _ler_csv(caminho, colunas, filtros)
+    
+    print(f"✅ Base SP carregada com sucesso!")
+    print(f"Registros: {len(df):,}")
+    print(f"Colunas: {len(df.columns)}")
+    
+    return df
+
+
+@_memoizado(CAMINHO_GOLD, ARQUIVO_SP_SETORIAL, DATASET_SP_SETORIAL)
+def carregar_base_setorial(caminho: str = None, colunas: list = None, filtros: list = None) -> pd.DataFrame:
+    """Carrega base Setorial (Gold) com detecção automática de separador e encoding"""
+    caminho = _resolver_caminho(caminho, CAMINHO_GOLD, ARQUIVO_SP_SETORIAL, DATASET_SP_SETORIAL)
     
     print(f"Carregando base setorial de: {caminho}")
     
     if not caminho.exists():
         raise FileNotFoundError(f"Arquivo nao encontrado: {caminho}")
     
-    # Detecta o separador
-    with open(caminho, 'r', encoding='utf-8') as f:
-        primeira_linha = f.readline()
-        
-        if primeira_linha.count(';') > primeira_linha.count(','):
-            sep = ';'
-        elif primeira_linha.count(',') > primeira_linha.count(';'):
-            sep = ','
-        else:
-            sep = ','
-    
-    print(f"Separador detectado: '{sep}'")
+    if caminho.suffix in FORMATOS_COLUNARES:
+        df = _ler_colunar(caminho, colunas, filtros)
+        print(f"Registros: {len(df):,}")
+        print(f"Colunas: {len(df.columns)}")
+        return df
     
-    df = pd.read_csv(
-        caminho,
-        sep=sep,
-        encoding='utf-8',
-        on_bad_lines='skip',
-        low_memory=False
-    )
+    df = _ler_csv(caminho, colunas, filtros)
     
-    print(f"Base setorial carregada com sucesso!")
+    print(f"✅ Base setorial carregada com sucesso!")
     print(f"Registros: {len(df):,}")
     print(f"Colunas: {len(df.columns)}")
     
     return df
 
 
-def carregar_base_agibank(caminho: str = None) -> pd.DataFrame:
-    """Carrega base Agibank (Gold) com detecção automática de separador"""
-    if caminho is None:
-        caminho = CAMINHO_GOLD / ARQUIVO_SP_AGIBANK
-    else:
-        caminho = Path(caminho)
+@_memoizado(CAMINHO_GOLD, ARQUIVO_SP_AGIBANK, DATASET_SP_AGIBANK)
+def carregar_base_agibank(caminho: str = None, colunas: list = None, filtros: list = None) -> pd.DataFrame:
+    """Carrega base Agibank (Gold) com detecção automática de separador e encoding"""
+    caminho = _resolver_caminho(caminho, CAMINHO_GOLD, ARQUIVO_SP_AGIBANK, DATASET_SP_AGIBANK)
     
     print(f"Carregando Agibank de: {caminho}")
     
     if not caminho.exists():
         raise FileNotFoundError(f"Arquivo nao encontrado: {caminho}")
     
-    # Detecta o separador lendo a primeira linha
-    with open(caminho, 'r', encoding='utf-8') as f:
-        primeira_linha = f.readline()
-        
-        if primeira_linha.count(';') > primeira_linha.count(','):
-            sep = ';'
-        elif primeira_linha.count(',') > primeira_linha.count(';'):
-            sep = ','
-        elif '\t' in primeira_linha:
-            sep = '\t'
-        else:
-            sep = ','  # Padrão
-    
-    print(f"Separador detectado: '{sep}'")
-    
-    # Lista de configurações para tentar
-    configs = [
-        # Tentativa 1: Engine C com separador detectado
-        {
-            'sep': sep,
-            'encoding': 'utf-8',
-            'on_bad_lines': 'skip',
-            'low_memory': False
-        },
-        # Tentativa 2: Engine Python (mais tolerante)
-        {
-            'sep': sep,
-            'encoding': 'utf-8',
-            'on_bad_lines': 'skip',
-            'engine': 'python'
-        },
-        # Tentativa 3: Latin-1 encoding
-        {
-            'sep': sep,
-            'encoding': 'latin-1',
-            'on_bad_lines': 'skip',
-            'low_memory': False
-        }
-    ]
+    if caminho.suffix in FORMATOS_COLUNARES:
+        df = _ler_colunar(caminho, colunas, filtros)
+        print(f"Registros: {len(df):,}")
+        print(f"Colunas: {len(df.columns)}")
+        return df
     
-    # Tenta cada configuração
-    for i, config in enumerate(configs, 1):
-        try:
-            print(f"Tentativa {i}...")
-            df = pd.read_csv(caminho, **config)
-            print(f"✅ Base Agibank carregada com sucesso (tentativa {i})!")
-            print(f"Registros: {len(df):,}")
-            print(f"Colunas: {len(df.columns)}")
-            return df
-        except Exception as e:
-            print(f"❌ Tentativa {i} falhou: {str(e)[:80]}")
-            if i == len(configs):
-                raise Exception(f"Todas as tentativas falharam. Último erro: {e}")
-
-
-def carregar_base_filtrada(filtro_agibank: bool = None, ano: int = None) -> pd.DataFrame:
-    """Carrega base Silver com filtros aplicados"""
-    df = carregar_base_silver()
+    df = _ler_csv(caminho, colunas, filtros)
+    
+    print(f"✅ Base Agibank carregada com sucesso!")
+    print(f"Registros: {len(df):,}")
+    print(f"Colunas: {len(df.columns)}")
+    
+    return df
+
+
+def carregar_base_filtrada(filtro_agibank: bool = None, ano: int = None, colunas: list = None,
+                           uf=None, periodo: tuple = None) -> pd.DataFrame:
+    """Carrega base Silver com filtros aplicados na leitura
+
+    uf: sigla ou lista de siglas (ex.: 'SP')
+    periodo: (início, fim) inclusivos, 'AAAA' ou 'AAAA-MM' (ex.: ('2025-01', '2025-06'))
+
+    Com a Silver no catálogo (particionada por ano/mes/uf), ano, UF e período
+    descartam partições inteiras antes da leitura. Só as linhas filtradas (e as
+    colunas pedidas) chegam a ser materializadas.
+    """
+    ufs = [uf] if isinstance(uf, str) else uf
+    # O ano também poda as partições de mês
+    periodo_poda = periodo if periodo is not None or ano is None else (str(ano), str(ano))
+
+    caminho = _caminhos_catalogo(DATASET_SILVER, {'uf': ufs} if ufs else None, periodo_poda)
+    no_catalogo = caminho is not None
+    
+    if no_catalogo:
+        print(f"Partições selecionadas: {len(caminho)}")
+        if not caminho:
+            print("Nenhuma partição para os filtros")
+            return pd.DataFrame(columns=colunas or [])
+        caminho = caminho[0] if len(caminho) == 1 else caminho
+    else:
+        caminho = _resolver_caminho(None, CAMINHO_SILVER, ARQUIVO_SILVER_PADRAO)
+    
+    primeiro = caminho[0] if isinstance(caminho, list) else caminho
+    disponiveis = dataset_columns(primeiro) if primeiro.exists() else []
+    
+    filtros = []
+    filtro_nome = False
+    filtro_periodo = periodo is not None and not no_catalogo
     
     if filtro_agibank is not None:
-        if 'is_agibank' in df.columns:
-            df = df[df['is_agibank'] == filtro_agibank].copy()
-            print(f"Filtrado is_agibank={filtro_agibank}: {len(df):,} registros")
+        if 'is_agibank' in disponiveis:
+            filtros.append(('is_agibank', '==', filtro_agibank))
+            print(f"Filtro is_agibank={filtro_agibank}")
         else:
             print(f"Coluna 'is_agibank' nao encontrada. Tentando por 'nome_fantasia'...")
-            if 'nome_fantasia' in df.columns:
-                df = df[df['nome_fantasia'].str.contains('Agibank', case=False, na=False)].copy()
-                print(f"Filtrado por nome_fantasia: {len(df):,} registros")
+            filtro_nome = 'nome_fantasia' in disponiveis
     
     if ano is not None:
-        if 'ano_abertura' in df.columns:
-            df = df[df['ano_abertura'] == ano].copy()
-            print(f"Filtrado ano={ano}: {len(df):,} registros")
+        if 'ano_abertura' in disponiveis:
+            filtros.append(('ano_abertura', '==', ano))
+            print(f"Filtro ano={ano}")
         else:
             print(f"Coluna 'ano_abertura' nao encontrada")
     
+    if ufs and not no_catalogo:
+        if 'uf' in disponiveis:
+            filtros.append(('uf', 'in', list(ufs)))
+            print(f"Filtro uf={list(ufs)}")
+        else:
+            print(f"Coluna 'uf' nao encontrada")
+    
+    if filtro_periodo and not {'ano_abertura', 'mes_abertura'} <= set(disponiveis):
+        print(f"Colunas 'ano_abertura'/'mes_abertura' nao encontradas")
+        filtro_periodo = False
+    
+    # Colunas extras para os filtros aplicados após a leitura
+    extras = (['nome_fantasia'] if filtro_nome else []) + (['ano_abertura', 'mes_abertura'] if filtro_periodo else [])
+    colunas_leitura = colunas
+    if colunas is not None and any(col not in colunas for col in extras):
+        colunas_leitura = list(colunas) + [col for col in extras if col not in colunas]
+    
+    df = carregar_base_silver(caminho, colunas=colunas_leitura, filtros=filtros)
+    
+    # Filtro por nome não é expressável como comparação: aplicado após a leitura
+    if filtro_nome:
+        contem = df['nome_fantasia'].astype(str).str.contains('Agibank', case=False, na=False)
+        df = df[contem == filtro_agibank].copy()
+        print(f"Filtrado por nome_fantasia: {len(df):,} registros")
+    
+    # Período no arquivo legado (sem partições): ano*100 + mês dentro dos limites
+    if filtro_periodo:
+        inicio, fim = period_range(periodo)
+        mes = pd.to_numeric(df['ano_abertura'], errors='coerce') * 100 + pd.to_numeric(df['mes_abertura'], errors='coerce')
+        dentro = mes.notna()
+        if inicio is not None:
+            dentro &= mes >= inicio[0] * 100 + inicio[1]
+        if fim is not None:
+            dentro &= mes <= fim[0] * 100 + fim[1]
+        df = df[dentro].copy()
+        print(f"Filtrado por periodo {periodo}: {len(df):,} registros")
+    
+    if colunas_leitura is not colunas:
+        df = df[list(colunas)]
+    
     return df
 
 
+def _listar_datasets(pasta: Path) -> list:
+    """Lista arquivos de dados (CSV, Parquet e Feather) de uma pasta"""
+    arquivos = []
+    for extensao in FORMAT_EXTENSIONS.values():
+        arquivos.extend(pasta.glob(f'*{extensao}'))
+    return sorted(arquivos)
+
+
 def listar_arquivos_disponiveis():
-    """Lista arquivos CSV disponiveis nas camadas Silver e Gold"""
+    """Lista arquivos de dados disponiveis nas camadas Silver e Gold"""
     print("="*80)
     print("ARQUIVOS DISPONIVEIS")
     print("="*80)
     
     print(f"\nSILVER ({CAMINHO_SILVER}):")
     if CAMINHO_SILVER.exists():
-        arquivos_silver = list(CAMINHO_SILVER.glob('*.csv'))
+        arquivos_silver = _listar_datasets(CAMINHO_SILVER)
         if arquivos_silver:
             for arquivo in arquivos_silver:
                 tamanho_mb = arquivo.stat().st_size / (1024**2)
                 print(f"   {arquivo.name:<50} {tamanho_mb:>8.1f} MB")
         else:
-            print("   Nenhum arquivo CSV encontrado")
+            print("   Nenhum arquivo de dados encontrado")
     else:
         print("   Pasta nao existe")
     
     print(f"\nGOLD ({CAMINHO_GOLD}):")
     if CAMINHO_GOLD.exists():
-        arquivos_gold = list(CAMINHO_GOLD.glob('*.csv'))
+        arquivos_gold = _listar_datasets(CAMINHO_GOLD)
         if arquivos_gold:
             for arquivo in arquivos_gold:
                 tamanho_mb = arquivo.stat().st_size / (1024**2)
                 print(f"   {arquivo.name:<50} {tamanho_mb:>8.1f} MB")
         else:
-            print("   Nenhum arquivo CSV encontrado")
+            print("   Nenhum arquivo de dados encontrado")
     else:
         print("   Pasta nao existe")
     
@@ -1,17 +1,32 @@
 import pandas as pd
 import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import logging
 from datetime import datetime
 import sys
 
 sys.path.append('..')
-from config.settings import QUALITY_CHECKS, PROCESSING_CONFIG, AGIBANK_FILTERS, CONSUMIDOR_GOV_DELETE_COLUMNS
+from config.settings import (PROCESSING_CONFIG, CONSUMIDOR_GOV_DELETE_COLUMNS,
+                             DATA_SOURCES, SCHEMA_EXPLORATION_CONFIG, CATALOG_CONFIG)
+from schema import (consumidor_gov_read_options, bronze_output_dtypes, restore_categories,
+                    schema_fingerprint, load_schema_cache, save_schema_cache, detect_column_drift)
+from entity_matching import match_entities
+from quality import (new_quality_report, profile_frame, merge_profile, merge_report, add_duplicates, file_issues,
+                     save_quality_report, load_quality_state, save_quality_state)
+from bronze_manifest import load_manifest, save_manifest, invalidate_manifest, plan_incremental, register_file
+from dedup import (HASH_COLUMN, row_hashes, new_dedup_index, load_dedup_index, save_dedup_index,
+                   release_file, deduplicate, merge_pending, discard_pending, save_dedup_report)
+from catalog import (publish_dataset, write_partition, open_partition, write_partition_chunk, close_partition,
+                     discard_partition, register_partitions)
+from instrumentation import instrumented, measure, run_in_worker, add_records, start_run, finish_run
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
+@instrumented
 def validate_files():
     
     logger.info("Validando arquivos disponíveis...")
@@ -30,25 +45,81 @@ def validate_files():
     return consumidor_files
 
 
-def explore_data_structure(file_path): 
-    
+def explore_data_structure(file_path, schema_cache=None):
+    """Task 2: Estrutura de um arquivo a partir de uma amostra (cabeçalho + N linhas)
+
+    Lê apenas SCHEMA_EXPLORATION_CONFIG['sample_rows'] linhas. Com schema_cache,
+    arquivos com mesmo tamanho e mtime reaproveitam o resultado anterior.
+    """
     logger.info(f"Explorando estrutura: {Path(file_path).name}")
 
-    sample_df = pd.read_csv(file_path, sep=';', encoding='utf-8')
+    file_name = Path(file_path).name
+    stat = Path(file_path).stat()
+
+    cached = (schema_cache or {}).get(file_name)
+    if cached and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime:
+        logger.info("  Schema em cache (arquivo inalterado)")
+        return cached
+
+    sample_df = pd.read_csv(
+        file_path,
+        sep=DATA_SOURCES['consumidor_gov']['separator'],
+        encoding=DATA_SOURCES['consumidor_gov']['encoding'],
+        nrows=SCHEMA_EXPLORATION_CONFIG['sample_rows']
+    )
+
+    columns = list(sample_df.columns)
 
     info = {
-        'columns': list(sample_df.columns),
-        'dtypes': sample_df.dtypes.to_dict(),
-        'sample_shape': sample_df.shape,
-        'file_name': Path(file_path).name
+        'columns': columns,
+        'dtypes': sample_df.dtypes.astype(str).to_dict(),
+        'sample_shape': list(sample_df.shape),
+        'file_name': file_name,
+        'fingerprint': schema_fingerprint(columns),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime
     }
 
+    if schema_cache is not None:
+        schema_cache[file_name] = info
+
     logger.info(f"  Colunas: {len(info['columns'])}")
     logger.info(f"  Primeiras colunas: {info['columns'][:5]}")
 
     return info
 
 
+@instrumented
+def explore_all_sources(file_paths):
+    """Task 2: Schema amostral de todos os arquivos e verificação de drift de colunas
+
+    Roda antes do processamento pesado; drift é registrado como warning ou,
+    com SCHEMA_EXPLORATION_CONFIG['fail_on_drift'], interrompe a DAG.
+    """
+    logger.info("Explorando estrutura dos arquivos (amostral)...")
+
+    schema_cache = load_schema_cache()
+    infos = [explore_data_structure(file_path, schema_cache) for file_path in sorted(file_paths)]
+    save_schema_cache(schema_cache)
+
+    drift = detect_column_drift(infos)
+
+    for item in drift:
+        logger.warning(
+            f"Drift de colunas em {item['file_name']}: "
+            f"ausentes={item['missing_columns']} extras={item['extra_columns']}"
+        )
+
+    if drift and SCHEMA_EXPLORATION_CONFIG['fail_on_drift']:
+        raise ValueError(f"Drift de colunas em {len(drift)} arquivo(s) - ver log")
+
+    if not drift:
+        logger.info(f"Layout consistente em {len(infos)} arquivos")
+
+    return infos, drift
+
+
+@instrumented
 def delete_columns_dispensaveis(df, file_path):
     logger.info(f"Deletando colunas dispensáveis dentro do dataframe: {Path(file_path).name}")
 
@@ -61,10 +132,10 @@ def delete_columns_dispensaveis(df, file_path):
         df_cleaned = df.drop(columns=existing_columns)
         logger.info(f"Deletadas: {len(existing_columns)}x \n  Colunas: {existing_columns}")
     else: 
-        df_cleaned = df.copy()
-        logger.info(" Nenhuma coluna para deletar encontrada.")
+        df_cleaned = df
+        logger.info(" Nenhuma coluna para deletar encontrada (excluídas na leitura pelo schema).")
 
-    if missing_columns:
+    if existing_columns and missing_columns:
         logger.info(f"Colunas não encontradas: {missing_columns}")
 
     original_cols = len(df.columns)
@@ -74,6 +145,7 @@ def delete_columns_dispensaveis(df, file_path):
     return df_cleaned
     
 
+@instrumented
 def add_metadata_columns(df, file_path, source_type):
     """Task 3: Adicionar colunas de metadados"""
     logger.info("Adicionando metadados...")
@@ -98,11 +170,16 @@ def add_metadata_columns(df, file_path, source_type):
     return df
 
 
+@instrumented
 def filter_agibank_records(df):
-    """Task 4: Identificar e marcar registros do Agibank"""
+    """Task 4: Identificar e marcar registros do Agibank (e das demais instituições alvo)
+
+    Usa entity_matching.match_entities: cada nome fantasia distinto é avaliado uma
+    vez contra INSTITUTION_TARGETS. Além de is_agibank, grava instituicao_alvo.
+    """
     logger.info("Identificando registros Agibank...")
 
-    possible_company_cols = ['Nome Fantasia']
+    possible_company_cols = ['Nome Fantasia', 'nome_fantasia']
     company_col = None
 
     for col in possible_company_cols:
@@ -111,29 +188,41 @@ def filter_agibank_records(df):
             break
 
     if company_col:
-        agibank_mask = df[company_col].str.contains(
-            '|'.join(AGIBANK_FILTERS['bank_names']),
-            case=False,
-            na=False
-        )
+        matches = match_entities(df[company_col])
+
+        df['instituicao_alvo'] = matches
+        agibank_mask = (matches == 'agibank')
 
         df['is_agibank'] = agibank_mask
         agibank_count = agibank_mask.sum()
 
         logger.info(f"Registros Agibank encontrados: {agibank_count}")
         logger.info(f"Percentual Agibank: {(agibank_count/len(df)*100):.2f}%")
+
+        for institution, count in matches.value_counts().items():
+            if institution != 'agibank':
+                logger.info(f"   Registros {institution}: {count}")
     else:
         logger.warning("Coluna de empresa não identificada")
 
     return df
 
+@instrumented
 def clean_duplicates(df, file_name):
+    """Remove duplicatas internas pelo hash da chave (ver dedup.py)
 
+    O hash fica na coluna HASH_COLUMN para a deduplicação entre arquivos
+    reaproveitar o cálculo feito aqui (inclusive nos workers do modo paralelo).
+    """
     logger.info(f"  Limpando duplicatas: {file_name}")
 
     original_rows = len(df)
 
-    df_cleaned = df.drop_duplicates()
+    hashes = row_hashes(df)
+    keep_mask = ~pd.Series(hashes).duplicated().to_numpy()
+
+    df_cleaned = df[keep_mask].copy()
+    df_cleaned[HASH_COLUMN] = hashes[keep_mask]
     duplicates_removed = original_rows - len(df_cleaned)
 
     logger.info(f"   Duplicatas removidas: {duplicates_removed}")
@@ -141,27 +230,20 @@ def clean_duplicates(df, file_name):
     return df_cleaned
 
 
-def quality_check(df, file_name):
-    """Task 5: Verificação de qualidade dos dados"""
-    logger.info(f"Executando verificações de qualidade: {file_name}")
-
-    issues = []
+@instrumented
+def quality_check(df, file_name, duplicates=0):
+    """Task 5: Verificação de qualidade dos dados
 
-    # Check 1: Linhas mínimas
-    if len(df) < QUALITY_CHECKS['min_rows_expected']:
-        issues.append(f"Poucas linhas: {len(df)} < {QUALITY_CHECKS['min_rows_expected']}")
+    duplicates: duplicatas já contadas na deduplicação por hash (sem novo hash das linhas)
 
-    # Check 2: Percentual de nulos por coluna
-    null_percentages = df.isnull().mean()
-    high_null_cols = null_percentages[null_percentages > QUALITY_CHECKS['max_null_percentage']]
+    Retorna o perfil do arquivo (acumulado no relatório de qualidade) e a lista de issues.
+    """
+    logger.info(f"Executando verificações de qualidade: {file_name}")
 
-    if not high_null_cols.empty:
-        issues.append(f"Colunas com muitos nulos: {list(high_null_cols)}")
+    profile = profile_frame(df, file_name, duplicates=duplicates, exclude=[HASH_COLUMN])
 
-    # Check 3: Duplicatas
-    duplicates = df.duplicated().sum()
-    if duplicates > 0:
-        issues.append(f"Registros duplicados: {duplicates}")
+    single_file_report = merge_profile(new_quality_report(), profile)
+    issues = file_issues(single_file_report, file_name)
 
     if issues:
         for issue in issues:
@@ -169,75 +251,395 @@ def quality_check(df, file_name):
     else:
         logger.info("Todos os checks de qualidade passaram")
 
-    df['quality_score'] = 1.0 - (len(issues) * 0.1)
+    return profile, issues
+
+
+@instrumented
+def process_single_file(file_path):
+    """Task 6.1: Pipeline de um arquivo mensal (leitura, limpeza, flags e qualidade)
+
+    Função de nível de módulo para poder ser enviada aos workers do process pool.
+    """
+    file_name = Path(file_path).name
+    logger.info(f"   Processando: {file_name}")
+
+    # 1. Ler arquivo (colunas dispensáveis já ficam fora da leitura)
+    with measure('read_csv', module=__name__) as measurement:
+        df = measurement.output(pd.read_csv(file_path, **consumidor_gov_read_options()))
+    original_rows = len(df)
+
+    # 2. Deletar colunas dispensáveis
+    df = delete_columns_dispensaveis(df, file_path)
+
+    # 3. Adicionar metadados
+    df = add_metadata_columns(df, file_path, 'consumidor_gov')
+
+    # 4. Identificar Agibank
+    df = filter_agibank_records(df)
+
+    # 5. Limpeza de duplicatas e nulos
+    rows_before_dedup = len(df)
+    df = clean_duplicates(df, file_name)
 
-    return df, issues
+    # 6. Verificações de qualidade
+    duplicates_within = rows_before_dedup - len(df)
+    profile, issues = quality_check(df, file_name, duplicates=duplicates_within)
 
+    logger.info(f"   ✅ {file_name}: {original_rows} → {len(df)} registros")
 
-def process_consumidor_gov():
-    """Task 6: Processamento completo Consumidor.gov"""
+    stats = {
+        'rows_in': original_rows,
+        'rows_out': len(df),
+        'rows_agibank': int(df['is_agibank'].sum()),
+        'duplicates_within': duplicates_within,
+        'quality_profile': profile
+    }
+
+    return df, issues, stats
+
+
+@instrumented
+def process_consumidor_gov(parallel=False, max_workers=None):
+    """Task 6: Processamento completo Consumidor.gov
+
+    parallel: processa os arquivos mensais em um process pool
+    max_workers: número de processos (padrão: PROCESSING_CONFIG['max_workers'] ou nº de CPUs)
+    """
     logger.info("Iniciando processamento Consumidor.gov...")
 
+    consumidor_files = sorted(glob.glob("../data/bronze/consumidor_gov/*.csv"))
+    processed = []
+    all_issues = []
+
+    if parallel:
+        if max_workers is None:
+            max_workers = PROCESSING_CONFIG['max_workers'] or os.cpu_count()
+        max_workers = max(1, min(max_workers, len(consumidor_files)))
+
+        logger.info(f"   Execução paralela: {max_workers} workers")
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(run_in_worker, process_single_file, file_path) for file_path in consumidor_files
+            ]
+
+            # Resultados coletados na ordem dos arquivos (merge determinístico)
+            for file_path, future in zip(consumidor_files, futures):
+                try:
+                    (df, issues, stats), task_records = future.result()
+                    add_records(task_records)
+                    all_issues.extend(issues)
+                    processed.append((Path(file_path).name, df, stats))
+                except Exception as e:
+                    logger.error(f"   Erro processando {Path(file_path).name}: {str(e)}")
+                    continue
+    else:
+        for file_path in consumidor_files:
+            try:
+                df, issues, stats = process_single_file(file_path)
+                all_issues.extend(issues)
+                processed.append((Path(file_path).name, df, stats))
+            except Exception as e:
+                logger.error(f"   Erro processando {Path(file_path).name}: {str(e)}")
+                continue
+
+    if processed:
+        # Limpeza final de duplicatas entre arquivos: índice de hashes reconstruído
+        # do zero (execução completa), consultado arquivo a arquivo
+        dedup_index = new_dedup_index()
+        dedup_report = []
+        quality_report = new_quality_report()
+        all_dataframes = []
+
+        for file_name, df, stats in processed:
+            merge_profile(quality_report, stats['quality_profile'])
+
+            df, dedup_stats = deduplicate(df, dedup_index, file_name, hashes=df[HASH_COLUMN].to_numpy())
+            add_duplicates(quality_report, file_name, dedup_stats['duplicates_previous'])
+            dedup_stats['duplicates_within'] = stats['duplicates_within']
+            dedup_stats['rows_in'] = stats['rows_in']
+            dedup_report.append(dedup_stats)
+
+            if dedup_stats['duplicates_previous'] > 0:
+                logger.info(f"  {file_name}: {dedup_stats['duplicates_previous']} duplicatas de arquivos anteriores")
+
+            all_dataframes.append(df.drop(columns=[HASH_COLUMN]))
+
+        combined_df = restore_categories(pd.concat(all_dataframes, ignore_index=True))
+        logger.info(f"Consumidor.gov processado: {len(combined_df)} registros totais")
+
+        cross_file_duplicates = sum(item['duplicates_previous'] for item in dedup_report)
+        if cross_file_duplicates:
+            logger.info(f"  Duplicatas entre arquivos removidas: {cross_file_duplicates}")
+
+        # Índice reconstruído do zero: o manifesto incremental deixa de valer
+        save_dedup_index(dedup_index)
+        invalidate_manifest()
+        save_dedup_report(dedup_report)
+        save_quality_report(quality_report)
+        
+        return combined_df, all_issues
+    else:
+        raise Exception("Nenhum arquivo foi processado com sucesso!")
+
+
+def file_partition_key(file_path):
+    """Partição Bronze de um arquivo de origem (modos streaming e incremental), ex.: 'arquivo=2025-01'"""
+    return f"{CATALOG_CONFIG['datasets']['bronze']['file_key']}={Path(file_path).stem}"
+
+
+@instrumented
+def process_consumidor_gov_streaming():
+    """Task 6 (streaming): Processamento em chunks gravando direto no catálogo
+
+    Cada arquivo é lido em blocos de PROCESSING_CONFIG['chunk_size'] linhas e cada
+    bloco passa por deleção de colunas, metadados e identificação Agibank antes de
+    ser anexado à partição do arquivo no dataset Bronze (open_partition, no formato
+    de STORAGE_CONFIG). Apenas um chunk fica em memória por vez.
+    A deduplicação usa o índice de hashes (dedup.py), que ocupa poucos bytes por registro.
+
+    Como no modo batch, um arquivo que falha no meio é descartado por inteiro: a
+    partição, os hashes do buffer, o perfil de qualidade e as contagens do arquivo
+    só são confirmados depois do último chunk.
+    """
+    logger.info("Iniciando processamento Consumidor.gov (modo streaming)...")
+
     consumidor_files = glob.glob("../data/bronze/consumidor_gov/*.csv")
-    all_dataframes = []
+    chunk_size = PROCESSING_CONFIG['chunk_size']
+    bronze_name = CATALOG_CONFIG['datasets']['bronze']['name']
+
+    dedup_index = new_dedup_index()
+    dedup_report = []
+    quality_report = new_quality_report()
+
+    partitions = {}
+    total_records = 0
+    agibank_records = 0
     all_issues = []
 
     for file_path in sorted(consumidor_files):
-        logger.info(f"   Processando: {Path(file_path).name}")
+        file_name = Path(file_path).name
+        logger.info(f"   Processando (streaming): {file_name}")
+
+        file_rows = 0
+        file_agibank = 0
+        file_dedup = {'file_name': file_name, 'rows_in': 0, 'duplicates_within': 0, 'duplicates_previous': 0, 'rows_out': 0}
+        file_report = new_quality_report()
+        partition = None
 
         try:
-            # 1. Ler arquivo
-            df = pd.read_csv(file_path, sep=';', encoding='utf-8')
-            original_rows = len(df)
-
-            # 2. Deletar colunas dispensáveis
-            df = delete_columns_dispensaveis(df, file_path)
-            
-            # 3. Adicionar metadados
-            df = add_metadata_columns(df, file_path, 'consumidor_gov')
-            
-            # 4. Identificar Agibank
-            df = filter_agibank_records(df)
-            
-            # 5. Limpeza de duplicatas e nulos
-            df = clean_duplicates(df, Path(file_path).name)
-            
-            # 6. Verificações de qualidade
-            df, issues = quality_check(df, Path(file_path).name)
+            # Partição do arquivo gravada em arquivo temporário, publicada ao fim do arquivo
+            partition = open_partition(bronze_name, file_partition_key(file_path), dtypes=bronze_output_dtypes())
+            reader = pd.read_csv(file_path, **consumidor_gov_read_options(chunksize=chunk_size))
+
+            for chunk in reader:
+                chunk = delete_columns_dispensaveis(chunk, file_path)
+                chunk = add_metadata_columns(chunk, file_path, 'consumidor_gov')
+                chunk = filter_agibank_records(chunk)
+
+                chunk, chunk_stats = deduplicate(chunk, dedup_index, file_name, merge=False)
+                for key in ('rows_in', 'duplicates_within', 'duplicates_previous', 'rows_out'):
+                    file_dedup[key] += chunk_stats[key]
+
+                chunk_duplicates = chunk_stats['duplicates_within'] + chunk_stats['duplicates_previous']
+                merge_profile(file_report, profile_frame(chunk, file_name, duplicates=chunk_duplicates))
+
+                # O primeiro chunk define o layout (e o esquema colunar) da partição
+                write_partition_chunk(partition, chunk)
+
+                file_rows += len(chunk)
+                file_agibank += int(chunk['is_agibank'].sum())
+
+            info = close_partition(partition)
+
+        except Exception as e:
+            logger.error(f"   Erro processando {file_name}: {str(e)}")
+            # Nada do arquivo é publicado: partição temporária e hashes do buffer descartados
+            if partition is not None:
+                discard_partition(partition)
+            discard_pending(dedup_index)
+            continue
+
+        # Arquivo completo: hashes entram no índice em uma única fusão, e o perfil
+        # e as contagens do arquivo entram nos totais
+        merge_pending(dedup_index)
+        merge_report(quality_report, file_report)
 
+        if info is not None:
+            partitions[file_partition_key(file_path)] = info
+
+        if file_name in quality_report['files']:
+            issues = file_issues(quality_report, file_name)
+            for issue in issues:
+                logger.warning(f"{file_name}: {issue}")
             all_issues.extend(issues)
-            all_dataframes.append(df)
 
-            logger.info(f"   ✅ {Path(file_path).name}: {original_rows} → {len(df)} registros")
+        total_records += file_rows
+        agibank_records += file_agibank
+        dedup_report.append(file_dedup)
+        logger.info(f"   ✅ {file_name}: {file_rows} registros gravados")
+
+    save_dedup_index(dedup_index)
+    invalidate_manifest()
+    save_dedup_report(dedup_report)
+    save_quality_report(quality_report)
+
+    if not partitions:
+        raise Exception("Nenhum arquivo foi processado com sucesso!")
+
+    version = register_partitions(bronze_name, partitions, partition_by=[CATALOG_CONFIG['datasets']['bronze']['file_key']])
+
+    logger.info(f"Consumidor.gov processado (streaming): {total_records} registros totais")
+    logger.info(f"Registro Agibank: {agibank_records}")
+    logger.info(f"Catálogo: {bronze_name} v{version} - {len(partitions)} partições")
+
+    return total_records, agibank_records, all_issues
+
+
+@instrumented
+def process_consumidor_gov_incremental():
+    """Task 6 (incremental): Processa apenas arquivos novos ou alterados
+
+    Cada arquivo mensal vira uma partição própria do dataset Bronze no catálogo
+    (file_partition_key). O manifesto (INCREMENTAL_CONFIG['manifest_path']) guarda
+    tamanho, mtime, hash, contagens e a partição de cada arquivo; só as partições
+    afetadas são regravadas, sempre como arquivos novos (part-<hash>).
+    Os relatórios de duplicatas e de qualidade cobrem todos os arquivos do manifesto:
+    as contagens de deduplicação ficam no manifesto e os perfis de qualidade (com os
+    esboços KMV) em QUALITY_CHECKS['state_path'], refeitos só para os reprocessados.
+    A deduplicação entre meses usa o índice persistente de hashes (dedup.py). O
+    dono de cada hash é o primeiro arquivo (em ordem de nome) que o contém, então
+    uma alteração em um mês muda o que os meses seguintes descartam: todos os
+    arquivos a partir do primeiro alterado/removido são re-deduplicados, com seus
+    hashes liberados antes da passada.
+    """
+    logger.info("Iniciando processamento Consumidor.gov (modo incremental)...")
+
+    bronze_name = CATALOG_CONFIG['datasets']['bronze']['name']
+    consumidor_files = glob.glob("../data/bronze/consumidor_gov/*.csv")
+    manifest = load_manifest()
+    quality_states = load_quality_state()
+
+    # Entradas anteriores ao catálogo (partição em arquivo de nome fixo) ou sem contagens
+    # de duplicatas/perfil de qualidade salvos: reprocessadas
+    legacy = [
+        name for name, entry in manifest['files'].items()
+        if not isinstance(entry['partition'], dict) or 'duplicates_previous' not in entry or name not in quality_states
+    ]
+    for file_name in legacy:
+        del manifest['files'][file_name]
+
+    to_process, unchanged, removed = plan_incremental(consumidor_files, manifest)
+
+    # Cascata: arquivos inalterados posteriores ao primeiro alterado/removido
+    changed = [Path(file_path).name for file_path, _ in to_process] + list(removed)
+    if changed:
+        first_changed = min(changed)
+        cascade = [
+            (file_path, {key: manifest['files'][Path(file_path).name][key] for key in ('size', 'mtime', 'content_hash')})
+            for file_path in unchanged
+            if Path(file_path).name > first_changed
+        ]
+        if cascade:
+            logger.info(f"   Re-deduplicação em cascata: {len(cascade)} arquivos posteriores a {first_changed}")
+        to_process = sorted(to_process + cascade, key=lambda item: Path(item[0]).name)
+
+    dedup_index = load_dedup_index()
+
+    # Hashes liberados antes da passada: um arquivo anterior não pode ser
+    # deduplicado contra hashes de um posterior que ainda vai ser reprocessado
+    for file_name in [Path(file_path).name for file_path, _ in to_process] + list(removed):
+        release_file(dedup_index, file_name)
+
+    all_issues = []
+    processed_files = 0
+
+    for file_path, fingerprint in to_process:
+        file_name = Path(file_path).name
+
+        try:
+            df, issues, stats = process_single_file(file_path)
+
+            df, dedup_stats = deduplicate(df, dedup_index, file_name, hashes=df[HASH_COLUMN].to_numpy())
+            df = df.drop(columns=[HASH_COLUMN])
+
+            file_report = merge_profile(new_quality_report(), stats.pop('quality_profile'))
+            add_duplicates(file_report, file_name, dedup_stats['duplicates_previous'])
+            quality_states[file_name] = file_report
+
+            stats['duplicates_previous'] = dedup_stats['duplicates_previous']
+            stats['rows_out'] = len(df)
+            stats['rows_agibank'] = int(df['is_agibank'].sum())
+
+            partition = write_partition(bronze_name, file_partition_key(file_path), df)
+            register_file(manifest, file_path, fingerprint, stats, partition)
+
+            all_issues.extend(issues)
+            processed_files += 1
 
         except Exception as e:
-            logger.error(f"   Erro processando {Path(file_path).name}: {str(e)}")
+            logger.error(f"   Erro processando {file_name}: {str(e)}")
+            # Hashes já liberados: fora do manifesto, o arquivo é reprocessado na próxima execução
+            manifest['files'].pop(file_name, None)
+            quality_states.pop(file_name, None)
             continue
 
-    if all_dataframes:
-        combined_df = pd.concat(all_dataframes, ignore_index=True)
-        logger.info(f"Consumidor.gov processado: {len(combined_df)} registros totais")
-        
-        # Limpeza final de duplicatas entre arquivos
-        original_combined = len(combined_df)
-        combined_df = combined_df.drop_duplicates()
-        final_combined = len(combined_df)
-        
-        if original_combined != final_combined:
-            logger.info(f"  Duplicatas entre arquivos removidas: {original_combined - final_combined}")
-        
-        return combined_df, all_issues
-    else:
+    # Arquivos que saíram da origem deixam a versão nova (os arquivos de partição
+    # são apagados pelo catálogo quando nenhuma versão mantida os referencia)
+    for file_name in removed:
+        del manifest['files'][file_name]
+        logger.info(f"   Partição removida: {file_partition_key(file_name)}")
+
+    save_manifest(manifest)
+    save_dedup_index(dedup_index)
+
+    # Relatórios completos: arquivos reprocessados + inalterados (perfis salvos)
+    quality_states = {name: quality_states[name] for name in sorted(manifest['files'])}
+    save_quality_state(quality_states)
+
+    if to_process or removed:
+        quality_report = new_quality_report()
+        for file_report in quality_states.values():
+            merge_report(quality_report, file_report)
+
+        save_dedup_report([
+            {
+                'file_name': file_name,
+                'rows_in': entry['rows_in'],
+                'duplicates_within': entry['duplicates_within'],
+                'duplicates_previous': entry['duplicates_previous'],
+                'rows_out': entry['rows_out']
+            }
+            for file_name, entry in sorted(manifest['files'].items())
+        ])
+        save_quality_report(quality_report)
+
+    if not manifest['files']:
         raise Exception("Nenhum arquivo foi processado com sucesso!")
 
+    # Partições mensais registradas no catálogo (as inalteradas mantêm o mesmo hash)
+    register_partitions(
+        bronze_name,
+        {file_partition_key(file_name): entry['partition'] for file_name, entry in manifest['files'].items()},
+        partition_by=[CATALOG_CONFIG['datasets']['bronze']['file_key']]
+    )
 
-def save_bronze_output(df, output_path):
-    """Task 7: Salvar dados processados"""
-    logger.info(f"Salvando dados bronze: {output_path}")
+    total_records = sum(entry['rows_out'] for entry in manifest['files'].values())
+    agibank_records = sum(entry['rows_agibank'] for entry in manifest['files'].values())
+
+    logger.info(f"Arquivos reprocessados: {processed_files}/{len(to_process)} (inalterados: {len(unchanged)})")
+    logger.info(f"Consumidor.gov (incremental): {total_records} registros nas partições")
+
+    return total_records, agibank_records, all_issues
 
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    
-    df.to_csv(output_path, index=False, encoding='utf-8', sep=';')
+
+@instrumented
+def save_bronze_output(df):
+    """Task 7: Salvar dados processados (partições mensais registradas no catálogo)"""
+    spec = CATALOG_CONFIG['datasets']['bronze']
+    logger.info(f"Salvando dados bronze: {spec['name']}")
+
+    publish_dataset(spec['name'], df, partition_by=spec['partition_by'])
 
     logger.info(f"Total de registros: {len(df)}")
     logger.info(f"Registro Agibank: {df['is_agibank'].sum()}")
@@ -246,21 +648,44 @@ def save_bronze_output(df, output_path):
     return True
 
 
-def bronze_dag():
-    """DAG principal da camada bronze"""
+def bronze_dag(execution_mode=None, persist=True):
+    """DAG principal da camada bronze
+
+    execution_mode: 'batch', 'parallel', 'streaming' ou 'incremental' (padrão: PROCESSING_CONFIG['execution_mode'])
+    persist: grava a saída Bronze (modos batch/parallel); streaming e incremental sempre gravam
+
+    Retorna o DataFrame Bronze nos modos batch/parallel e None nos modos que só gravam em disco.
+    """
     logger.info("Iniciando DAG Bronze...")
     start_time = datetime.now()
-    version = 1
+    run = start_run('bronze')
+    status = 'erro'
+    df_consumidor = None
+
+    if execution_mode is None:
+        execution_mode = PROCESSING_CONFIG['execution_mode']
+
+    logger.info(f"Modo de execução: {execution_mode}")
 
     try:
         consumidor_files = validate_files()
 
         if consumidor_files:
-            explore_data_structure(consumidor_files[0])
-
-            df_consumidor, issues = process_consumidor_gov()
-
-            save_bronze_output(df_consumidor, f"../data/silver/consumidor_gov_bronze_v{version+1}.csv")
+            explore_all_sources(consumidor_files)
+
+            if execution_mode == 'streaming':
+                total_records, agibank_records, issues = process_consumidor_gov_streaming()
+            elif execution_mode == 'incremental':
+                total_records, agibank_records, issues = process_consumidor_gov_incremental()
+            elif execution_mode in ('batch', 'parallel'):
+                df_consumidor, issues = process_consumidor_gov(parallel=(execution_mode == 'parallel'))
+                if persist:
+                    save_bronze_output(df_consumidor)
+
+                total_records = len(df_consumidor)
+                agibank_records = df_consumidor['is_agibank'].sum()
+            else:
+                raise ValueError(f"Modo de execução inválido: {execution_mode}")
 
             end_time = datetime.now()
             duration = end_time - start_time
@@ -268,15 +693,21 @@ def bronze_dag():
             logger.info("-"*70)
             logger.info("RELATÓRIO BRONZE DAG\n")
             logger.info(f"Duração: {duration}")
-            logger.info(f"Registros processados: {len(df_consumidor)}")
-            logger.info(f"Registros Agibank: {df_consumidor['is_agibank'].sum()}")
+            logger.info(f"Registros processados: {total_records}")
+            logger.info(f"Registros Agibank: {agibank_records}")
             logger.info(f"Issues de qualidade: {len(issues)}")
             logger.info("\nDAG Bronze concluida com sucesso!")
             logger.info("-"*70)
 
+        status = 'ok'
+        return df_consumidor
+
     except Exception as e:
         logger.error(f"Erro DAG Bronze: {str(e)}")
         raise
 
+    finally:
+        finish_run(run, status)
+
 if __name__ == "__main__":
     bronze_dag()
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Manifesto de arquivos processados na camada Bronze - base da ingestão incremental
+"""
+
+import hashlib
+import json
+from pathlib import Path
+import logging
+from datetime import datetime
+import sys
+
+sys.path.append('..')
+from config.settings import INCREMENTAL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def file_content_hash(file_path):
+    """Hash do conteúdo do arquivo, lido em blocos para não carregar o arquivo inteiro"""
+    hasher = hashlib.new(INCREMENTAL_CONFIG['hash_algorithm'])
+
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(INCREMENTAL_CONFIG['hash_block_size']), b''):
+            hasher.update(block)
+
+    return hasher.hexdigest()
+
+
+def load_manifest(manifest_path=None):
+    """Carrega o manifesto (vazio se ainda não existir)"""
+    manifest_path = Path(manifest_path or INCREMENTAL_CONFIG['manifest_path'])
+
+    if not manifest_path.exists():
+        logger.info("Manifesto não encontrado - todos os arquivos serão processados")
+        return {'updated_at': None, 'files': {}}
+
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    logger.info(f"Manifesto carregado: {len(manifest['files'])} arquivos registrados")
+    return manifest
+
+
+def save_manifest(manifest, manifest_path=None):
+    """Grava o manifesto de forma atômica (arquivo temporário + rename)"""
+    manifest_path = Path(manifest_path or INCREMENTAL_CONFIG['manifest_path'])
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+
+    manifest['updated_at'] = datetime.now().isoformat()
+
+    tmp_path = manifest_path.with_name(f"{manifest_path.name}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    tmp_path.replace(manifest_path)
+    logger.info(f"Manifesto salvo: {manifest_path}")
+
+
+def invalidate_manifest(manifest_path=None):
+    """Descarta o manifesto: a próxima execução incremental reprocessa todos os arquivos
+
+    Usado quando uma reconstrução completa (batch/streaming) substitui o índice de
+    deduplicação, que deixa de corresponder às partições registradas no manifesto.
+    """
+    manifest_path = Path(manifest_path or INCREMENTAL_CONFIG['manifest_path'])
+
+    if manifest_path.exists():
+        manifest_path.unlink()
+        logger.info("Manifesto invalidado - índice de deduplicação reconstruído por execução completa")
+
+
+def plan_incremental(file_paths, manifest):
+    """Separa os arquivos em novos/alterados e inalterados
+
+    Tamanho e mtime iguais ao manifesto dispensam o hash. Se só o mtime mudou,
+    o hash decide (arquivo copiado/tocado sem alteração de conteúdo).
+
+    Retorna (to_process, unchanged, removed), onde to_process é uma lista de
+    tuplas (file_path, fingerprint) e removed lista nomes que saíram da origem.
+    """
+    registered = manifest['files']
+    to_process = []
+    unchanged = []
+
+    for file_path in sorted(file_paths):
+        path = Path(file_path)
+        stat = path.stat()
+        entry = registered.get(path.name)
+
+        fingerprint = {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            unchanged.append(file_path)
+            continue
+
+        fingerprint['content_hash'] = file_content_hash(path)
+
+        if entry and entry['content_hash'] == fingerprint['content_hash']:
+            # Conteúdo igual: só atualiza o mtime registrado
+            entry['mtime'] = stat.st_mtime
+            unchanged.append(file_path)
+            continue
+
+        status = 'alterado' if entry else 'novo'
+        logger.info(f"   {path.name}: {status}")
+        to_process.append((file_path, fingerprint))
+
+    current_names = {Path(file_path).name for file_path in file_paths}
+    removed = [name for name in registered if name not in current_names]
+
+    logger.info(
+        f"Plano incremental: {len(to_process)} para processar, "
+        f"{len(unchanged)} inalterados, {len(removed)} removidos"
+    )
+
+    return to_process, unchanged, removed
+
+
+def register_file(manifest, file_path, fingerprint, stats, partition):
+    """Registra (ou atualiza) um arquivo processado no manifesto
+
+    stats: contagens retornadas por process_single_file (rows_in, rows_out, rows_agibank)
+        e pela deduplicação (duplicates_within, duplicates_previous)
+    partition: descrição da partição no catálogo (catalog.write_partition)
+    """
+    manifest['files'][Path(file_path).name] = {
+        'size': fingerprint['size'],
+        'mtime': fingerprint['mtime'],
+        'content_hash': fingerprint['content_hash'],
+        'rows_in': int(stats['rows_in']),
+        'rows_out': int(stats['rows_out']),
+        'rows_agibank': int(stats['rows_agibank']),
+        'duplicates_within': int(stats['duplicates_within']),
+        'duplicates_previous': int(stats['duplicates_previous']),
+        'partition': {key: value for key, value in partition.items() if key != 'reused'},
+        'processed_at': datetime.now().isoformat()
+    }
@@ -0,0 +1,463 @@
+"""
+Catálogo de datasets - versões, partições, esquema, contagens e hashes de conteúdo
+
+Cada dataset (ex.: silver/consumidor_gov) tem versões numeradas; cada versão lista
+suas partições (mês para Bronze/Silver, UF para Gold) com caminho, registros e hash.
+As partições são gravadas pelo hash do conteúdo, então uma partição inalterada é
+compartilhada entre versões em vez de regravada, e um arquivo de partição nunca é
+sobrescrito: toda versão mantida continua reproduzível. As DAGs e os loaders
+resolvem a versão mais recente ('latest') pelo catálogo, sem nomes _vN fixos.
+"""
+
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from pathlib import Path
+import logging
+from datetime import datetime
+import sys
+
+sys.path.append('..')
+from config.settings import CATALOG_CONFIG, CATEGORY_REGISTRY_CONFIG, PIPELINE_CONFIG, STORAGE_CONFIG
+from storage import dataset_path, read_dataset, write_dataset, open_chunk_writer, write_chunk, close_chunk_writer
+from category_registry import load_category_registry, encode_column
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITION = 'completo'   # Datasets sem particionamento
+MISSING_KEY = 'nd'               # Valor nulo na coluna de partição
+
+
+def load_catalog(catalog_path=None):
+    """Carrega o catálogo (vazio se ainda não existir)"""
+    catalog_path = Path(catalog_path or CATALOG_CONFIG['catalog_path'])
+
+    if not catalog_path.exists():
+        return {'updated_at': None, 'datasets': {}}
+
+    with open(catalog_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_catalog(catalog, catalog_path=None):
+    """Grava o catálogo de forma atômica (arquivo temporário + rename)"""
+    catalog_path = Path(catalog_path or CATALOG_CONFIG['catalog_path'])
+    catalog_path.parent.mkdir(parents=True, exist_ok=True)
+
+    catalog['updated_at'] = datetime.now().isoformat()
+
+    tmp_path = catalog_path.with_name(f"{catalog_path.name}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, ensure_ascii=False, indent=2)
+
+    tmp_path.replace(catalog_path)
+
+
+def _hash_frame(hasher, df, index=False, header=True):
+    """Acrescenta um bloco de registros ao hash (header: colunas e tipos, só no primeiro bloco)
+
+    Colunas de CATALOG_CONFIG['hash_exclude_columns'] (metadados da execução,
+    como processed_at) não entram no hash.
+    """
+    df = df.drop(columns=[col for col in CATALOG_CONFIG['hash_exclude_columns'] if col in df.columns])
+
+    if header:
+        hasher.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode('utf-8'))
+        if index:
+            hasher.update(repr(list(df.index.names)).encode('utf-8'))
+
+    hasher.update(pd.util.hash_pandas_object(df, index=index).to_numpy().tobytes())
+
+
+def content_hash(df, index=False):
+    """Hash do conteúdo de um DataFrame (colunas, tipos e valores, na ordem)"""
+    hasher = hashlib.new(CATALOG_CONFIG['hash_algorithm'])
+    _hash_frame(hasher, df, index)
+    return hasher.hexdigest()
+
+
+def _format_key_value(value):
+    if isinstance(value, (int, np.integer)) or (isinstance(value, float) and value.is_integer()):
+        return f"{int(value):02d}"
+    return str(value).strip().replace('/', '-')
+
+
+def partition_keys(df, partition_by):
+    """Chave de partição de cada registro, ex.: 'ano=2025/mes=01'
+
+    partition_by: {nome da chave: coluna}; None = partição única
+    """
+    if not partition_by:
+        return pd.Series(DEFAULT_PARTITION, index=df.index)
+
+    keys = None
+    for name, column in partition_by.items():
+        # Formata só os valores distintos
+        codes, uniques = pd.factorize(df[column], use_na_sentinel=True)
+        labels = np.array([f"{name}={_format_key_value(value)}" for value in uniques] + [f"{name}={MISSING_KEY}"],
+                          dtype=object)
+        part = pd.Series(labels[codes], index=df.index)
+        keys = part if keys is None else keys + '/' + part
+
+    return keys
+
+
+def _partition_path(name, key, digest):
+    return dataset_path(Path(CATALOG_CONFIG['data_dir']) / name / key / f"part-{digest[:16]}")
+
+
+def _describe_partition(path, rows, digest, schema, reused):
+    return {
+        'path': path.relative_to(Path(CATALOG_CONFIG['data_dir'])).as_posix(),
+        'rows': rows,
+        'content_hash': digest,
+        'schema': schema,
+        'reused': reused
+    }
+
+
+def write_partition(name, key, df, index=False, sep=None):
+    """Grava uma partição pelo hash do conteúdo (não regrava se já existir)
+
+    Pode ser chamada em processos worker: não altera o catálogo.
+    Retorna a descrição da partição para register_version.
+    """
+    digest = content_hash(df, index=index)
+    path = _partition_path(name, key, digest)
+
+    reused = path.exists()
+    if not reused:
+        write_dataset(df, path, index=index, sep=sep)
+
+    schema_df = df.reset_index() if index else df
+    schema = {str(col): str(dtype) for col, dtype in schema_df.dtypes.items()}
+
+    return _describe_partition(path, len(df), digest, schema, reused)
+
+
+def open_partition(name, key, dtypes=None):
+    """Abre uma partição gravada em chunks (modo streaming)
+
+    Os chunks vão para um arquivo temporário na pasta da partição e o hash do
+    conteúdo é acumulado a cada chunk. close_partition publica o arquivo como
+    part-<hash>; discard_partition o apaga sem publicar nada.
+    dtypes: tipos declarados por coluna (open_chunk_writer)
+    """
+    staging = dataset_path(Path(CATALOG_CONFIG['data_dir']) / name / key / f"tmp-{os.getpid()}")
+
+    return {
+        'name': name,
+        'key': key,
+        'writer': open_chunk_writer(staging, dtypes=dtypes),
+        'hasher': hashlib.new(CATALOG_CONFIG['hash_algorithm']),
+        'rows': 0,
+        'schema': None
+    }
+
+
+def write_partition_chunk(state, df):
+    """Anexa um chunk à partição aberta por open_partition"""
+    _hash_frame(state['hasher'], df, header=state['schema'] is None)
+
+    if state['schema'] is None:
+        state['schema'] = {str(col): str(dtype) for col, dtype in df.dtypes.items()}
+
+    write_chunk(state['writer'], df)
+    state['rows'] += len(df)
+
+
+def close_partition(state):
+    """Publica a partição aberta por open_partition (part-<hash>, sem regravar uma igual)
+
+    Retorna a descrição para register_version (None se nenhum chunk foi gravado).
+    """
+    staging = close_chunk_writer(state['writer'])
+    if not staging.exists():
+        return None
+
+    digest = state['hasher'].hexdigest()
+    path = _partition_path(state['name'], state['key'], digest)
+
+    reused = path.exists()
+    if reused:
+        staging.unlink()
+    else:
+        staging.replace(path)
+
+    return _describe_partition(path, state['rows'], digest, state['schema'], reused)
+
+
+def discard_partition(state):
+    """Descarta a partição aberta por open_partition (arquivo temporário apagado)"""
+    staging = close_chunk_writer(state['writer'])
+    if staging.exists():
+        staging.unlink()
+
+
+def register_version(catalog, name, partitions, partition_by=None, carry_over=False):
+    """Registra uma nova versão do dataset se alguma partição mudou
+
+    partitions: {chave: descrição} (write_partition / close_partition)
+    carry_over: mantém as partições da versão anterior que não foram informadas
+        (ex.: Gold recortado só para SP mantém as demais UFs)
+    Retorna o número da versão vigente.
+    """
+    entry = catalog['datasets'].setdefault(name, {'latest': None, 'versions': {}})
+    previous = entry['versions'].get(str(entry['latest'])) if entry['latest'] else None
+
+    partitions = {key: {k: v for k, v in info.items() if k != 'reused'} for key, info in partitions.items()}
+    if carry_over and previous:
+        partitions = {**previous['partitions'], **partitions}
+
+    if previous and {key: info['content_hash'] for key, info in previous['partitions'].items()} == \
+            {key: info['content_hash'] for key, info in partitions.items()}:
+        return entry['latest']
+
+    version = (entry['latest'] or 0) + 1
+    entry['versions'][str(version)] = {
+        'created_at': datetime.now().isoformat(),
+        'pipeline_version': PIPELINE_CONFIG['version'],
+        'format': STORAGE_CONFIG['format'],
+        'partition_by': list(partition_by or []),
+        'rows': int(sum(info['rows'] or 0 for info in partitions.values())),
+        'partitions': dict(sorted(partitions.items()))
+    }
+    entry['latest'] = version
+
+    return version
+
+
+def prune_versions(catalog, name, keep=None):
+    """Remove do catálogo as versões antigas do dataset, mantendo as `keep` mais recentes
+
+    Retorna os números das versões removidas.
+    """
+    keep = keep or CATALOG_CONFIG['keep_versions']
+    entry = catalog['datasets'].get(name)
+    if entry is None:
+        return []
+
+    versions = sorted(entry['versions'], key=int)
+    removed = versions[:-keep] if len(versions) > keep else []
+    for version in removed:
+        del entry['versions'][version]
+
+    return [int(version) for version in removed]
+
+
+def collect_garbage(catalog, names=None, data_dir=None):
+    """Apaga os arquivos part-* que nenhuma versão mantida no catálogo referencia
+
+    names: datasets a verificar (padrão: todos). Só as pastas dos datasets são
+    varridas, e só arquivos part-*. Retorna o número de arquivos apagados.
+    """
+    data_dir = Path(data_dir or CATALOG_CONFIG['data_dir'])
+    names = list(catalog['datasets']) if names is None else names
+
+    referenced = {
+        (data_dir / info['path']).resolve()
+        for entry in catalog['datasets'].values()
+        for version in entry['versions'].values()
+        for info in version['partitions'].values()
+    }
+
+    removed = 0
+    for name in names:
+        dataset_dir = data_dir / name
+        if not dataset_dir.is_dir():
+            continue
+
+        for path in dataset_dir.rglob('part-*'):
+            if path.is_file() and path.resolve() not in referenced:
+                path.unlink()
+                removed += 1
+
+        # Pastas de partição que ficaram vazias (mais profundas primeiro)
+        for folder in sorted((p for p in dataset_dir.rglob('*') if p.is_dir()), key=lambda p: len(p.parts), reverse=True):
+            if not any(folder.iterdir()):
+                folder.rmdir()
+
+    if removed:
+        logger.info(f"Catálogo: {removed} arquivos de partição sem referência apagados")
+    return removed
+
+
+def publish_dataset(name, df, partition_by=None, index=False, carry_over=False, catalog_path=None):
+    """Grava um DataFrame particionado e registra a versão no catálogo
+
+    partition_by: {nome da chave: coluna} (None = partição única)
+    Retorna o número da versão vigente.
+    """
+    keys = partition_keys(df, partition_by)
+
+    partitions = {}
+    for key, positions in keys.groupby(keys.to_numpy(), sort=True).indices.items():
+        part = df.iloc[positions]
+        partitions[key] = write_partition(name, key, part if index else part.reset_index(drop=True), index=index)
+
+    version = register_partitions(name, partitions, partition_by, carry_over, catalog_path)
+
+    reused = sum(info['reused'] for info in partitions.values())
+    logger.info(
+        f"Catálogo: {name} v{version} - {len(partitions)} partições "
+        f"({reused} reaproveitadas), {len(df):,} registros"
+    )
+    return version
+
+
+def register_partitions(name, partitions, partition_by=None, carry_over=False, catalog_path=None):
+    """Registra partições já gravadas (write_partition / close_partition) como nova versão
+
+    Versões além de CATALOG_CONFIG['keep_versions'] saem do catálogo e os arquivos
+    que deixaram de ser referenciados são apagados. Retorna o número da versão vigente.
+    """
+    catalog = load_catalog(catalog_path)
+    version = register_version(catalog, name, partitions, partition_by, carry_over)
+    prune_versions(catalog, name)
+    save_catalog(catalog, catalog_path)
+    collect_garbage(catalog, [name])
+
+    return version
+
+
+def parse_partition_key(key):
+    """'ano=2025/mes=01/uf=SP' -> {'ano': '2025', 'mes': '01', 'uf': 'SP'}"""
+    return dict(part.split('=', 1) for part in key.split('/') if '=' in part)
+
+
+def _period_bound(value, end=False):
+    parts = [int(part) for part in str(value).split('-')[:2]]
+    return (parts[0], parts[1] if len(parts) > 1 else (12 if end else 1))
+
+
+def period_range(period):
+    """(início, fim) 'AAAA' ou 'AAAA-MM' -> ((ano, mês), (ano, mês)); None = lado aberto
+
+    ('2025', '2025-03') -> ((2025, 1), (2025, 3))
+    """
+    start, end = period or (None, None)
+    return (
+        _period_bound(start) if start is not None else None,
+        _period_bound(end, end=True) if end is not None else None
+    )
+
+
+def select_partitions(partitions, values=None, period=None):
+    """Poda de partições pelas chaves, sem abrir arquivos
+
+    values: {nome da chave: valor ou lista de valores}, ex.: {'uf': ['SP', 'RJ']}
+    period: (início, fim) inclusivos, 'AAAA' ou 'AAAA-MM' (None em um dos lados = aberto),
+        comparado às chaves de CATALOG_CONFIG['period_keys']
+    Partições sem a chave (ex.: 'completo') são mantidas; as de valor nulo ('nd') não.
+    """
+    values = {
+        name: {_format_key_value(v) for v in (allowed if isinstance(allowed, (list, tuple, set)) else [allowed])}
+        for name, allowed in (values or {}).items()
+    }
+    year_key, month_key = CATALOG_CONFIG['period_keys']
+    start, end = period_range(period)
+
+    selected = {}
+    for key, path in partitions.items():
+        parsed = parse_partition_key(key)
+
+        if any(name in parsed and parsed[name] not in allowed for name, allowed in values.items()):
+            continue
+
+        if (start or end) and year_key in parsed and month_key in parsed:
+            if MISSING_KEY in (parsed[year_key], parsed[month_key]):
+                continue
+            month = (int(parsed[year_key]), int(parsed[month_key]))
+            if (start and month < start) or (end and month > end):
+                continue
+
+        selected[key] = path
+
+    return selected
+
+
+def dataset_partitions(name, version=None, catalog=None, data_dir=None, values=None, period=None):
+    """Caminhos das partições de uma versão ('latest' por padrão): {chave: Path}
+
+    values/period: poda das partições (select_partitions)
+    Levanta KeyError se o dataset (ou a versão) não estiver no catálogo.
+    """
+    catalog = load_catalog() if catalog is None else catalog
+    data_dir = Path(data_dir or CATALOG_CONFIG['data_dir'])
+
+    entry = catalog['datasets'].get(name)
+    if entry is None or entry['latest'] is None:
+        raise KeyError(f"Dataset fora do catálogo: {name}")
+
+    version = entry['latest'] if version in (None, 'latest') else version
+    if str(version) not in entry['versions']:
+        raise KeyError(f"Versão {version} não registrada para {name}")
+
+    partitions = {
+        key: data_dir / info['path']
+        for key, info in entry['versions'][str(version)]['partitions'].items()
+    }
+
+    if values or period:
+        partitions = select_partitions(partitions, values, period)
+
+    return partitions
+
+
+def concat_partitions(frames, registry_path=None):
+    """Concatena os DataFrames lidos das partições de um dataset
+
+    Categorias diferentes entre partições (ex.: partição reaproveitada, gravada com
+    um dicionário mais curto) viram object na concatenação. Colunas do dicionário
+    persistente são recodificadas por ele (códigos estáveis); as demais, pela união
+    das categorias das partições, na ordem em que aparecem.
+    registry_path: dicionário de categorias (padrão: CATEGORY_REGISTRY_CONFIG['registry_path'])
+    """
+    df = pd.concat(frames, ignore_index=True)
+
+    categorical = [
+        col for col, col_dtype in frames[0].dtypes.items() if isinstance(col_dtype, pd.CategoricalDtype)
+    ]
+    registry = load_category_registry(registry_path) if set(categorical) & set(CATEGORY_REGISTRY_CONFIG['columns']) else None
+
+    for col in categorical:
+        if registry is not None and col in registry['columns']:
+            # Cópia da lista: a leitura não altera o dicionário persistido
+            df[col], _ = encode_column(df[col], list(registry['columns'][col]))
+        elif not isinstance(df[col].dtype, pd.CategoricalDtype):
+            if all(isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames):
+                union = union_categoricals([frame[col] for frame in frames], ignore_order=True)
+                df[col] = pd.Series(union, index=df.index, name=col)
+            else:
+                df[col] = df[col].astype('category')
+
+    return df
+
+
+def read_catalog_dataset(name, version=None, columns=None, dtype=None, filters=None, values=None, period=None):
+    """Lê e concatena as partições de uma versão do dataset ('latest' por padrão)
+
+    values/period: lê apenas as partições selecionadas (select_partitions)
+    """
+    all_partitions = dataset_partitions(name, version)
+    partitions = select_partitions(all_partitions, values, period) if values or period else all_partitions
+
+    if not partitions:
+        # Nada a ler: estrutura vazia a partir de uma partição qualquer
+        first = next(iter(all_partitions.values()))
+        logger.info(f"Dataset do catálogo sem partições para a seleção: {name}")
+        return read_dataset(first, columns=columns, dtype=dtype).iloc[:0].reset_index(drop=True)
+
+    frames = [
+        read_dataset(path, columns=columns, dtype=dtype, filters=filters)
+        for path in partitions.values()
+    ]
+    df = concat_partitions(frames)
+
+    logger.info(
+        f"Dataset do catálogo lido: {name} - {len(partitions)}/{len(all_partitions)} partições, {len(df):,} registros"
+    )
+    return df
@@ -0,0 +1,91 @@
+"""
+Dicionário persistente de categorias - códigos estáveis entre execuções
+
+Cada coluna registrada guarda a lista de valores na ordem em que foram vistos pela
+primeira vez; o código de um valor é sua posição na lista. Valores novos só são
+acrescentados ao final, então códigos já emitidos nunca mudam e saídas de meses ou
+execuções diferentes podem ser concatenadas sem recodificação.
+"""
+
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import logging
+from datetime import datetime
+import sys
+
+sys.path.append('..')
+from config.settings import CATEGORY_REGISTRY_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def load_category_registry(registry_path=None):
+    """Carrega o dicionário de categorias (vazio se não existir)"""
+    registry_path = Path(registry_path or CATEGORY_REGISTRY_CONFIG['registry_path'])
+
+    if not registry_path.exists():
+        logger.info("Dicionário de categorias não encontrado - iniciando vazio")
+        return {'updated_at': None, 'columns': {}}
+
+    with open(registry_path, 'r', encoding='utf-8') as f:
+        registry = json.load(f)
+
+    logger.info(f"Dicionário de categorias carregado: {len(registry['columns'])} colunas")
+    return registry
+
+
+def save_category_registry(registry, registry_path=None):
+    """Grava o dicionário de forma atômica (arquivo temporário + rename)"""
+    registry_path = Path(registry_path or CATEGORY_REGISTRY_CONFIG['registry_path'])
+    registry_path.parent.mkdir(parents=True, exist_ok=True)
+
+    registry['updated_at'] = datetime.now().isoformat()
+
+    tmp_path = registry_path.with_name(f"{registry_path.name}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(registry, f, ensure_ascii=False, indent=2)
+
+    tmp_path.replace(registry_path)
+    logger.info(f"Dicionário de categorias salvo: {registry_path}")
+
+
+def encode_column(series, values):
+    """Converte a série para category com as categorias do dicionário
+
+    values: lista de valores registrados da coluna, estendida no lugar com os novos.
+    Retorna (série categórica, nº de valores novos).
+    """
+    codes, uniques = pd.factorize(series)
+    uniques = pd.Index(uniques).astype(str)
+
+    known = pd.Index(values)
+    new_values = sorted(set(uniques[known.get_indexer(uniques) == -1]))
+    values.extend(new_values)
+
+    # Código do dicionário para cada valor distinto; código -1 (nulo) aponta para o -1 do final
+    registry_codes = np.append(pd.Index(values).get_indexer(uniques), -1)
+    mapped = registry_codes[codes]
+
+    categorical = pd.Categorical.from_codes(mapped, categories=values)
+    return pd.Series(categorical, index=series.index, name=series.name), len(new_values)
+
+
+def encode_categories(df, registry, columns=None):
+    """Aplica o dicionário às colunas registradas presentes no DataFrame
+
+    columns: colunas a codificar (padrão: CATEGORY_REGISTRY_CONFIG['columns'])
+    Retorna (df, {coluna: nº de valores novos}).
+    """
+    columns = columns or CATEGORY_REGISTRY_CONFIG['columns']
+    added = {}
+
+    for col in columns:
+        if col not in df.columns:
+            continue
+
+        values = registry['columns'].setdefault(col, [])
+        df[col], added[col] = encode_column(df[col], values)
+
+    return df, added
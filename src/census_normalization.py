@@ -0,0 +1,243 @@
+"""
+Normalização Gold pelo Censo 2022 - população e taxas por 100 mil habitantes
+
+As tabelas de população são lidas uma vez por processo e indexadas por UF, por
+código IBGE e por (UF, nome normalizado). Qualquer agregado é normalizado com uma
+única busca por chave, e as taxas de todas as UFs e municípios saem de um roll-up
+do cubo Gold, sem reler os registros.
+"""
+
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import logging
+import sys
+
+sys.path.append('..')
+from config.settings import CENSUS_NORMALIZATION_CONFIG, IBGE_UF_CODES, CATALOG_CONFIG
+from catalog import write_partition
+from municipalities import normalize_city_names, resolve_municipalities, load_municipality_reference
+from gold_cube import query_cube
+from instrumentation import instrumented
+
+logger = logging.getLogger(__name__)
+
+
+def load_uf_population(spec=None):
+    """População por UF, indexada pela sigla (vazia se a tabela não existir)"""
+    spec = spec or CENSUS_NORMALIZATION_CONFIG['uf_population']
+    path = Path(spec['path'])
+
+    if not path.exists():
+        logger.warning(f"Tabela de população por UF não encontrada: {path}")
+        return pd.Series(dtype='float64', name='populacao')
+
+    table = pd.read_csv(
+        path,
+        sep=spec['separator'],
+        encoding=spec['encoding'],
+        usecols=[spec['uf_column'], spec['population_column']]
+    )
+
+    population = pd.Series(
+        pd.to_numeric(table[spec['population_column']], errors='coerce').to_numpy(),
+        index=pd.Index(table[spec['uf_column']].astype(str).str.strip().str.upper(), name='uf'),
+        name='populacao'
+    )
+    population = population[population.index.isin(list(IBGE_UF_CODES.values()))]
+    population = population[~population.index.duplicated()]
+
+    logger.info(f"População por UF: {len(population)} UFs, {population.sum():,.0f} habitantes")
+    return population
+
+
+def load_municipality_population(specs=None, reference=None):
+    """População municipal: codigo_ibge, uf, nome_normalizado, populacao
+
+    Tabelas sem código IBGE recebem o código pela referência de municípios
+    (nome normalizado exato dentro da UF da tabela).
+    """
+    specs = specs or CENSUS_NORMALIZATION_CONFIG['municipality_population']
+
+    frames = []
+    for spec in specs:
+        path = Path(spec['path'])
+        if not path.exists():
+            logger.warning(f"Tabela de população municipal não encontrada: {path}")
+            continue
+
+        columns = [spec['name_column'], spec['population_column']]
+        if spec.get('code_column'):
+            columns.append(spec['code_column'])
+
+        table = pd.read_csv(path, sep=spec['separator'], encoding=spec['encoding'], usecols=columns)
+
+        frame = pd.DataFrame({
+            'codigo_ibge': (
+                pd.to_numeric(table[spec['code_column']], errors='coerce')
+                if spec.get('code_column') else np.nan
+            ),
+            'nome_normalizado': normalize_city_names(table[spec['name_column']]).to_numpy(),
+            'populacao': pd.to_numeric(table[spec['population_column']], errors='coerce')
+        })
+        frame['uf'] = (
+            (frame['codigo_ibge'] // 100000).map(IBGE_UF_CODES)
+            if spec.get('code_column') else spec['uf']
+        )
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=['codigo_ibge', 'uf', 'nome_normalizado', 'populacao'])
+
+    population = pd.concat(frames, ignore_index=True).dropna(subset=['populacao'])
+
+    # Código IBGE pelo nome para as tabelas que não o trazem
+    missing_code = population['codigo_ibge'].isna()
+    if missing_code.any():
+        try:
+            reference = load_municipality_reference() if reference is None else reference
+            keys = pd.MultiIndex.from_frame(population.loc[missing_code, ['uf', 'nome_normalizado']])
+            lookup = reference.drop_duplicates(['uf', 'nome_normalizado'])
+            positions = pd.MultiIndex.from_frame(lookup[['uf', 'nome_normalizado']]).get_indexer(keys)
+            codes = np.append(lookup['codigo_ibge'].to_numpy(dtype='float64'), np.nan)[positions]
+            population.loc[missing_code, 'codigo_ibge'] = codes
+        except FileNotFoundError as e:
+            logger.warning(f"Municípios sem código IBGE (referência indisponível): {e}")
+
+    population['codigo_ibge'] = population['codigo_ibge'].astype('Int64')
+    population = population.drop_duplicates(['uf', 'nome_normalizado'])
+
+    logger.info(
+        f"População municipal: {len(population):,} municípios em {population['uf'].nunique()} UFs "
+        f"({population['codigo_ibge'].notna().sum():,} com código IBGE)"
+    )
+    return population[['codigo_ibge', 'uf', 'nome_normalizado', 'populacao']].reset_index(drop=True)
+
+
+@lru_cache(maxsize=1)
+def _default_uf_population():
+    return load_uf_population()
+
+
+@lru_cache(maxsize=1)
+def _default_municipality_population():
+    return load_municipality_population()
+
+
+def attach_population(df, level='municipio', uf_col='uf', city_col='cidade', population=None):
+    """Série de população alinhada ao DataFrame (busca por chave, sem loops)
+
+    level: 'uf' (pela sigla) ou 'municipio' (por codigo_ibge quando a coluna
+    existe, completando pelo par (UF, nome normalizado))
+    """
+    if level == 'uf':
+        population = _default_uf_population() if population is None else population
+        positions = population.index.get_indexer(df[uf_col].astype(str))
+        values = np.append(population.to_numpy(dtype='float64'), np.nan)[positions]
+        return pd.Series(values, index=df.index, name='populacao')
+
+    if level != 'municipio':
+        raise ValueError(f"Nível de normalização inválido: {level} (opções: ['uf', 'municipio'])")
+
+    population = _default_municipality_population() if population is None else population
+    pop_values = np.append(population['populacao'].to_numpy(dtype='float64'), np.nan)
+    values = np.full(len(df), np.nan)
+
+    if 'codigo_ibge' in df.columns:
+        by_code = population.dropna(subset=['codigo_ibge']).drop_duplicates('codigo_ibge')
+        positions = pd.Index(by_code['codigo_ibge'].astype('int64')).get_indexer(
+            pd.to_numeric(df['codigo_ibge'], errors='coerce').fillna(-1).astype('int64')
+        )
+        values = np.append(by_code['populacao'].to_numpy(dtype='float64'), np.nan)[positions]
+
+    pending = np.isnan(values)
+    if pending.any():
+        keys = pd.MultiIndex.from_arrays([
+            df[uf_col].astype(str).to_numpy()[pending],
+            normalize_city_names(df[city_col].to_numpy()[pending]).to_numpy()
+        ])
+        positions = pd.MultiIndex.from_frame(population[['uf', 'nome_normalizado']]).get_indexer(keys)
+        values[pending] = pop_values[positions]
+
+    return pd.Series(values, index=df.index, name='populacao')
+
+
+def per_capita_rates(df, population, rates=None):
+    """Anexa populacao e as taxas por CENSUS_NORMALIZATION_CONFIG['rate_base'] habitantes
+
+    rates: {coluna da taxa: coluna de contagem} (padrão: CENSUS_NORMALIZATION_CONFIG['rates'])
+    """
+    rates = rates or CENSUS_NORMALIZATION_CONFIG['rates']
+    rate_base = CENSUS_NORMALIZATION_CONFIG['rate_base']
+
+    df = df.copy()
+    df['populacao'] = pd.array(population.round(), dtype='Int64')
+    valid_population = population.where(population > 0)
+
+    for rate_col, count_col in rates.items():
+        df[rate_col] = (df[count_col] / valid_population * rate_base).round(2)
+
+    return df
+
+
+def normalize_states(cube):
+    """Agregado por UF (todas as UFs do cubo) com população e taxas"""
+    states = query_cube(cube, by='uf').reset_index()
+    states['uf'] = states['uf'].astype(str)
+
+    states = per_capita_rates(states, attach_population(states, level='uf'))
+    return states.sort_values('uf', ignore_index=True)
+
+
+def normalize_municipalities(cube):
+    """Agregado por município (todas as UFs do cubo) com população e taxas
+
+    Os pares (UF, cidade) do roll-up são resolvidos na referência IBGE antes da
+    busca da população; o custo é proporcional ao número de cidades distintas.
+    """
+    municipalities = query_cube(cube, by=['uf', 'cidade']).reset_index()
+    municipalities['uf'] = municipalities['uf'].astype(str)
+    municipalities['cidade'] = municipalities['cidade'].astype(object)
+
+    try:
+        municipalities, _ = resolve_municipalities(municipalities)
+    except FileNotFoundError as e:
+        logger.warning(f"Municípios normalizados apenas pelo nome (referência indisponível): {e}")
+
+    municipalities = per_capita_rates(municipalities, attach_population(municipalities, level='municipio'))
+    return municipalities.sort_values(['uf', 'registros'], ascending=[True, False], ignore_index=True)
+
+
+@instrumented
+def save_normalized_aggregates(cube):
+    """Etapa Gold: grava os agregados por UF e por município normalizados pelo Censo
+
+    Cada agregado é a partição nacional de um dataset Gold do catálogo (part-<hash>).
+    Retorna {nome: descrição da partição} (vazio se não houver tabela de população por UF).
+    """
+    logger.info("👥 Normalizando agregados pelo Censo 2022...")
+
+    if _default_uf_population().empty:
+        logger.warning("⚠️ Sem população por UF - normalização ignorada")
+        return {}
+
+    prefix = CATALOG_CONFIG['gold_prefix']
+    key = CATALOG_CONFIG['national_partition']
+    outputs = {}
+
+    states = normalize_states(cube)
+    outputs['estados_normalizado'] = write_partition(f"{prefix}estados_normalizado", key, states)
+    logger.info(f"   UFs normalizadas: {states['populacao'].notna().sum()}/{len(states)}")
+
+    municipalities = normalize_municipalities(cube)
+    outputs['municipios_normalizado'] = write_partition(f"{prefix}municipios_normalizado", key, municipalities)
+
+    covered = municipalities['populacao'].notna()
+    logger.info(
+        f"   Municípios com população: {covered.sum():,}/{len(municipalities):,} "
+        f"({municipalities.loc[covered, 'registros'].sum() / max(municipalities['registros'].sum(), 1) * 100:.1f}% dos registros)"
+    )
+
+    logger.info("✅ Normalização pelo Censo concluída")
+    return outputs
@@ -0,0 +1,113 @@
+"""
+Correção de nomes de cidades a partir de uma tabela externa de regras
+
+As regras são aplicadas em uma única passada sobre os pares (uf, cidade) distintos,
+então o custo depende do número de cidades distintas e não do tamanho da tabela.
+"""
+
+import pandas as pd
+from pathlib import Path
+import logging
+import sys
+
+sys.path.append('..')
+from config.settings import CITY_CORRECTIONS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+RULE_COLUMNS = ['uf', 'cidade_original', 'cidade_corrigida']
+
+
+def load_city_corrections(table_path=None):
+    """Carrega e valida a tabela de correções"""
+    table_path = Path(table_path or CITY_CORRECTIONS_CONFIG['table_path'])
+
+    if not table_path.exists():
+        logger.warning(f"Tabela de correções não encontrada: {table_path}")
+        return pd.DataFrame(columns=RULE_COLUMNS)
+
+    rules = pd.read_csv(
+        table_path,
+        sep=CITY_CORRECTIONS_CONFIG['separator'],
+        encoding='utf-8',
+        dtype=str
+    )
+
+    missing = [col for col in RULE_COLUMNS if col not in rules.columns]
+    if missing:
+        raise KeyError(f"Colunas ausentes na tabela de correções: {missing}")
+
+    rules = rules[RULE_COLUMNS].copy()
+    rules['uf'] = rules['uf'].str.strip().str.upper()
+
+    duplicated = rules.duplicated(subset=['uf', 'cidade_original'], keep=False)
+    if duplicated.any():
+        raise ValueError(
+            f"Regras duplicadas na tabela de correções: "
+            f"{rules.loc[duplicated, 'cidade_original'].unique().tolist()}"
+        )
+
+    # Aplicação em passada única: regras encadeadas (A -> B, B -> C) não são seguidas
+    chained = rules['cidade_corrigida'].isin(rules['cidade_original'])
+    if chained.any():
+        logger.warning(f"Regras encadeadas (aplicadas só no primeiro passo): {rules.loc[chained, 'cidade_corrigida'].tolist()}")
+
+    logger.info(f"Tabela de correções carregada: {len(rules)} regras")
+    return rules
+
+
+def apply_city_corrections(df, rules, city_col='cidade', uf_col='uf'):
+    """Aplica as regras à coluna de cidade
+
+    Regras com UF valem só para ela e têm precedência sobre regras sem UF.
+    Retorna (série corrigida, contagem de registros por regra).
+    """
+    keys = pd.DataFrame({
+        'uf': df[uf_col].astype(object),
+        'cidade_original': df[city_col].astype(object)
+    }, index=df.index)
+
+    grouped = keys.groupby(['uf', 'cidade_original'], dropna=False)
+    pair_codes = grouped.ngroup().to_numpy()
+    pairs = grouped.size().rename('registros').reset_index()
+
+    specific = rules[rules['uf'].notna()]
+    general = rules[rules['uf'].isna()].drop(columns='uf')
+
+    pairs = pairs.merge(specific, on=['uf', 'cidade_original'], how='left')
+    pairs = pairs.merge(general, on='cidade_original', how='left', suffixes=('', '_geral'))
+
+    corrected = pairs['cidade_corrigida'].fillna(pairs['cidade_corrigida_geral'])
+
+    result = pd.Series(
+        corrected.fillna(pairs['cidade_original']).to_numpy()[pair_codes],
+        index=df.index,
+        name=city_col
+    )
+
+    # Registros por regra: UF da regra específica ou '' para as regras gerais
+    applied = pairs[corrected.notna()].assign(
+        regra_uf=pairs['uf'].where(pairs['cidade_corrigida'].notna(), '')
+    )
+    hits = applied.groupby(['regra_uf', 'cidade_original'], as_index=False)['registros'].sum()
+
+    report = (
+        rules.assign(regra_uf=rules['uf'].fillna(''))
+        .merge(hits, on=['regra_uf', 'cidade_original'], how='left')
+        .drop(columns='regra_uf')
+    )
+    report['registros'] = report['registros'].fillna(0).astype(int)
+
+    return result, report.sort_values('registros', ascending=False, ignore_index=True)
+
+
+def save_corrections_report(report, uf, report_path=None):
+    """Grava a contagem de registros corrigidos por regra (regras da UF e gerais)"""
+    report_path = Path(report_path or CITY_CORRECTIONS_CONFIG['report_path'].format(uf=uf.lower()))
+    report = report[report['uf'].isna() | (report['uf'] == uf)]
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+
+    report.to_csv(report_path, index=False, encoding='utf-8', sep=';')
+
+    logger.info(f"Relatório de correções de cidades salvo: {report_path}")
+    return report
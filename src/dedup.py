@@ -0,0 +1,208 @@
+"""
+Deduplicação por hash da chave de negócio - índice persistente entre arquivos e execuções
+
+Cada registro é reduzido a um hash de 64 bits da chave (DEDUP_CONFIG['key_columns'],
+ou as colunas originais da fonte). O índice guarda apenas os hashes ordenados e o
+arquivo "dono" de cada um, então a memória cresce 12 bytes por registro único,
+independentemente da largura das linhas. Os hashes novos de um arquivo ficam em
+um buffer (um array ordenado por lote) e entram no índice em uma única fusão por
+arquivo (merge_pending), sem copiar o índice inteiro a cada chunk.
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_integer_dtype
+from pathlib import Path
+import logging
+import sys
+
+sys.path.append('..')
+from config.settings import DEDUP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+HASH_COLUMN = '_dedup_hash'
+
+
+def resolve_key_columns(df):
+    """Colunas usadas na chave de deduplicação"""
+    if DEDUP_CONFIG['key_columns'] is not None:
+        missing = [col for col in DEDUP_CONFIG['key_columns'] if col not in df.columns]
+        if missing:
+            raise KeyError(f"Colunas da chave de deduplicação ausentes: {missing}")
+        return list(DEDUP_CONFIG['key_columns'])
+
+    excluded = set(DEDUP_CONFIG['metadata_columns']) | {HASH_COLUMN}
+    return [col for col in df.columns if col not in excluded]
+
+
+def row_hashes(df, key_columns=None):
+    """Hash uint64 por linha da chave de deduplicação
+
+    Inteiros e booleanos são normalizados para float, pois a mesma coluna pode
+    vir como int em um mês e como float (com nulos) em outro.
+    """
+    key_columns = key_columns or resolve_key_columns(df)
+    key_df = df[key_columns]
+
+    numeric_cols = [
+        col for col in key_columns
+        if is_integer_dtype(key_df[col]) or is_bool_dtype(key_df[col])
+    ]
+    if numeric_cols:
+        key_df = key_df.astype({col: 'float64' for col in numeric_cols})
+
+    return pd.util.hash_pandas_object(key_df, index=False).to_numpy(dtype=np.uint64)
+
+
+def new_dedup_index():
+    """Índice vazio"""
+    return {
+        'hashes': np.empty(0, dtype=np.uint64),
+        'owners': np.empty(0, dtype=np.int32),
+        'files': [],
+        'pending': []
+    }
+
+
+def load_dedup_index(index_path=None):
+    """Carrega o índice persistido (vazio se não existir)"""
+    index_path = Path(index_path or DEDUP_CONFIG['index_path'])
+
+    if not index_path.exists():
+        logger.info("Índice de deduplicação não encontrado - iniciando vazio")
+        return new_dedup_index()
+
+    with np.load(index_path, allow_pickle=False) as data:
+        index = {
+            'hashes': data['hashes'],
+            'owners': data['owners'],
+            'files': [str(name) for name in data['files']],
+            'pending': []
+        }
+
+    logger.info(f"Índice de deduplicação carregado: {len(index['hashes']):,} hashes")
+    return index
+
+
+def save_dedup_index(index, index_path=None):
+    """Persiste o índice em formato binário compacto (.npz)"""
+    index_path = Path(index_path or DEDUP_CONFIG['index_path'])
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    merge_pending(index)
+
+    tmp_path = index_path.with_name(f"{index_path.stem}.tmp.npz")
+    np.savez(
+        tmp_path,
+        hashes=index['hashes'],
+        owners=index['owners'],
+        files=np.array(index['files'], dtype=str)
+    )
+    tmp_path.replace(index_path)
+
+    logger.info(f"Índice de deduplicação salvo: {len(index['hashes']):,} hashes")
+
+
+def _file_id(index, file_name):
+    if file_name not in index['files']:
+        index['files'].append(file_name)
+    return index['files'].index(file_name)
+
+
+def release_file(index, file_name):
+    """Remove do índice os hashes de um arquivo (antes de reprocessá-lo ou ao removê-lo)"""
+    if file_name not in index['files']:
+        return 0
+
+    merge_pending(index)
+    keep = index['owners'] != index['files'].index(file_name)
+    released = int((~keep).sum())
+
+    index['hashes'] = index['hashes'][keep]
+    index['owners'] = index['owners'][keep]
+
+    return released
+
+
+def merge_pending(index):
+    """Funde no índice ordenado os hashes do buffer (uma concatenação + ordenação estável)"""
+    if not index['pending']:
+        return
+
+    hashes = np.concatenate([index['hashes']] + [pending for pending, _ in index['pending']])
+    owners = np.concatenate([index['owners']] + [
+        np.full(len(pending), owner, dtype=np.int32) for pending, owner in index['pending']
+    ])
+    order = np.argsort(hashes, kind='stable')
+
+    index['hashes'] = hashes[order]
+    index['owners'] = owners[order]
+    index['pending'] = []
+
+
+def discard_pending(index):
+    """Descarta os hashes do buffer sem fundi-los (arquivo que falhou no meio do streaming)"""
+    index['pending'] = []
+
+
+def _known(sorted_hashes, hashes):
+    """Máscara dos hashes presentes em um array ordenado (busca binária)"""
+    if len(sorted_hashes) == 0:
+        return np.zeros(len(hashes), dtype=bool)
+
+    positions = np.searchsorted(sorted_hashes, hashes)
+    positions[positions == len(sorted_hashes)] = 0
+    return sorted_hashes[positions] == hashes
+
+
+def deduplicate(df, index, file_name, hashes=None, merge=True):
+    """Remove duplicatas internas e registros já presentes no índice
+
+    hashes: hashes pré-calculados (ex.: coluna HASH_COLUMN gerada no worker)
+    merge: funde os hashes novos no índice ao final da chamada. No modo streaming
+        (vários chunks do mesmo arquivo) use merge=False e chame merge_pending ao
+        fim de cada arquivo: os chunks seguintes consultam também o buffer.
+
+    Atualiza o índice com os registros mantidos e retorna (df_unico, stats).
+    """
+    if hashes is None:
+        hashes = row_hashes(df)
+
+    # 1. Duplicatas dentro do próprio lote
+    within_mask = pd.Series(hashes).duplicated().to_numpy()
+
+    # 2. Duplicatas de arquivos/execuções anteriores e de lotes ainda no buffer
+    previous_mask = _known(index['hashes'], hashes)
+    for pending, _ in index['pending']:
+        previous_mask |= _known(pending, hashes)
+
+    keep_mask = ~within_mask & ~previous_mask
+
+    # 3. Hashes novos no buffer (ordenados por lote)
+    owner = _file_id(index, file_name)
+    index['pending'].append((np.sort(hashes[keep_mask]), np.int32(owner)))
+
+    if merge:
+        merge_pending(index)
+
+    stats = {
+        'file_name': file_name,
+        'rows_in': len(hashes),
+        'duplicates_within': int(within_mask.sum()),
+        'duplicates_previous': int((previous_mask & ~within_mask).sum()),
+        'rows_out': int(keep_mask.sum())
+    }
+
+    return df[keep_mask], stats
+
+
+def save_dedup_report(report, report_path=None):
+    """Grava o relatório de duplicatas por arquivo"""
+    report_path = Path(report_path or DEDUP_CONFIG['report_path'])
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+
+    report_df = pd.DataFrame(report)
+    report_df.to_csv(report_path, index=False, encoding='utf-8', sep=';')
+
+    logger.info(f"Relatório de duplicatas salvo: {report_path}")
+    return report_df
@@ -0,0 +1,79 @@
+"""
+Identificação de instituições pelo nome fantasia - casamento por valor distinto
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import logging
+import sys
+
+sys.path.append('..')
+from config.settings import INSTITUTION_TARGETS
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_name(name):
+    """Normaliza nomes para comparação: sem acentos, minúsculo, espaços simples"""
+    name = unicodedata.normalize('NFKD', str(name))
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    return re.sub(r'\s+', ' ', name).strip().casefold()
+
+
+def compile_targets(targets=None):
+    """Compila um padrão literal por instituição, delimitado por caracteres não alfanuméricos
+
+    Lookarounds em vez de \\b: nomes que terminam em pontuação ('AGIBANK S.A.',
+    'Banco Agibank (Agiplan)') casam no fim do texto ou antes de um espaço.
+    """
+    targets = targets or INSTITUTION_TARGETS
+
+    compiled = {}
+    for key, names in targets.items():
+        alternatives = sorted({normalize_name(name) for name in names}, key=len, reverse=True)
+        compiled[key] = re.compile(r'(?<!\w)(?:' + '|'.join(re.escape(alt) for alt in alternatives) + r')(?!\w)')
+
+    return compiled
+
+
+@lru_cache(maxsize=1)
+def _default_targets():
+    # Padrões de INSTITUTION_TARGETS compilados uma vez por processo (modo streaming chama por chunk)
+    return compile_targets()
+
+
+def build_entity_lookup(names, targets=None):
+    """Tabela nome distinto -> instituição alvo (None quando não casa)"""
+    compiled = compile_targets(targets) if targets else _default_targets()
+    lookup = {}
+
+    for name in names:
+        normalized = normalize_name(name)
+        lookup[name] = next(
+            (key for key, pattern in compiled.items() if pattern.search(normalized)),
+            None
+        )
+
+    return lookup
+
+
+def match_entities(series, targets=None):
+    """Instituição alvo de cada linha
+
+    Fatoriza a coluna (códigos inteiros), casa cada nome distinto uma única vez
+    e propaga o resultado de volta às linhas pelos códigos.
+    """
+    codes, uniques = pd.factorize(series)
+    lookup = build_entity_lookup(uniques, targets)
+
+    matched = np.array([lookup[name] for name in uniques] + [None], dtype=object)
+
+    # Código -1 (nulo) aponta para o None do final do array
+    result = matched[codes]
+
+    logger.info(f"Nomes distintos avaliados: {len(uniques):,} (linhas: {len(series):,})")
+
+    return pd.Series(result, index=series.index, dtype='object')
@@ -0,0 +1,97 @@
+"""
+Motor de agregação dos recortes Gold - uma dimensão por entrada de GOLD_DIMENSIONS
+
+As medidas (registro Agibank, reclamação respondida) são pré-calculadas como colunas
+booleanas uma única vez; cada dimensão é então agregada em um único groupby
+vetorizado, sem funções Python por grupo.
+"""
+
+import pandas as pd
+import logging
+import sys
+
+sys.path.append('..')
+from config.settings import GOLD_DIMENSIONS
+
+logger = logging.getLogger(__name__)
+
+PERCENTAGES = ('percentual_total', 'percentual_agibank', 'taxa_resposta_pct')
+
+
+def measure_columns(df):
+    """Colunas booleanas das medidas, alinhadas ao índice do DataFrame"""
+    return pd.DataFrame({
+        'agibank': df['is_agibank'].fillna(False).astype(bool),
+        'respondida': (df['respondida'] == 'S') if 'respondida' in df.columns else False
+    }, index=df.index)
+
+
+def aggregate_dimension(df, name, measures=None):
+    """Agrega uma dimensão configurada em GOLD_DIMENSIONS
+
+    measures: resultado de measure_columns (reaproveitado entre dimensões)
+    Retorna o agregado indexado pela dimensão, ordenado pelo total (vazio se a
+    coluna não existir).
+    """
+    spec = GOLD_DIMENSIONS[name]
+    column = spec['column']
+    label = spec['label']
+
+    invalid = [pct for pct in spec['percentages'] if pct not in PERCENTAGES]
+    if invalid:
+        raise ValueError(f"Percentuais inválidos em '{name}': {invalid} (opções: {list(PERCENTAGES)})")
+
+    if column not in df.columns:
+        logger.warning(f"⚠️ Coluna '{column}' não encontrada - agregado '{name}' ignorado")
+        return pd.DataFrame()
+
+    if measures is None:
+        measures = measure_columns(df)
+
+    keys = df[column]
+
+    if spec.get('filter'):
+        row_filter = spec['filter']
+        mask = df[row_filter['column']].astype(str).str.contains(
+            row_filter['pattern'], case=False, na=False, regex=True
+        )
+        keys = keys[mask]
+        measures = measures[mask]
+
+    grouped = measures.groupby(keys, observed=True).agg(
+        total=('agibank', 'size'),
+        agibank=('agibank', 'sum'),
+        respondidas=('respondida', 'sum')
+    )
+
+    result = pd.DataFrame(index=grouped.index)
+    result[f'total_{label}'] = grouped['total']
+    result[f'{label}_agibank'] = grouped['agibank'].astype(int)
+
+    if 'percentual_total' in spec['percentages']:
+        result['percentual_total'] = (grouped['total'] / grouped['total'].sum() * 100).round(2)
+    if 'percentual_agibank' in spec['percentages']:
+        result['percentual_agibank'] = (grouped['agibank'] / grouped['total'] * 100).round(2)
+    if 'taxa_resposta_pct' in spec['percentages']:
+        result['taxa_resposta_pct'] = (grouped['respondidas'] / grouped['total'] * 100).round(2)
+
+    return result.sort_values(f'total_{label}', ascending=False)
+
+
+def aggregate_group(df, group):
+    """Agrega todas as dimensões de um recorte ('regional', 'etario', 'setorial')
+
+    Retorna {nome da dimensão: agregado}, omitindo agregados vazios.
+    """
+    measures = measure_columns(df)
+    results = {}
+
+    for name, spec in GOLD_DIMENSIONS.items():
+        if spec['group'] != group:
+            continue
+
+        result = aggregate_dimension(df, name, measures)
+        if not result.empty:
+            results[name] = result
+
+    return results
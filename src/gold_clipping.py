@@ -1,205 +1,237 @@
 """
-DAG Gold - Recortes específicos para análise de negócio - Foco SP
+DAG Gold - Recortes específicos para análise de negócio - por UF (padrão: SP)
 """
 
 import pandas as pd
 import numpy as np
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import logging
 from datetime import datetime
 import sys
 
 sys.path.append('..')
-from config.settings import SP_CITIES_CONFIG, AGE_GROUPS_CONFIG, BUSINESS_SECTORS_CONFIG
+from config.settings import (PIPELINE_CONFIG, GOLD_CLIPPING_CONFIG, SP_CITIES_CONFIG, AGE_GROUPS_CONFIG,
+                             BUSINESS_SECTORS_CONFIG, CATALOG_CONFIG)
+from storage import layer_stem, resolve_dataset_path, read_dataset, write_dataset
+from catalog import (write_partition, register_version, prune_versions, collect_garbage,
+                     load_catalog, save_catalog, read_catalog_dataset, dataset_partitions, period_range)
+from city_corrections import load_city_corrections, apply_city_corrections, save_corrections_report
+from municipalities import resolve_municipalities, expected_municipalities
+from gold_aggregations import aggregate_dimension, aggregate_group
+from gold_cube import build_cube, save_cube
+from census_normalization import save_normalized_aggregates
+from outliers import save_outlier_outputs
+from instrumentation import instrumented, run_in_worker, add_records, start_run, finish_run
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def load_silver_data():
-    """Task 1: Carregar dados da camada Silver"""
+@instrumented
+def load_silver_data(columns=None, ufs=None, period=None):
+    """Task 1: Carregar dados da camada Silver
+
+    Lê a versão mais recente do catálogo; sem catálogo, o arquivo legado da versão
+    do pipeline.
+    columns: projeção de colunas na leitura (None = todas)
+    ufs: lê só as UFs informadas (None = todas)
+    period: (início, fim) 'AAAA-MM' inclusivos (None = todos os meses)
+
+    No catálogo, UFs e período podam partições (ano/mes/uf) sem abrir os demais
+    arquivos; no arquivo legado viram filtros de linha.
+    """
     logger.info("   Carregando dados da camada Silver...")
 
-    version = 1  # Versão que acabou de ser testada
-    silver_file = f"../data/silver/consumidor_gov_silver_v{version}.csv"
+    ufs = [ufs] if isinstance(ufs, str) else ufs
+    values = {'uf': list(ufs)} if ufs else None
+
+    silver_name = CATALOG_CONFIG['datasets']['silver']['name']
+    try:
+        dataset_partitions(silver_name)
+    except KeyError:
+        logger.info("   Silver fora do catálogo - procurando arquivo legado")
+    else:
+        df = read_catalog_dataset(silver_name, columns=columns, values=values, period=period)
+        logger.info(f"✅ Dados carregados: {len(df):,} registros, {len(df.columns)} colunas")
+        return df
+
+    silver_stem = layer_stem('silver')
 
-    if not Path(silver_file).exists():
-        raise FileNotFoundError(f"❌ Arquivo Silver não encontrado: {silver_file}")
+    try:
+        silver_file = resolve_dataset_path(silver_stem)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"❌ Arquivo Silver não encontrado: {silver_stem}")
     
-    df = pd.read_csv(silver_file, sep=';', encoding='utf-8')
+    filters = [('uf', 'in', list(ufs))] if ufs else None
+    df = read_dataset(silver_file, columns=columns, filters=filters)
+
+    if period:
+        df = filter_period(df, period)
+
     logger.info(f"✅ Dados carregados: {len(df):,} registros, {len(df.columns)} colunas")
 
     return df
 
 
-def clean_sp_cities(sp_df):
-    """Task 2.5: Limpeza específica das cidades de SP"""
-    logger.info("🧹 Limpando cidades de SP...")
+def filter_period(df, period):
+    """Registros com (ano_abertura, mes_abertura) dentro do período (início, fim) inclusivo"""
+    start, end = period_range(period)
+    month = pd.to_numeric(df['ano_abertura'], errors='coerce') * 100 + pd.to_numeric(df['mes_abertura'], errors='coerce')
+    mask = month.notna()
+
+    if start is not None:
+        mask &= month >= start[0] * 100 + start[1]
+    if end is not None:
+        mask &= month <= end[0] * 100 + end[1]
+
+    return df[mask]
+
+
+@instrumented
+def clean_cities(uf_df, uf='SP'):
+    """Task 2.5: Limpeza das cidades de uma UF
+
+    Cidades sem correspondência na referência IBGE (resolve_municipalities) são
+    marcadas como suspeitas; as resolvidas recebem o nome oficial e o codigo_ibge.
+    """
+    logger.info(f"🧹 Limpando cidades de {uf}...")
     
-    original_cities = sp_df['cidade'].nunique()
-    original_records = len(sp_df)
+    original_cities = uf_df['cidade'].nunique()
+    original_records = len(uf_df)
     
-    # 1. CORREÇÃO DE ENCODING (específico para SP)
+    # 1. CORREÇÃO DE ENCODING (tabela externa, passada única sobre as cidades distintas)
     logger.info("   🔧 Corrigindo caracteres corrompidos...")
     
-    sp_city_corrections = {
-        'Cafel?ndia': 'Cafelândia',
-        'Guai?ara': 'Guaiçara', 
-        'Paragua?u Paulista': 'Paraguaçu Paulista',
-        'Igaraí': 'Igaraí',  # Pode estar correto
-        'Juritis': 'Juritis',  # Verificar se existe
-        'Marcondésia': 'Marcondésia',  # Verificar se existe
-        'Jurucê': 'Jurucê',  # Verificar se existe
-        'Lageado de Araçaíba': 'Lageado',  # Possível erro
-        'Monte Verde Paulista': 'Monte Verde',  # Possível erro
-        'Aparecida de Monte Alto': 'Monte Alto',  # Possível erro
-        # Adicionar mais conforme necessário
-    }
+    corrections = load_city_corrections()
+    uf_df['cidade'], corrections_report = apply_city_corrections(uf_df, corrections)
+    save_corrections_report(corrections_report, uf)
     
-    # Aplicar correções específicas
-    corrections_applied = 0
-    for wrong, correct in sp_city_corrections.items():
-        mask = sp_df['cidade'] == wrong
-        if mask.sum() > 0:
-            sp_df.loc[mask, 'cidade'] = correct
-            corrections_applied += mask.sum()
-            logger.info(f"      ✅ '{wrong}' → '{correct}': {mask.sum()} registros")
+    applied_rules = corrections_report[corrections_report['registros'] > 0]
+    for _, rule in applied_rules.head(10).iterrows():
+        logger.info(f"      ✅ '{rule['cidade_original']}' → '{rule['cidade_corrigida']}': {rule['registros']} registros")
     
-    logger.info(f"   📊 Correções aplicadas: {corrections_applied} registros")
+    corrections_applied = applied_rules['registros'].sum()
+    logger.info(f"   📊 Correções aplicadas: {corrections_applied} registros ({len(applied_rules)}/{len(corrections_report)} regras)")
     
-    # 2. IDENTIFICAR CIDADES SUSPEITAS (baixa frequência)
-    logger.info("   🔍 Identificando cidades suspeitas...")
+    # 2. IDENTIFICAR CIDADES SUSPEITAS (sem correspondência na referência IBGE)
+    logger.info("   🔍 Resolvendo cidades na referência IBGE...")
     
-    city_counts = sp_df['cidade'].value_counts()
+    uf_df, resolution_stats = resolve_municipalities(uf_df)
     
-    # Cidades com muito poucos registros (≤ 3) são suspeitas
-    suspicious_cities = city_counts[city_counts <= 3].index.tolist()
+    # Marcar registros suspeitos (UF fora da referência: cidades mantidas sem validação)
+    if expected_municipalities(uf) is None:
+        logger.warning(f"   ⚠️ {uf} sem referência de municípios - cidades mantidas sem validação")
+        uf_df['cidade_suspeita_gold'] = False
+    else:
+        uf_df['cidade_suspeita_gold'] = uf_df['codigo_ibge'].isna()
     
-    # Marcar registros suspeitos
-    sp_df['cidade_suspeita_gold'] = sp_df['cidade'].isin(suspicious_cities)
+    # Cidades resolvidas passam a usar o nome oficial
+    resolved = uf_df['codigo_ibge'].notna()
+    uf_df.loc[resolved, 'cidade'] = uf_df.loc[resolved, 'municipio_ibge']
     
-    suspicious_records = sp_df['cidade_suspeita_gold'].sum()
-    logger.info(f"   🚨 Cidades suspeitas identificadas: {len(suspicious_cities)}")
+    city_counts = uf_df.loc[uf_df['cidade_suspeita_gold'], 'cidade'].value_counts()
+    suspicious_records = uf_df['cidade_suspeita_gold'].sum()
+    logger.info(f"   🚨 Cidades suspeitas identificadas: {len(city_counts)}")
     logger.info(f"   🚨 Registros suspeitos: {suspicious_records:,}")
+    logger.info(f"   🔤 Nomes resolvidos por curinga/similaridade: {resolution_stats['curinga'] + resolution_stats['aproximado']}")
     
-    if len(suspicious_cities) > 0:
+    if len(city_counts) > 0:
         logger.info("   📋 Algumas cidades suspeitas:")
-        for city in suspicious_cities[:10]:
-            count = city_counts[city]
+        for city, count in city_counts.head(10).items():
             logger.info(f"      • '{city}': {count} registros")
     
     # 3. CRIAR DATASET LIMPO (sem suspeitas)
     logger.info("   ✂️ Criando dataset limpo...")
     
-    clean_df = sp_df[sp_df['cidade_suspeita_gold'] == False].copy()
+    clean_df = uf_df[uf_df['cidade_suspeita_gold'] == False].copy()
     
-    clean_cities = clean_df['cidade'].nunique()
+    clean_city_count = clean_df['cidade'].nunique()
     clean_records = len(clean_df)
     
     # Estatísticas finais
-    cities_removed = original_cities - clean_cities
+    cities_removed = original_cities - clean_city_count
     records_removed = original_records - clean_records
     
     logger.info(f"   📊 RESULTADO DA LIMPEZA:")
-    logger.info(f"      • Cidades: {original_cities} → {clean_cities} (-{cities_removed})")
+    logger.info(f"      • Cidades: {original_cities} → {clean_city_count} (-{cities_removed})")
     logger.info(f"      • Registros: {original_records:,} → {clean_records:,} (-{records_removed:,})")
-    logger.info(f"      • Diferença do esperado: {clean_cities - 645:+}")
     
-    # Verificar se chegamos perto dos 645 municípios
-    if clean_cities <= 645:
-        logger.info("   ✅ Quantidade de cidades dentro do esperado!")
-    elif clean_cities <= 660:  # Margem de 15 cidades
-        logger.warning(f"   ⚠️ Ainda {clean_cities - 645} cidades acima do esperado (margem aceitável)")
-    else:
-        logger.warning(f"   ⚠️ Ainda {clean_cities - 645} cidades acima do esperado - revisar limpeza")
+    expected_cities = expected_municipalities(uf)
+    if expected_cities is not None:
+        logger.info(f"      • Municípios com reclamações: {clean_city_count} de {expected_cities} ({clean_city_count / expected_cities:.1%})")
     
-    logger.info("✅ Limpeza de cidades SP concluída")
+    logger.info(f"✅ Limpeza de cidades {uf} concluída")
     
-    return clean_df, sp_df  # Retorna limpo + original com flags
+    return clean_df, uf_df  # Retorna limpo + original com flags
 
 
-def verification_sp_cities(df):
-    """Task 2: Verificação e validação das cidades de SP"""
-    logger.info("🔍 Verificando cidades de São Paulo...")
+@instrumented
+def verification_cities(df, uf='SP'):
+    """Task 2: Verificação e validação das cidades de uma UF"""
+    logger.info(f"🔍 Verificando cidades de {uf}...")
     
-    # Filtrar registros de SP
-    sp_mask = df['uf'] == 'SP'
-    sp_data = df[sp_mask].copy()
+    # Filtrar registros da UF
+    uf_mask = df['uf'] == uf
+    uf_data = df[uf_mask].copy()
     
-    if len(sp_data) == 0:
-        logger.warning("⚠️ Nenhum registro de SP encontrado!")
+    if len(uf_data) == 0:
+        logger.warning(f"⚠️ Nenhum registro de {uf} encontrado!")
         return df, pd.DataFrame()
     
-    logger.info(f"📊 Registros SP encontrados: {len(sp_data):,}")
+    logger.info(f"📊 Registros {uf} encontrados: {len(uf_data):,}")
     
-    # Análise inicial das cidades de SP
-    sp_cities = sp_data['cidade'].value_counts()
-    total_sp_cities = len(sp_cities)
+    # Análise inicial das cidades da UF
+    uf_cities = uf_data['cidade'].value_counts()
+    total_uf_cities = len(uf_cities)
     
-    logger.info(f"🏙️ Cidades únicas em SP (antes da limpeza): {total_sp_cities:,}")
+    logger.info(f"🏙️ Cidades únicas em {uf} (antes da limpeza): {total_uf_cities:,}")
     
-    # Validação dos 645 municípios
-    MAX_SP_CITIES = 645
-    if total_sp_cities > MAX_SP_CITIES:
-        excess_cities = total_sp_cities - MAX_SP_CITIES
-        logger.warning(f"⚠️ ATENÇÃO: {total_sp_cities:,} cidades encontradas (esperado: máx {MAX_SP_CITIES})")
+    # Validação contra o número oficial de municípios (referência IBGE)
+    max_uf_cities = expected_municipalities(uf)
+    if max_uf_cities is None and uf == 'SP':
+        max_uf_cities = SP_CITIES_CONFIG['max_cities']
+    
+    if max_uf_cities is None:
+        logger.warning(f"⚠️ {uf} sem referência de municípios - validação de quantidade ignorada")
+    elif total_uf_cities > max_uf_cities:
+        excess_cities = total_uf_cities - max_uf_cities
+        logger.warning(f"⚠️ ATENÇÃO: {total_uf_cities:,} cidades encontradas (esperado: máx {max_uf_cities})")
         logger.warning(f"⚠️ Excesso: +{excess_cities} cidades - iniciando limpeza...")
     else:
-        logger.info(f"✅ Quantidade de cidades dentro do esperado (≤{MAX_SP_CITIES})")
+        logger.info(f"✅ Quantidade de cidades dentro do esperado (≤{max_uf_cities})")
     
-    logger.info(f"📋 Top 10 cidades SP:")
-    for city, count in sp_cities.head(10).items():
+    logger.info(f"📋 Top 10 cidades {uf}:")
+    for city, count in uf_cities.head(10).items():
         logger.info(f"   • {city}: {count:,}")
     
-    # ✅ NOVA ETAPA: Limpeza específica de SP
-    clean_sp_df, original_sp_df = clean_sp_cities(sp_data)
-    
-    # Adicionar dados limpos de volta ao DataFrame principal
-    df['is_sp_clean'] = False
-    df.loc[clean_sp_df.index, 'is_sp_clean'] = True
+    # Limpeza das cidades da UF
+    clean_uf_df, original_uf_df = clean_cities(uf_data, uf)
     
-    logger.info(f"✅ Registros SP limpos: {len(clean_sp_df):,}")
+    logger.info(f"✅ Registros {uf} limpos: {len(clean_uf_df):,}")
     
-    return df, clean_sp_df  # Retorna DataFrame limpo de SP
+    return df, clean_uf_df  # Retorna DataFrame limpo da UF
 
 
-def clipping_regional(df, clean_sp_df):
-    """Task 3: Recorte Regional - Foco São Paulo"""
-    logger.info("🗺️ Criando recorte regional - São Paulo...")
+@instrumented
+def clipping_regional(df, clean_uf_df):
+    """Task 3: Recorte Regional - ranking de cidades da UF"""
+    logger.info("🗺️ Criando recorte regional...")
     
     # Usar dados já limpos
-    sp_df = clean_sp_df.copy()
+    sp_df = clean_uf_df.copy()
     
     if len(sp_df) == 0:
-        logger.error("❌ Nenhum dado limpo de SP para análise!")
+        logger.error("❌ Nenhum dado limpo da UF para análise!")
         return pd.DataFrame(), pd.DataFrame()
     
     logger.info("📊 Criando métricas regionais...")
     
-    # ✅ CORREÇÃO: Usar APENAS colunas adequadas
-    city_ranking = sp_df.groupby('cidade').agg({
-        'cidade': 'count',                    # Total de reclamações
-        'is_agibank': 'sum'                  # Quantas são Agibank
-    }).round(2)
-    
-    city_ranking.columns = ['total_reclamacoes', 'reclamacoes_agibank']
-    
-    # Adicionar percentual Agibank por cidade
-    city_ranking['percentual_agibank'] = (
-        city_ranking['reclamacoes_agibank'] / city_ranking['total_reclamacoes'] * 100
-    ).round(2)
-    
-    # Calcular taxa de resposta manualmente
-    response_rate = sp_df.groupby('cidade')['respondida'].apply(
-        lambda x: (x == 'S').mean() * 100  # Percentual de 'S' 
-    ).round(2)
-    
-    city_ranking['taxa_resposta_pct'] = response_rate
-    
-    # Ordenar por total de reclamações
-    city_ranking = city_ranking.sort_values('total_reclamacoes', ascending=False)
+    # Contagem, Agibank, % Agibank e taxa de resposta em um único groupby
+    city_ranking = aggregate_dimension(sp_df, 'ranking_cidades')
     
     # Adicionar ranking de cidades ao dataset principal
-    city_ranking_dict = city_ranking.reset_index().reset_index().set_index('cidade')['index'] + 1
+    city_ranking_dict = pd.Series(range(1, len(city_ranking) + 1), index=city_ranking.index)
     sp_df['cidade_ranking'] = sp_df['cidade'].map(city_ranking_dict)
     
     logger.info(f"✅ Recorte regional criado: {len(sp_df):,} registros")
@@ -208,6 +240,7 @@ def clipping_regional(df, clean_sp_df):
     return sp_df, city_ranking
 
 
+@instrumented
 def clipping_age(sp_df):
     """Task 4: Recorte Etário - Perfil do consumidor"""
     logger.info("👥 Criando recorte etário...")
@@ -216,196 +249,312 @@ def clipping_age(sp_df):
         logger.warning("⚠️ Coluna 'faixa_etaria' não encontrada")
         return sp_df, pd.DataFrame(), pd.DataFrame()
     
-    # ✅ CORREÇÃO: Usar APENAS colunas adequadas
-    age_analysis = sp_df.groupby('faixa_etaria').agg({
-        'faixa_etaria': 'count',
-        'is_agibank': 'sum'
-    }).round(2)
-    
-    age_analysis.columns = ['total_reclamacoes', 'reclamacoes_agibank']
-    
-    # Calcular percentuais
-    age_analysis['percentual_total'] = (
-        age_analysis['total_reclamacoes'] / age_analysis['total_reclamacoes'].sum() * 100
-    ).round(2)
-    
-    age_analysis['percentual_agibank'] = (
-        age_analysis['reclamacoes_agibank'] / age_analysis['total_reclamacoes'] * 100
-    ).round(2)
-    
-    # Taxa de resposta por faixa etária
-    age_response_rate = sp_df.groupby('faixa_etaria')['respondida'].apply(
-        lambda x: (x == 'S').mean() * 100
-    ).round(2)
+    age_analysis = aggregate_dimension(sp_df, 'analise_etaria')
     
-    age_analysis['taxa_resposta_pct'] = age_response_rate
-    
-    # Ordenar por total de reclamações
-    age_analysis = age_analysis.sort_values('total_reclamacoes', ascending=False)
-    
-    # Análise específica Agibank por idade (simplificada)
-    agibank_age = sp_df[sp_df['is_agibank'] == True].groupby('faixa_etaria').agg({
-        'faixa_etaria': 'count'
-    })
-    
-    agibank_age.columns = ['reclamacoes_agibank']
+    # Análise específica Agibank por idade (faixas com reclamações Agibank)
+    agibank_age = age_analysis.loc[age_analysis['reclamacoes_agibank'] > 0, ['reclamacoes_agibank']]
     
     logger.info(f"✅ Análise etária criada: {len(age_analysis)} faixas etárias")
     logger.info("📊 Top 3 faixas etárias:")
     
     for age_group, data in age_analysis.head(3).iterrows():
-        logger.info(f"   • {age_group}: {data['total_reclamacoes']:,} reclamações ({data['percentual_total']}%)")
+        logger.info(f"   • {age_group}: {int(data['total_reclamacoes']):,} reclamações ({data['percentual_total']}%)")
     
     return sp_df, age_analysis, agibank_age
 
 
+@instrumented
 def clipping_sectoral(sp_df):
-    """Task 5: Recorte Setorial - Análise de mercado e problemas"""
+    """Task 5: Recorte Setorial - Análise de mercado e problemas
+
+    Gera um agregado por dimensão do grupo 'setorial' em GOLD_DIMENSIONS.
+    """
     logger.info("🏢 Criando recorte setorial...")
     
-    sectoral_results = {}
-    
-    # 1. Análise por Segmento de Mercado
-    if 'segmento_de_mercado' in sp_df.columns:
-        logger.info("   📊 Analisando segmentos de mercado...")
-        
-        segment_analysis = sp_df.groupby('segmento_de_mercado').agg({
-            'segmento_de_mercado': 'count',
-            'is_agibank': 'sum'
-        })
-        
-        segment_analysis.columns = ['total_reclamacoes', 'reclamacoes_agibank']
-        segment_analysis = segment_analysis.sort_values('total_reclamacoes', ascending=False)
-        
-        sectoral_results['segments'] = segment_analysis
+    sectoral_results = aggregate_group(sp_df, 'setorial')
     
-    # 2. Análise por Área bancária
-    if 'area' in sp_df.columns:
-        logger.info("   🏦 Analisando área bancária...")
-        
-        # Filtrar apenas área bancária
-        banking_mask = sp_df['area'].str.contains(
-            'banco.*financeira.*administradora.*cartão', 
-            case=False, na=False, regex=True
-        )
-        
-        banking_df = sp_df[banking_mask].copy()
-        
-        if len(banking_df) > 0:
-            # Análise comparativa entre bancos
-            bank_comparison = banking_df.groupby('nome_fantasia').agg({
-                'nome_fantasia': 'count',
-                'is_agibank': 'sum'
-            })
-            
-            bank_comparison.columns = ['total_reclamacoes', 'reclamacoes_agibank']
-            bank_comparison = bank_comparison.sort_values('total_reclamacoes', ascending=False)
-            
-            sectoral_results['banking_comparison'] = bank_comparison
-            
-            logger.info(f"      🏦 Bancos analisados: {len(bank_comparison)}")
-    
-    # 3. Análise por Problema
-    if 'problema' in sp_df.columns:
-        logger.info("   ⚠️ Analisando tipos de problemas...")
-        
-        problem_analysis = sp_df.groupby('problema').agg({
-            'problema': 'count',
-            'is_agibank': 'sum'
-        })
-        
-        problem_analysis.columns = ['total_ocorrencias', 'ocorrencias_agibank']
-        problem_analysis = problem_analysis.sort_values('total_ocorrencias', ascending=False)
-        
-        sectoral_results['problems_general'] = problem_analysis
-        
-        logger.info(f"      ⚠️ Tipos de problemas identificados: {len(problem_analysis)}")
+    for sector_name, sector_data in sectoral_results.items():
+        logger.info(f"   📊 {sector_name}: {len(sector_data)} grupos")
     
     logger.info("✅ Análise setorial concluída")
     return sp_df, sectoral_results
 
 
-def save_gold_outputs(sp_df, city_ranking, age_analysis, agibank_age, sectoral_results):
-    """Task 6: Salvar todos os recortes Gold"""
-    logger.info("💾 Salvando recortes Gold...")
-    
-    version = 1
-    gold_path = Path("../data/gold")
-    gold_path.mkdir(parents=True, exist_ok=True)
-    
-    outputs = {}
+@instrumented
+def save_gold_outputs(sp_df, city_ranking, age_analysis, agibank_age, sectoral_results, uf='SP'):
+    """Task 6: Salvar todos os recortes Gold da UF (partição uf=<UF> de cada dataset Gold)
+
+    As partições são gravadas pelo hash do conteúdo (write_partition): um recorte
+    igual ao da execução anterior não é regravado. O registro no catálogo é feito
+    pelo processo principal (register_gold_catalog).
+    Com GOLD_CLIPPING_CONFIG['csv_export'], cada recorte também é copiado em CSV para
+    gold_dir com o nome fixo (ex.: sp_consumidor_completo_v1.csv) lido pelos consumidores.
+    Retorna (arquivos gravados, descrição das partições por dataset).
+    """
+    logger.info(f"💾 Salvando recortes Gold {uf}...")
+    
+    key = f"uf={uf}"
+    prefix = CATALOG_CONFIG['gold_prefix']
+    data_dir = Path(CATALOG_CONFIG['data_dir'])
+    export_name = GOLD_CLIPPING_CONFIG['csv_export']
+    
+    partitions = {}
+    
+    def save(name, df, index=False, sep=None):
+        partitions[name] = write_partition(f"{prefix}{name}", key, df, index=index, sep=sep)
+        
+        if export_name:
+            # Recorte inalterado com a cópia já presente: nada a regravar
+            export_path = Path(PIPELINE_CONFIG['gold_dir']) / export_name.format(uf=uf.lower(), name=name)
+            if not (partitions[name]['reused'] and export_path.exists()):
+                write_dataset(df, export_path, index=index, sep=sep)
     
-    # 1. Dataset principal SP
-    main_path = gold_path / f"sp_consumidor_completo_v{version}.csv"
-    sp_df.to_csv(main_path, index=False, encoding='utf-8', sep=';')
-    outputs['dataset_principal'] = main_path
-    logger.info(f"    Dataset SP: {len(sp_df):,} registros")
+    # 1. Dataset principal da UF
+    save('consumidor_completo', sp_df)
+    logger.info(f"    Dataset {uf}: {len(sp_df):,} registros")
     
     # 2. Recorte Regional (ranking cidades)
-    regional_path = gold_path / f"sp_ranking_cidades_v{version}.csv"
-    city_ranking.to_csv(regional_path, encoding='utf-8')
-    outputs['recorte_regional'] = regional_path
+    save('ranking_cidades', city_ranking, index=True, sep=',')
     logger.info(f"    Ranking cidades: {len(city_ranking)} cidades")
     
     # 3. Recorte Etário
-    age_path = gold_path / f"sp_analise_etaria_v{version}.csv"
-    age_analysis.to_csv(age_path, encoding='utf-8')
-    outputs['recorte_etario'] = age_path
+    save('analise_etaria', age_analysis, index=True, sep=',')
     logger.info(f"    Análise etária: {len(age_analysis)} faixas")
     
     # 4. Recortes Setoriais
     for sector_name, sector_data in sectoral_results.items():
         if not sector_data.empty:
-            sector_path = gold_path / f"sp_setorial_{sector_name}_v{version}.csv"
-            sector_data.to_csv(sector_path, encoding='utf-8')
-            outputs[f'setorial_{sector_name}'] = sector_path
+            save(f'setorial_{sector_name}', sector_data, index=True, sep=',')
             logger.info(f"    Setorial {sector_name}: {len(sector_data)} registros")
     
-    # 5. Dataset apenas Agibank SP
+    # 5. Dataset apenas Agibank da UF
     agibank_sp = sp_df[sp_df['is_agibank'] == True].copy()
     if len(agibank_sp) > 0:
-        agibank_path = gold_path / f"sp_agibank_only_v{version}.csv"
-        agibank_sp.to_csv(agibank_path, index=False, encoding='utf-8', sep=';')
-        outputs['agibank_sp'] = agibank_path
-        logger.info(f"    Agibank SP: {len(agibank_sp):,} registros")
+        save('agibank_only', agibank_sp)
+        logger.info(f"    Agibank {uf}: {len(agibank_sp):,} registros")
     
-    logger.info("✅ Todos os recortes salvos")
-    return outputs
+    reused = sum(info['reused'] for info in partitions.values())
+    outputs = {
+        'dataset_principal' if name == 'consumidor_completo' else name: data_dir / info['path']
+        for name, info in partitions.items()
+    }
+    
+    logger.info(f"✅ Todos os recortes salvos ({reused} inalterados, não regravados)")
+    return outputs, partitions
+
+
+@instrumented
+def register_gold_catalog(summaries, national_outputs):
+    """Registra no catálogo os recortes por UF (partição uf=<UF>) e os datasets nacionais
+
+    national_outputs: {nome: descrição da partição nacional} (cubo, normalização, outliers)
+    UFs não recortadas nesta execução mantêm as partições da versão anterior.
+    """
+    catalog = load_catalog()
+    prefix = CATALOG_CONFIG['gold_prefix']
+    
+    by_dataset = {}
+    for summary in summaries:
+        for name, info in summary['partitions'].items():
+            by_dataset.setdefault(name, {})[f"uf={summary['uf']}"] = info
+    
+    for name, partitions in by_dataset.items():
+        register_version(catalog, f"{prefix}{name}", partitions, partition_by=['uf'], carry_over=True)
+        prune_versions(catalog, f"{prefix}{name}")
+    
+    for name, info in national_outputs.items():
+        register_version(catalog, f"{prefix}{name}", {CATALOG_CONFIG['national_partition']: info})
+        prune_versions(catalog, f"{prefix}{name}")
+    
+    save_catalog(catalog)
+    collect_garbage(catalog, [f"{prefix}{name}" for name in [*by_dataset, *national_outputs]])
+    logger.info(f"   Catálogo Gold: {len(by_dataset)} datasets por UF, {len(national_outputs)} nacionais")
+
+
+@instrumented
+def gold_clipping_uf(df, uf):
+    """Recortes Gold completos de uma UF (unidade de trabalho do process pool)
+
+    df: registros da Silver (basta a fatia da UF)
+    Retorna o resumo da UF e os arquivos gravados.
+    """
+    df, clean_uf_df = verification_cities(df, uf)
+    uf_df, city_ranking = clipping_regional(df, clean_uf_df)
+
+    if uf_df.empty:
+        return {'uf': uf, 'registros': 0, 'registros_agibank': 0, 'cidades': 0, 'outputs': {}, 'partitions': {}}
+
+    uf_df, age_analysis, agibank_age = clipping_age(uf_df)
+    uf_df, sectoral_results = clipping_sectoral(uf_df)
+    outputs, partitions = save_gold_outputs(uf_df, city_ranking, age_analysis, agibank_age, sectoral_results, uf)
+
+    return {
+        'uf': uf,
+        'registros': len(uf_df),
+        'registros_agibank': int(uf_df['is_agibank'].sum()),
+        'cidades': len(city_ranking),
+        'outputs': outputs,
+        'partitions': partitions
+    }
+
+
+def resolve_ufs(df, ufs=None):
+    """UFs a recortar: lista, 'all' (todas as presentes na Silver) ou GOLD_CLIPPING_CONFIG['ufs']"""
+    ufs = ufs or GOLD_CLIPPING_CONFIG['ufs']
+    available = sorted(df['uf'].dropna().astype(str).unique())
 
+    if ufs == 'all':
+        return available
 
-def gold_dag():
-    """DAG principal da camada Gold - Recortes SP"""
-    logger.info("🚀 Iniciando DAG Gold - Foco São Paulo...")
+    ufs = [ufs] if isinstance(ufs, str) else list(ufs)
+    missing = [uf for uf in ufs if uf not in available]
+    if missing:
+        logger.warning(f"⚠️ UFs sem registros na Silver: {missing}")
+
+    return [uf for uf in ufs if uf in available]
+
+
+def gold_dag(df=None, ufs=None, parallel=None, max_workers=None, period=None, national=None):
+    """DAG principal da camada Gold - Recortes por UF
+
+    df: DataFrame Silver já em memória (run_pipeline); None = carregar do disco
+    ufs: UFs a recortar (padrão: GOLD_CLIPPING_CONFIG['ufs']; 'all' = todas)
+    period: (início, fim) 'AAAA-MM' da Silver (padrão: GOLD_CLIPPING_CONFIG['period'])
+    parallel: recorta as UFs em um process pool (padrão: GOLD_CLIPPING_CONFIG['parallel'])
+    max_workers: número de processos (padrão: GOLD_CLIPPING_CONFIG['max_workers'] ou nº de CPUs)
+    national: gera cubo, normalização e outliers nacionais a partir da Silver completa,
+        independentemente de ufs/period (padrão: GOLD_CLIPPING_CONFIG['national'])
+
+    Retorna o dicionário de arquivos Gold gravados (chaves prefixadas pela UF).
+    """
+    logger.info("🚀 Iniciando DAG Gold - Recortes por UF...")
     start_time = datetime.now()
+    run = start_run('gold')
+    status = 'erro'
     
     try:
         # Pipeline Gold ATUALIZADO
-        df = load_silver_data()
-        df, clean_sp_df = verification_sp_cities(df)  # ← Retorna dados limpos
-        sp_df, city_ranking = clipping_regional(df, clean_sp_df)  # ← Passa dados limpos
-        sp_df, age_analysis, agibank_age = clipping_age(sp_df)
-        sp_df, sectoral_results = clipping_sectoral(sp_df)
-        outputs = save_gold_outputs(sp_df, city_ranking, age_analysis, agibank_age, sectoral_results)
+        ufs = ufs or GOLD_CLIPPING_CONFIG['ufs']
+        period = period or GOLD_CLIPPING_CONFIG['period']
+        if national is None:
+            national = GOLD_CLIPPING_CONFIG['national']
+        
+        # Lida do disco com UFs definidas, a Silver vem podada: só as partições das UFs
+        # (e do período). Os datasets nacionais exigem todas as UFs e todos os meses:
+        # full_df é a Silver completa, quando ela já está em memória.
+        if df is None:
+            df = load_silver_data(ufs=None if ufs == 'all' else ufs, period=period)
+            full_df = df if ufs == 'all' and period is None else None
+        else:
+            logger.info(f"   Silver recebida em memória: {len(df):,} registros")
+            full_df = df
+            if period:
+                df = filter_period(df, period)
+
+        ufs = resolve_ufs(df, ufs)
+        if parallel is None:
+            parallel = GOLD_CLIPPING_CONFIG['parallel']
+
+        logger.info(f"   UFs: {', '.join(ufs)}")
+
+        # Cada UF recebe apenas a sua fatia (é o que vai para o worker)
+        uf_slices = {
+            str(uf): uf_df for uf, uf_df in df.groupby('uf', observed=True)
+            if str(uf) in ufs
+        }
+
+        summaries = []
+
+        if parallel and len(ufs) > 1:
+            if max_workers is None:
+                max_workers = GOLD_CLIPPING_CONFIG['max_workers'] or os.cpu_count()
+            max_workers = max(1, min(max_workers, len(ufs)))
+
+            logger.info(f"   Execução paralela: {max_workers} workers")
+
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(run_in_worker, gold_clipping_uf, uf_slices[uf], uf) for uf in ufs]
+
+                # Resultados coletados na ordem das UFs
+                for uf, future in zip(ufs, futures):
+                    try:
+                        summary, task_records = future.result()
+                        add_records(task_records)
+                        summaries.append(summary)
+                    except Exception as e:
+                        logger.error(f"   Erro nos recortes de {uf}: {str(e)}")
+                        continue
+        else:
+            for uf in ufs:
+                try:
+                    summaries.append(gold_clipping_uf(uf_slices[uf], uf))
+                except Exception as e:
+                    logger.error(f"   Erro nos recortes de {uf}: {str(e)}")
+                    continue
+
+        outputs = {
+            f"{summary['uf'].lower()}_{name}": path
+            for summary in summaries
+            for name, path in summary['outputs'].items()
+        }
+        
+        national_outputs = {}
+        if national:
+            if full_df is None:
+                logger.info("   Recortes com Silver parcial (UFs/período) - lendo a Silver completa para os datasets nacionais")
+                del uf_slices, df
+                full_df = load_silver_data()
+            
+            # Cubo nacional de medidas aditivas (cruzamentos consultados sem reler a Silver)
+            cube = build_cube(full_df)
+            national_outputs['cubo'] = save_cube(cube)
+            
+            # População e taxas por 100 mil habitantes de todas as UFs e municípios, a partir do cubo
+            national_outputs.update(save_normalized_aggregates(cube))
+            
+            # Outliers (IQR/Z-score) por UF, instituição e segmento, e das taxas municipais
+            data_dir = Path(CATALOG_CONFIG['data_dir'])
+            municipalities = (
+                read_dataset(data_dir / national_outputs['municipios_normalizado']['path'])
+                if 'municipios_normalizado' in national_outputs else None
+            )
+            national_outputs.update(save_outlier_outputs(full_df, municipalities))
+            outputs.update({name: data_dir / info['path'] for name, info in national_outputs.items()})
+        else:
+            logger.info(
+                "   Datasets nacionais desativados (GOLD_CLIPPING_CONFIG['national']) - "
+                "cubo, normalização e outliers mantêm a versão anterior"
+            )
+        
+        # Versões no catálogo: recortes por UF e datasets nacionais
+        register_gold_catalog(summaries, national_outputs)
         
         # Relatório final
         end_time = datetime.now()
         duration = end_time - start_time
         
         logger.info("=" * 70)
-        logger.info(" RELATÓRIO GOLD DAG - RECORTES SÃO PAULO")
+        logger.info(" RELATÓRIO GOLD DAG - RECORTES POR UF")
         logger.info(f" Duração: {duration}")
-        logger.info(f" Registros SP processados: {len(sp_df):,}")
-        logger.info(f" Registros Agibank SP: {sp_df['is_agibank'].sum():,}")
-        logger.info(f" Cidades SP analisadas: {len(city_ranking):,}")
+        for summary in summaries:
+            logger.info(
+                f" {summary['uf']}: {summary['registros']:,} registros, "
+                f"{summary['registros_agibank']:,} Agibank, {summary['cidades']:,} cidades"
+            )
+        logger.info(f" UFs recortadas: {len(summaries)}/{len(ufs)}")
         logger.info(f" Arquivos Gold gerados: {len(outputs)}")
         logger.info("✅ Gold DAG concluído - Recortes prontos para análise!")
         logger.info("=" * 70)
         
-        return True
+        status = 'ok'
+        return outputs
         
     except Exception as e:
         logger.error(f"❌ Erro no Gold DAG: {str(e)}")
         raise
+    
+    finally:
+        finish_run(run, status)
 
 if __name__ == "__main__":
     gold_dag()
\ No newline at end of file
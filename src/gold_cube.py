@@ -0,0 +1,144 @@
+"""
+Cubo Gold - medidas aditivas pré-agregadas para consultas de roll-up
+
+O cubo guarda, no grão de todas as dimensões de GOLD_CUBE_CONFIG, apenas medidas
+somáveis (contagens e somas). Qualquer recorte por um subconjunto de dimensões é
+uma soma sobre o cubo, sem reler os registros; médias e percentuais são derivados
+depois da soma.
+"""
+
+import pandas as pd
+import logging
+import sys
+
+sys.path.append('..')
+from config.settings import GOLD_CUBE_CONFIG, CATALOG_CONFIG
+from catalog import write_partition, read_catalog_dataset
+from instrumentation import instrumented
+
+logger = logging.getLogger(__name__)
+
+CUBE_MEASURES = [
+    'registros',
+    'registros_agibank',
+    'respondidas',
+    'soma_nota',
+    'qtd_nota',
+    'soma_tempo_resposta',
+    'qtd_tempo_resposta'
+]
+
+
+CUBE_DATASET = f"{CATALOG_CONFIG['gold_prefix']}cubo"
+
+
+def _month_column(df):
+    month_source = df[GOLD_CUBE_CONFIG['month_source']]
+
+    if not pd.api.types.is_datetime64_any_dtype(month_source):
+        month_source = pd.to_datetime(month_source, format='mixed', dayfirst=True, errors='coerce')
+
+    return month_source.dt.strftime('%Y-%m')
+
+
+@instrumented
+def build_cube(df):
+    """Agrega os registros no grão das dimensões configuradas
+
+    Dimensões nulas formam um grupo próprio, então os totais do cubo batem com o
+    número de registros.
+    """
+    logger.info("🧊 Construindo cubo Gold...")
+
+    dimensions = GOLD_CUBE_CONFIG['dimensions']
+    keys = {}
+
+    for dim in dimensions:
+        if dim == 'mes':
+            keys[dim] = _month_column(df)
+        elif dim in df.columns:
+            keys[dim] = df[dim]
+        else:
+            raise KeyError(f"Dimensão do cubo ausente no DataFrame: {dim}")
+
+    nota = df['nota_do_consumidor'] if 'nota_do_consumidor' in df.columns else pd.Series(float('nan'), index=df.index)
+    tempo = df['tempo_resposta'] if 'tempo_resposta' in df.columns else pd.Series(float('nan'), index=df.index)
+
+    measures = pd.DataFrame({
+        'registros': 1,
+        'registros_agibank': df['is_agibank'].fillna(False).astype(int),
+        'respondidas': (df['respondida'] == 'S').astype(int),
+        'soma_nota': nota.fillna(0),
+        'qtd_nota': nota.notna().astype(int),
+        'soma_tempo_resposta': tempo.fillna(0),
+        'qtd_tempo_resposta': tempo.notna().astype(int)
+    }, index=df.index)
+
+    cube = (
+        measures.groupby([keys[dim] for dim in dimensions], observed=True, dropna=False)
+        .sum()
+        .reset_index()
+    )
+    cube.columns = dimensions + CUBE_MEASURES
+
+    for dim in dimensions:
+        cube[dim] = cube[dim].astype('category')
+
+    logger.info(f"✅ Cubo construído: {len(df):,} registros → {len(cube):,} células")
+    return cube
+
+
+@instrumented
+def save_cube(cube):
+    """Grava o cubo como partição nacional do catálogo (part-<hash>)
+
+    Retorna a descrição da partição; o registro da versão é feito pela DAG Gold.
+    """
+    return write_partition(CUBE_DATASET, CATALOG_CONFIG['national_partition'], cube)
+
+
+def load_cube(version=None, dimensions=None):
+    """Carrega o cubo do catálogo (version: versão do catálogo, padrão 'latest')
+
+    dimensions: projeção de dimensões, medidas sempre incluídas. A projeção não
+    agrega: use query_cube para somar sobre as dimensões omitidas.
+    """
+    columns = None if dimensions is None else list(dimensions) + CUBE_MEASURES
+    return read_catalog_dataset(CUBE_DATASET, version=version, columns=columns)
+
+
+def query_cube(cube, by=None, filters=None):
+    """Roll-up do cubo por qualquer subconjunto de dimensões
+
+    by: dimensões do resultado (None = total geral)
+    filters: {dimensão: valor ou lista de valores}
+
+    Retorna as medidas somadas mais percentual_agibank, taxa_resposta_pct,
+    nota_media e tempo_resposta_medio, ordenado por registros.
+    """
+    by = [by] if isinstance(by, str) else list(by or [])
+
+    unknown = [dim for dim in by + list(filters or {}) if dim not in cube.columns]
+    if unknown:
+        raise KeyError(f"Dimensões fora do cubo: {unknown}")
+
+    if filters:
+        mask = pd.Series(True, index=cube.index)
+        for dim, values in filters.items():
+            values = values if isinstance(values, (list, tuple, set)) else [values]
+            mask &= cube[dim].isin(values)
+        cube = cube[mask]
+
+    if by:
+        result = cube.groupby(by, observed=True, dropna=False)[CUBE_MEASURES].sum()
+    else:
+        result = cube[CUBE_MEASURES].sum().to_frame().T.astype(cube[CUBE_MEASURES].dtypes.to_dict())
+
+    result['percentual_agibank'] = (result['registros_agibank'] / result['registros'] * 100).round(2)
+    result['taxa_resposta_pct'] = (result['respondidas'] / result['registros'] * 100).round(2)
+    result['nota_media'] = (result['soma_nota'] / result['qtd_nota'].where(result['qtd_nota'] > 0)).round(2)
+    result['tempo_resposta_medio'] = (
+        result['soma_tempo_resposta'] / result['qtd_tempo_resposta'].where(result['qtd_tempo_resposta'] > 0)
+    ).round(2)
+
+    return result.sort_values('registros', ascending=False)
@@ -0,0 +1,326 @@
+"""
+Instrumentação das DAGs - tempo, CPU, memória e registros por tarefa
+
+Cada função de tarefa decorada com @instrumented (ou bloco em measure()) gera um
+registro com tempo de parede, tempo de CPU, variação de RSS e de pico de RSS e
+registros/colunas de entrada e saída. Ao fim da execução, start_run/finish_run
+agregam os registros por tarefa (no modo streaming, as tarefas por chunk são
+chamadas uma vez por chunk), gravam o resumo em JSON e acrescentam as tarefas
+agregadas a um histórico CSV, para comparar as atualizações mensais.
+
+Memória: psutil (RSS atual) quando instalado; o pico vem de resource.getrusage
+(ru_maxrss, Unix). Sem nenhum dos dois, as colunas de memória ficam nulas.
+"""
+
+from contextlib import contextmanager
+from functools import wraps
+import json
+import os
+import platform
+import time
+import pandas as pd
+from pathlib import Path
+import logging
+from datetime import datetime
+import sys
+
+sys.path.append('..')
+from config.settings import INSTRUMENTATION_CONFIG, PIPELINE_CONFIG
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+RECORD_COLUMNS = [
+    'run_id', 'dag', 'task', 'module', 'depth', 'started_at', 'status', 'wall_s', 'cpu_s',
+    'rss_delta_mb', 'peak_rss_delta_mb', 'rows_in', 'cols_in', 'rows_out', 'cols_out', 'pid'
+]
+
+TASK_COLUMNS = [
+    'run_id', 'dag', 'task', 'module', 'depth', 'started_at', 'status', 'calls', 'errors',
+    'wall_s', 'wall_max_s', 'cpu_s', 'rss_delta_mb', 'peak_rss_delta_mb',
+    'rows_in', 'cols_in', 'rows_out', 'cols_out', 'workers'
+]
+
+_records = []
+_run = None
+_depth = 0
+
+
+def _rss_mb():
+    """RSS atual do processo (psutil), em MB"""
+    if psutil is None:
+        return None
+    return psutil.Process().memory_info().rss / (1024**2)
+
+
+def _peak_rss_mb():
+    """Pico de RSS do processo até agora (ru_maxrss: KB no Linux, bytes no macOS), em MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024**2) if sys.platform == 'darwin' else peak / 1024
+
+
+def _shape(value):
+    """(registros, colunas) do primeiro DataFrame em um valor, tupla ou lista"""
+    if isinstance(value, pd.DataFrame):
+        return value.shape
+    if isinstance(value, pd.Series):
+        return len(value), 1
+    if isinstance(value, (tuple, list)):
+        for item in value:
+            if isinstance(item, (pd.DataFrame, pd.Series)):
+                return _shape(item)
+    return None, None
+
+
+def _delta(after, before):
+    return round(after - before, 2) if after is not None and before is not None else None
+
+
+class Measurement:
+    """Medição em andamento de uma tarefa (usada por measure e @instrumented)"""
+
+    def __init__(self, task, module=None, inputs=None):
+        self.task = task
+        self.module = module
+        self.rows_in, self.cols_in = _shape(inputs)
+        self.rows_out = self.cols_out = None
+
+    def output(self, value):
+        """Registra o resultado da tarefa (DataFrame ou tupla com um DataFrame)"""
+        self.rows_out, self.cols_out = _shape(value)
+        return value
+
+
+@contextmanager
+def measure(task, inputs=None, module=None):
+    """Mede um bloco de código como uma tarefa
+
+    with measure('read_csv') as m:
+        df = m.output(pd.read_csv(...))
+    """
+    global _depth
+
+    measurement = Measurement(task, module, inputs)
+
+    if not INSTRUMENTATION_CONFIG['enabled']:
+        yield measurement
+        return
+
+    started_at = datetime.now().isoformat()
+    rss_before, peak_before = _rss_mb(), _peak_rss_mb()
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+    status = 'ok'
+    depth = _depth
+    _depth += 1
+
+    try:
+        yield measurement
+    except Exception:
+        status = 'erro'
+        raise
+    finally:
+        _depth -= 1
+        _records.append({
+            'run_id': _run['run_id'] if _run else None,
+            'dag': _run['dag'] if _run else None,
+            'task': task,
+            'module': module,
+            'depth': depth,
+            'started_at': started_at,
+            'status': status,
+            'wall_s': round(time.perf_counter() - wall_before, 4),
+            'cpu_s': round(time.process_time() - cpu_before, 4),
+            'rss_delta_mb': _delta(_rss_mb(), rss_before),
+            'peak_rss_delta_mb': _delta(_peak_rss_mb(), peak_before),
+            'rows_in': measurement.rows_in,
+            'cols_in': measurement.cols_in,
+            'rows_out': measurement.rows_out,
+            'cols_out': measurement.cols_out,
+            'pid': os.getpid()
+        })
+
+
+def instrumented(func):
+    """Decorador das funções de tarefa: registra tempo, CPU, memória e registros
+
+    A entrada é o primeiro DataFrame dos argumentos; a saída, o retorno (ou o
+    primeiro DataFrame de uma tupla de retorno).
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        inputs = next(
+            (value for value in (*args, *kwargs.values()) if isinstance(value, (pd.DataFrame, pd.Series))),
+            None
+        )
+        with measure(func.__name__, inputs, func.__module__) as measurement:
+            return measurement.output(func(*args, **kwargs))
+
+    return wrapper
+
+
+def mark():
+    """Posição atual dos registros (para coletar os de um worker com records_since)"""
+    return len(_records)
+
+
+def records_since(position):
+    """Registros gerados desde mark(): devolvidos pelos workers do process pool"""
+    return [dict(record) for record in _records[position:]]
+
+
+def add_records(records):
+    """Incorpora registros vindos de workers à execução atual, no nível da tarefa em andamento"""
+    for record in records:
+        record.update({
+            'run_id': _run['run_id'] if _run else None,
+            'dag': _run['dag'] if _run else None,
+            'depth': record['depth'] + _depth
+        })
+        _records.append(record)
+
+
+def run_in_worker(func, *args):
+    """Executa uma tarefa em um worker do process pool: retorna (resultado, registros)
+
+    Os registros do worker não chegam ao processo principal por conta própria;
+    quem coleta o resultado os incorpora com add_records.
+    """
+    global _depth
+
+    _depth = 0   # Worker criado por fork herda a profundidade do processo pai
+    position = mark()
+    result = func(*args)
+
+    return result, records_since(position)
+
+
+def start_run(dag):
+    """Inicia a execução de uma DAG; dentro de outra execução (run_pipeline), não faz nada
+
+    Retorna o token a passar para finish_run (None = execução aninhada).
+    """
+    global _run
+
+    if _run is not None or not INSTRUMENTATION_CONFIG['enabled']:
+        return None
+
+    _records.clear()
+    _run = {
+        'run_id': f"{dag}_{datetime.now():%Y%m%d_%H%M%S}",
+        'dag': dag,
+        'started_at': datetime.now().isoformat(),
+        'start': time.perf_counter(),
+        'cpu_start': time.process_time()
+    }
+    return _run
+
+
+def run_summary():
+    """Registros da execução atual em um DataFrame (uma linha por chamada)"""
+    return pd.DataFrame(_records, columns=RECORD_COLUMNS)
+
+
+def task_summary(records=None):
+    """Registros agregados por tarefa (uma linha por tarefa, na ordem de início)
+
+    calls/errors: chamadas e chamadas com erro; wall_s, cpu_s, rss_delta_mb e
+    registros somados; wall_max_s e peak_rss_delta_mb: maior chamada; depth: o
+    menor nível em que a tarefa apareceu; workers: processos distintos.
+    """
+    records = run_summary() if records is None else records
+
+    if records.empty:
+        return pd.DataFrame(columns=TASK_COLUMNS)
+
+    records = records.assign(errors=(records['status'] == 'erro').astype(int))
+    keys = ['run_id', 'dag', 'task', 'module']
+
+    tasks = records.groupby(keys, sort=False, dropna=False).agg(
+        depth=('depth', 'min'),
+        started_at=('started_at', 'min'),
+        calls=('task', 'size'),
+        errors=('errors', 'sum'),
+        wall_s=('wall_s', 'sum'),
+        wall_max_s=('wall_s', 'max'),
+        cpu_s=('cpu_s', 'sum'),
+        rss_delta_mb=('rss_delta_mb', lambda values: values.sum(min_count=1)),
+        peak_rss_delta_mb=('peak_rss_delta_mb', 'max'),
+        rows_in=('rows_in', lambda values: values.sum(min_count=1)),
+        cols_in=('cols_in', 'max'),
+        rows_out=('rows_out', lambda values: values.sum(min_count=1)),
+        cols_out=('cols_out', 'max'),
+        workers=('pid', 'nunique')
+    ).reset_index().sort_values('started_at', kind='stable')
+
+    count_cols = ['rows_in', 'cols_in', 'rows_out', 'cols_out']
+    tasks[count_cols] = tasks[count_cols].astype('Int64')
+    tasks['status'] = tasks['errors'].map(lambda errors: 'erro' if errors else 'ok')
+    tasks[['wall_s', 'cpu_s']] = tasks[['wall_s', 'cpu_s']].round(4)
+    tasks['rss_delta_mb'] = tasks['rss_delta_mb'].round(2)
+
+    return tasks[TASK_COLUMNS]
+
+
+def finish_run(token, status='ok'):
+    """Encerra a execução iniciada por start_run e grava o resumo
+
+    <output_dir>/<run_id>.json: metadados, totais e tarefas agregadas
+    <output_dir>/<history_file>: tarefas agregadas acrescentadas ao histórico CSV
+    Retorna o caminho do JSON (None para execuções aninhadas).
+    """
+    global _run
+
+    if token is None or token is not _run:
+        return None
+
+    tasks = task_summary()
+    top_level = tasks[tasks['depth'] == 0]
+
+    summary = {
+        'run_id': _run['run_id'],
+        'dag': _run['dag'],
+        'status': status,
+        'started_at': _run['started_at'],
+        'finished_at': datetime.now().isoformat(),
+        'pipeline_version': PIPELINE_CONFIG['version'],
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'memory_backend': 'psutil' if psutil is not None else ('resource' if resource is not None else None),
+        'wall_s': round(time.perf_counter() - _run['start'], 4),
+        'cpu_s': round(time.process_time() - _run['cpu_start'], 4),
+        'peak_rss_mb': round(_peak_rss_mb(), 2) if resource is not None else None,
+        'tasks_wall_s': round(float(top_level['wall_s'].sum()), 4),
+        'tasks': json.loads(tasks.to_json(orient='records'))
+    }
+
+    output_dir = Path(INSTRUMENTATION_CONFIG['output_dir'])
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    json_path = output_dir / f"{_run['run_id']}.json"
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    history_path = output_dir / INSTRUMENTATION_CONFIG['history_file']
+    tasks.to_csv(history_path, mode='a', header=not history_path.exists(), index=False)
+
+    slowest = top_level.nlargest(3, 'wall_s')
+    logger.info(f"⏱️ Instrumentação: {len(tasks)} tarefas ({len(_records)} chamadas), resumo em {json_path}")
+    for _, row in slowest.iterrows():
+        logger.info(
+            f"   {row['task']}: {row['wall_s']:.2f}s parede, {row['cpu_s']:.2f}s CPU, {row['calls']} chamada(s)"
+        )
+
+    _run = None
+    return json_path
@@ -0,0 +1,186 @@
+"""
+Resolução de municípios pela referência oficial do IBGE
+
+Os nomes são resolvidos por par (uf, cidade) distinto: primeiro pelo nome
+normalizado (sem acentos/pontuação), depois por curinga para o padrão de
+encoding corrompido ('?' no lugar de um caractere acentuado) e, por fim, por
+similaridade (difflib) entre os municípios da mesma UF.
+"""
+
+import difflib
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import logging
+import sys
+
+sys.path.append('..')
+from config.settings import MUNICIPALITY_REFERENCE_CONFIG, IBGE_UF_CODES
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_city_names(names):
+    """Normaliza nomes de cidade para comparação (vetorizado)
+
+    Sem acentos, minúsculo, pontuação/hífens como espaço; '?' é preservado para
+    o casamento por curinga.
+    """
+    return (
+        pd.Series(names, dtype=object).astype(str)
+        .str.normalize('NFKD')
+        .str.encode('ascii', errors='ignore')
+        .str.decode('ascii')
+        .str.lower()
+        .str.replace(r"[^a-z0-9?]+", ' ', regex=True)
+        .str.strip()
+    )
+
+
+def load_municipality_reference(reference_paths=None):
+    """Tabela de referência: codigo_ibge, municipio, uf, nome_normalizado
+
+    Linhas que não são municípios (código da UF, 'Sem especificação') são descartadas.
+    """
+    reference_paths = reference_paths or MUNICIPALITY_REFERENCE_CONFIG['reference_paths']
+    code_col = MUNICIPALITY_REFERENCE_CONFIG['code_column']
+    name_col = MUNICIPALITY_REFERENCE_CONFIG['name_column']
+
+    frames = []
+    for path in reference_paths:
+        path = Path(path)
+        if not path.exists():
+            logger.warning(f"Referência de municípios não encontrada: {path}")
+            continue
+
+        frames.append(pd.read_csv(
+            path,
+            sep=MUNICIPALITY_REFERENCE_CONFIG['separator'],
+            encoding=MUNICIPALITY_REFERENCE_CONFIG['encoding'],
+            usecols=[code_col, name_col],
+            dtype=str
+        ))
+
+    if not frames:
+        raise FileNotFoundError(f"Nenhuma referência de municípios disponível: {reference_paths}")
+
+    reference = pd.concat(frames, ignore_index=True)
+    reference.columns = ['codigo_ibge', 'municipio']
+    reference['codigo_ibge'] = reference['codigo_ibge'].str.strip().str.replace(r'\.0$', '', regex=True)
+
+    is_municipality = (
+        reference['codigo_ibge'].str.fullmatch(r'\d{7}', na=False)
+        & (reference['codigo_ibge'].str[2:] != '00000')
+    )
+    reference = reference[is_municipality].drop_duplicates('codigo_ibge')
+
+    reference['uf'] = reference['codigo_ibge'].str[:2].astype(int).map(IBGE_UF_CODES)
+    reference['codigo_ibge'] = reference['codigo_ibge'].astype(int)
+    reference['nome_normalizado'] = normalize_city_names(reference['municipio']).to_numpy()
+
+    logger.info(
+        f"Referência de municípios: {len(reference):,} municípios em "
+        f"{reference['uf'].nunique()} UFs"
+    )
+    return reference.reset_index(drop=True)
+
+
+@lru_cache(maxsize=1)
+def _default_reference():
+    # Referência lida uma vez por processo
+    return load_municipality_reference()
+
+
+def expected_municipalities(uf, reference=None):
+    """Número oficial de municípios da UF (None se a UF não está na referência)"""
+    reference = _default_reference() if reference is None else reference
+    count = int((reference['uf'] == uf).sum())
+    return count or None
+
+
+def _match_unresolved(name, candidates, cutoff):
+    """Casamento de um nome sem correspondência exata: curinga e depois similaridade"""
+    if '?' in name:
+        pattern = re.compile(re.escape(name).replace(r'\?', '.'))
+        wildcard = [candidate for candidate in candidates if pattern.fullmatch(candidate)]
+        if len(wildcard) == 1:
+            return wildcard[0], 'curinga'
+
+    close = difflib.get_close_matches(name, candidates, n=1, cutoff=cutoff)
+    if close:
+        return close[0], 'aproximado'
+
+    return None, None
+
+
+def resolve_municipalities(df, reference=None, city_col='cidade', uf_col='uf'):
+    """Anexa codigo_ibge, municipio_ibge e municipio_match a cada registro
+
+    municipio_match: 'exato', 'curinga', 'aproximado' ou nulo (não resolvido).
+    Retorna (df, stats).
+    """
+    reference = _default_reference() if reference is None else reference
+    cutoff = MUNICIPALITY_REFERENCE_CONFIG['fuzzy_cutoff']
+
+    keys = pd.DataFrame({
+        'uf': df[uf_col].astype(object),
+        'cidade': df[city_col].astype(object)
+    }, index=df.index)
+
+    grouped = keys.groupby(['uf', 'cidade'], dropna=False)
+    pair_codes = grouped.ngroup().to_numpy()
+    pairs = grouped.size().rename('registros').reset_index()
+    pairs['nome_normalizado'] = normalize_city_names(pairs['cidade']).to_numpy()
+
+    # 1. Nome normalizado exato dentro da UF
+    lookup = reference.drop_duplicates(['uf', 'nome_normalizado'])
+    pairs = pairs.merge(
+        lookup[['uf', 'nome_normalizado', 'codigo_ibge', 'municipio']],
+        on=['uf', 'nome_normalizado'],
+        how='left'
+    )
+    pairs['municipio_match'] = np.where(pairs['codigo_ibge'].notna(), 'exato', None)
+
+    # 2. Curinga/similaridade apenas para os pares distintos não resolvidos
+    candidates = {uf: group for uf, group in lookup.groupby('uf')}
+    pending = pairs['codigo_ibge'].isna() & pairs['cidade'].notna() & pairs['uf'].isin(list(candidates))
+
+    for idx in pairs.index[pending]:
+        uf_reference = candidates[pairs.at[idx, 'uf']]
+        matched, method = _match_unresolved(
+            pairs.at[idx, 'nome_normalizado'], uf_reference['nome_normalizado'].tolist(), cutoff
+        )
+        if matched is not None:
+            row = uf_reference[uf_reference['nome_normalizado'] == matched].iloc[0]
+            pairs.at[idx, 'codigo_ibge'] = row['codigo_ibge']
+            pairs.at[idx, 'municipio'] = row['municipio']
+            pairs.at[idx, 'municipio_match'] = method
+
+    df['codigo_ibge'] = pd.array(pairs['codigo_ibge'].to_numpy()[pair_codes], dtype='Int64')
+    df['municipio_ibge'] = pairs['municipio'].to_numpy()[pair_codes]
+    df['municipio_match'] = pairs['municipio_match'].to_numpy()[pair_codes]
+
+    unresolved = pairs[pairs['codigo_ibge'].isna() & pairs['cidade'].notna()]
+    without_reference = ~unresolved['uf'].isin(list(candidates))
+
+    stats = {
+        'pares': len(pairs),
+        'exato': int((pairs['municipio_match'] == 'exato').sum()),
+        'curinga': int((pairs['municipio_match'] == 'curinga').sum()),
+        'aproximado': int((pairs['municipio_match'] == 'aproximado').sum()),
+        'nao_resolvidos': int((~without_reference).sum()),
+        'registros_nao_resolvidos': int(unresolved.loc[~without_reference, 'registros'].sum()),
+        'registros_sem_referencia': int(unresolved.loc[without_reference, 'registros'].sum())
+    }
+
+    logger.info(
+        f"Municípios resolvidos: {stats['exato']} exatos, {stats['curinga']} curinga, "
+        f"{stats['aproximado']} aproximados, {stats['nao_resolvidos']} não resolvidos "
+        f"({stats['registros_nao_resolvidos']:,} registros)"
+    )
+    if stats['registros_sem_referencia']:
+        logger.info(f"   Registros de UFs sem referência: {stats['registros_sem_referencia']:,}")
+
+    return df, stats
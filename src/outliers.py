@@ -0,0 +1,182 @@
+"""
+Detecção de outliers Gold - IQR e Z-score por grupo
+
+Cada agrupamento de OUTLIER_CONFIG é resolvido em uma única passada: os registros
+recebem o código do grupo (ngroup), quartis, média e desvio de todas as colunas
+são calculados em um groupby por código e devolvidos aos registros por indexação,
+sem funções Python por grupo.
+"""
+
+import numpy as np
+import pandas as pd
+import logging
+import sys
+
+sys.path.append('..')
+from config.settings import OUTLIER_CONFIG, CATALOG_CONFIG
+from catalog import write_partition
+from instrumentation import instrumented
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_COLUMNS = [
+    'agrupamento', 'grupo', 'coluna', 'valores', 'q1', 'q3', 'limite_inferior', 'limite_superior',
+    'outliers_iqr', 'media', 'desvio_padrao', 'outliers_zscore', 'percentual_iqr', 'percentual_zscore'
+]
+
+
+def _group_codes(df, by):
+    """Código do grupo de cada registro e o rótulo de cada código"""
+    if not by:
+        return np.zeros(len(df), dtype='int64'), pd.Series(['total'])
+
+    grouped = df.groupby(by, observed=True, dropna=False, sort=False)
+    codes = grouped.ngroup().to_numpy()
+
+    # Rótulo pelo primeiro registro de cada grupo
+    first_rows = pd.Series(np.arange(len(df))).groupby(codes).first().to_numpy()
+    first = df[by].iloc[first_rows].astype(str).reset_index(drop=True)
+    labels = first[by[0]]
+    for col in by[1:]:
+        labels = labels + ' | ' + first[col]
+
+    return codes, labels
+
+
+def grouped_outliers(df, columns, by=None):
+    """Flags IQR/Z-score de várias colunas dentro dos grupos de `by`
+
+    Retorna (flags, resumo): flags alinhadas ao índice do DataFrame
+    (outlier_iqr_<coluna>, outlier_zscore_<coluna>) e uma linha de resumo por
+    grupo e coluna. Valores nulos e grupos com menos de min_group_size valores
+    não são marcados.
+    """
+    by = [by] if isinstance(by, str) else list(by or [])
+    columns = [col for col in columns if col in df.columns]
+
+    factor = OUTLIER_CONFIG['iqr_factor']
+    threshold = OUTLIER_CONFIG['zscore_threshold']
+    min_size = OUTLIER_CONFIG['min_group_size']
+
+    codes, labels = _group_codes(df, by)
+    values = df[columns].apply(pd.to_numeric, errors='coerce').astype('float64')
+    values.index = codes
+    grouped = values.groupby(level=0)
+
+    count = grouped.count()
+    q1 = grouped.quantile(0.25)
+    q3 = grouped.quantile(0.75)
+    mean = grouped.mean()
+    std = grouped.std()
+
+    lower = q1 - factor * (q3 - q1)
+    upper = q3 + factor * (q3 - q1)
+
+    flags = pd.DataFrame(index=df.index)
+    summaries = []
+
+    for col in columns:
+        col_values = values[col].to_numpy()
+        enough = (count[col] >= min_size).to_numpy()[codes]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            is_iqr = (col_values < lower[col].to_numpy()[codes]) | (col_values > upper[col].to_numpy()[codes])
+            zscore = np.abs(col_values - mean[col].to_numpy()[codes]) / std[col].to_numpy()[codes]
+            is_zscore = zscore > threshold
+
+        flags[f'outlier_iqr_{col}'] = is_iqr & enough
+        flags[f'outlier_zscore_{col}'] = np.nan_to_num(is_zscore, nan=False).astype(bool) & enough
+
+        outlier_counts = pd.DataFrame({
+            'iqr': flags[f'outlier_iqr_{col}'].to_numpy(),
+            'zscore': flags[f'outlier_zscore_{col}'].to_numpy()
+        }).groupby(codes).sum()
+
+        summaries.append(pd.DataFrame({
+            'agrupamento': ', '.join(by) or 'total',
+            'grupo': labels.to_numpy()[count.index],
+            'coluna': col,
+            'valores': count[col].to_numpy(),
+            'q1': q1[col].to_numpy(),
+            'q3': q3[col].to_numpy(),
+            'limite_inferior': lower[col].to_numpy(),
+            'limite_superior': upper[col].to_numpy(),
+            'outliers_iqr': outlier_counts['iqr'].to_numpy(),
+            'media': mean[col].to_numpy(),
+            'desvio_padrao': std[col].to_numpy(),
+            'outliers_zscore': outlier_counts['zscore'].to_numpy()
+        }))
+
+    if not summaries:
+        return flags, pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    summary = pd.concat(summaries, ignore_index=True)
+    valid = summary['valores'].where(summary['valores'] > 0)
+    summary['percentual_iqr'] = (summary['outliers_iqr'] / valid * 100).round(2)
+    summary['percentual_zscore'] = (summary['outliers_zscore'] / valid * 100).round(2)
+
+    # Grupos pequenos ficam no resumo (com as estatísticas), mas sem contagem de outliers
+    small = summary['valores'] < min_size
+    summary.loc[small, ['outliers_iqr', 'outliers_zscore']] = 0
+
+    return flags, summary[SUMMARY_COLUMNS]
+
+
+def outlier_summary(df, columns, groupings=None):
+    """Resumo de outliers de várias colunas em vários agrupamentos
+
+    groupings: {nome: colunas} (padrão: OUTLIER_CONFIG['groupings']); agrupamentos
+    com colunas ausentes no DataFrame são ignorados.
+    """
+    groupings = OUTLIER_CONFIG['groupings'] if groupings is None else groupings
+    summaries = []
+
+    for name, by in groupings.items():
+        if any(col not in df.columns for col in by):
+            continue
+
+        _, summary = grouped_outliers(df, columns, by)
+        summaries.append(summary.assign(agrupamento=name))
+
+    if not summaries:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    return pd.concat(summaries, ignore_index=True)
+
+
+@instrumented
+def save_outlier_outputs(df, municipalities=None):
+    """Etapa Gold: resumo nacional de outliers e registros Agibank com flags
+
+    df: registros Silver (colunas de OUTLIER_CONFIG['record_columns'])
+    municipalities: agregado municipal normalizado (colunas de 'rate_columns'), opcional
+    Retorna {nome: descrição da partição nacional no catálogo}.
+    """
+    logger.info("🔎 Detectando outliers...")
+
+    prefix = CATALOG_CONFIG['gold_prefix']
+    key = CATALOG_CONFIG['national_partition']
+    outputs = {}
+
+    summary = outlier_summary(df, OUTLIER_CONFIG['record_columns'])
+
+    if municipalities is not None and not municipalities.empty:
+        rate_summary = outlier_summary(municipalities, OUTLIER_CONFIG['rate_columns'])
+        summary = pd.concat([summary, rate_summary.assign(agrupamento='municipios_' + rate_summary['agrupamento'])],
+                            ignore_index=True)
+
+    outputs['outliers_resumo'] = write_partition(f"{prefix}outliers_resumo", key, summary)
+
+    # Flags nos registros, no agrupamento configurado; gravados apenas os registros Agibank
+    flag_by = OUTLIER_CONFIG['groupings'][OUTLIER_CONFIG['flag_grouping']]
+    flags, _ = grouped_outliers(df, OUTLIER_CONFIG['record_columns'], flag_by)
+    flags['total_outliers'] = flags.sum(axis=1)
+
+    is_agibank = df['is_agibank'].fillna(False).astype(bool)
+    if is_agibank.any():
+        flagged = pd.concat([df[is_agibank], flags[is_agibank]], axis=1)
+        outputs['agibank_outliers'] = write_partition(f"{prefix}agibank_outliers", key, flagged)
+        logger.info(f"   Agibank com flags: {len(flagged):,} registros, {int((flagged['total_outliers'] > 0).sum()):,} com outlier")
+
+    logger.info(f"✅ Outliers: {len(summary):,} linhas de resumo, {int(summary['outliers_iqr'].sum()):,} outliers IQR")
+    return outputs
@@ -0,0 +1,87 @@
+"""
+Pipeline Bronze -> Silver -> Gold em um único processo
+
+As camadas recebem o DataFrame da anterior em memória; gravar Bronze/Silver em disco
+é um checkpoint opcional (PIPELINE_CONFIG['checkpoints']). Os DAGs individuais
+continuam disponíveis e sempre persistem suas saídas.
+"""
+
+import logging
+from datetime import datetime
+import sys
+
+sys.path.append('..')
+from config.settings import PIPELINE_CONFIG, PROCESSING_CONFIG
+from bronze_ingestion import bronze_dag
+from silver_padronizer import silver_dag
+from gold_clipping import gold_dag
+from instrumentation import measure, start_run, finish_run
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_LAYERS = ('bronze', 'silver')
+
+
+def run_pipeline(execution_mode=None, checkpoints=None):
+    """Executa Bronze, Silver e Gold encadeados
+
+    execution_mode: modo da Bronze (padrão: PROCESSING_CONFIG['execution_mode']).
+        Nos modos 'streaming' e 'incremental' a Bronze só existe em disco, e a Silver
+        a carrega de lá.
+    checkpoints: camadas intermediárias a persistir (padrão: PIPELINE_CONFIG['checkpoints'])
+
+    Retorna o dicionário de arquivos Gold gravados.
+    """
+    logger.info("Iniciando pipeline Bronze -> Silver -> Gold...")
+    start_time = datetime.now()
+    run = start_run('pipeline')
+    status = 'erro'
+
+    if execution_mode is None:
+        execution_mode = PROCESSING_CONFIG['execution_mode']
+
+    if checkpoints is None:
+        checkpoints = PIPELINE_CONFIG['checkpoints']
+
+    invalid = [layer for layer in checkpoints if layer not in CHECKPOINT_LAYERS]
+    if invalid:
+        raise ValueError(f"Checkpoints inválidos: {invalid} (opções: {list(CHECKPOINT_LAYERS)})")
+
+    logger.info(f"Versão: v{PIPELINE_CONFIG['version']} | Bronze: {execution_mode} | Checkpoints: {list(checkpoints) or 'nenhum'}")
+
+    try:
+        # Cada DAG é uma tarefa de primeiro nível; as tarefas das DAGs ficam aninhadas
+        with measure('bronze_dag', module=__name__) as measurement:
+            df_bronze = measurement.output(bronze_dag(execution_mode=execution_mode, persist='bronze' in checkpoints))
+
+        with measure('silver_dag', df_bronze, __name__) as measurement:
+            df_silver = measurement.output(silver_dag(df_bronze, persist='silver' in checkpoints))
+        del df_bronze
+
+        with measure('gold_dag', df_silver, __name__):
+            outputs = gold_dag(df_silver)
+
+        duration = datetime.now() - start_time
+
+        logger.info("=" * 70)
+        logger.info(" RELATÓRIO PIPELINE")
+        logger.info(f" Duração total: {duration}")
+        logger.info(f" Registros Silver: {len(df_silver):,}")
+        logger.info(f" Arquivos Gold gerados: {len(outputs)}")
+        logger.info("✅ Pipeline concluído")
+        logger.info("=" * 70)
+
+        status = 'ok'
+        return outputs
+
+    except Exception as e:
+        logger.error(f"❌ Erro no pipeline: {str(e)}")
+        raise
+
+    finally:
+        finish_run(run, status)
+
+
+if __name__ == "__main__":
+    run_pipeline()
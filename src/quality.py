@@ -0,0 +1,290 @@
+"""
+Qualidade dos dados - perfil incremental por arquivo e por coluna
+
+Cada chunk/arquivo gera um perfil (contagens de nulos, valores distintos, datas
+inválidas) que é acumulado no relatório. Os distintos são contados por um esboço
+KMV de tamanho fixo por coluna (os k menores hashes de 64 bits): exato até k
+valores, estimado acima, e combinável entre chunks sem guardar os valores. Duplicatas vêm da deduplicação por hash
+(dedup.py), sem um novo hash das linhas. O resultado é um artefato JSON, não uma
+coluna repetida em cada registro.
+"""
+
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from datetime import datetime
+import logging
+import sys
+
+sys.path.append('..')
+from config.settings import QUALITY_CHECKS, PROCESSING_CONFIG, CONSUMIDOR_GOV_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+
+def new_quality_report():
+    """Relatório vazio: {'files': {...}, 'columns': {...}}"""
+    return {'files': {}, 'columns': {}}
+
+
+def _date_bounds():
+    year = PROCESSING_CONFIG['target_year']
+    return pd.Timestamp(year=year, month=1, day=1), pd.Timestamp(year=year + 1, month=12, day=31)
+
+
+def _distinct_sketch(series):
+    """Os k menores hashes distintos da série (sem nulos)"""
+    hashes = pd.unique(pd.util.hash_pandas_object(series.dropna(), index=False).to_numpy())
+    k = QUALITY_CHECKS['distinct_sketch_size']
+
+    if len(hashes) > k:
+        hashes = np.partition(hashes, k - 1)[:k]
+
+    return np.sort(hashes)
+
+
+def _merge_sketches(left, right):
+    return np.union1d(left, right)[:QUALITY_CHECKS['distinct_sketch_size']]
+
+
+def _sketch_cardinality(sketch):
+    """Nº de distintos: exato abaixo de k; acima, estimativa KMV (k - 1) / hash_k normalizado"""
+    k = QUALITY_CHECKS['distinct_sketch_size']
+    if len(sketch) < k:
+        return len(sketch), False
+
+    return int(round((k - 1) / (float(sketch[-1]) / 2.0**64))), True
+
+
+def profile_frame(df, file_name, duplicates=0, exclude=None):
+    """Perfil de um DataFrame (arquivo inteiro ou chunk)
+
+    exclude: colunas técnicas fora do perfil (ex.: hash de deduplicação)
+
+    Datas são validadas por valor distinto com o formato declarado no schema.
+    """
+    profiled_columns = [col for col in df.columns if col not in (exclude or [])]
+    null_counts = df.isna().sum()
+
+    columns = {}
+    for col in profiled_columns:
+        columns[col] = {
+            'nulls': int(null_counts[col]),
+            'distinct': _distinct_sketch(df[col])
+        }
+
+    invalid_dates = {}
+    if QUALITY_CHECKS['date_range_validation']:
+        start, end = _date_bounds()
+
+        for col in CONSUMIDOR_GOV_SCHEMA['date_columns']:
+            if col not in df.columns:
+                continue
+
+            values = df[col].dropna()
+            uniques = pd.Series(values.unique())
+            parsed = pd.to_datetime(uniques, format=CONSUMIDOR_GOV_SCHEMA['date_format'], errors='coerce')
+            invalid_values = uniques[parsed.isna() | (parsed < start) | (parsed > end)]
+
+            invalid_dates[col] = int(values.isin(invalid_values).sum()) if len(invalid_values) else 0
+
+    return {
+        'file_name': file_name,
+        'rows': len(df),
+        'duplicates': int(duplicates),
+        'columns': columns,
+        'invalid_dates': invalid_dates
+    }
+
+
+def merge_profile(report, profile):
+    """Acumula um perfil no relatório (chunks do mesmo arquivo são somados)"""
+    file_entry = report['files'].setdefault(profile['file_name'], {
+        'rows': 0,
+        'duplicates': 0,
+        'nulls': {},
+        'invalid_dates': {}
+    })
+
+    file_entry['rows'] += profile['rows']
+    file_entry['duplicates'] += profile['duplicates']
+
+    for col, stats in profile['columns'].items():
+        file_entry['nulls'][col] = file_entry['nulls'].get(col, 0) + stats['nulls']
+
+        col_entry = report['columns'].setdefault(
+            col, {'rows': 0, 'nulls': 0, 'distinct': np.empty(0, dtype=np.uint64)}
+        )
+        col_entry['rows'] += profile['rows']
+        col_entry['nulls'] += stats['nulls']
+        col_entry['distinct'] = _merge_sketches(col_entry['distinct'], stats['distinct'])
+
+    for col, count in profile['invalid_dates'].items():
+        file_entry['invalid_dates'][col] = file_entry['invalid_dates'].get(col, 0) + count
+
+    return report
+
+
+def merge_report(report, other):
+    """Acumula um relatório em outro (ex.: o de um arquivo em streaming, confirmado só ao fim do arquivo)"""
+    for file_name, entry in other['files'].items():
+        file_entry = report['files'].setdefault(file_name, {'rows': 0, 'duplicates': 0, 'nulls': {}, 'invalid_dates': {}})
+        file_entry['rows'] += entry['rows']
+        file_entry['duplicates'] += entry['duplicates']
+
+        for key in ('nulls', 'invalid_dates'):
+            for col, count in entry[key].items():
+                file_entry[key][col] = file_entry[key].get(col, 0) + count
+
+    for col, entry in other['columns'].items():
+        col_entry = report['columns'].setdefault(
+            col, {'rows': 0, 'nulls': 0, 'distinct': np.empty(0, dtype=np.uint64)}
+        )
+        col_entry['rows'] += entry['rows']
+        col_entry['nulls'] += entry['nulls']
+        col_entry['distinct'] = _merge_sketches(col_entry['distinct'], entry['distinct'])
+
+    return report
+
+
+def load_quality_state(state_path=None):
+    """Perfis por arquivo persistidos pelo modo incremental ({arquivo: relatório})
+
+    Cada perfil guarda as contagens e os esboços KMV do arquivo, para que o
+    relatório completo seja refeito sem reler os arquivos inalterados.
+    """
+    state_path = Path(state_path or QUALITY_CHECKS['state_path'])
+
+    if not state_path.exists():
+        logger.info("Perfis de qualidade não encontrados - iniciando vazio")
+        return {}
+
+    with np.load(state_path, allow_pickle=False) as data:
+        meta = json.loads(str(data['meta']))
+        states = {}
+        for i, (file_name, entry) in enumerate(meta.items()):
+            states[file_name] = {
+                'files': {file_name: entry['file']},
+                'columns': {
+                    col: {**counts, 'distinct': data[f"s{i}_{j}"]}
+                    for j, (col, counts) in enumerate(entry['columns'].items())
+                }
+            }
+
+    logger.info(f"Perfis de qualidade carregados: {len(states)} arquivos")
+    return states
+
+
+def save_quality_state(states, state_path=None):
+    """Persiste os perfis por arquivo (.npz: contagens em JSON + esboços binários)"""
+    state_path = Path(state_path or QUALITY_CHECKS['state_path'])
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+
+    meta = {}
+    sketches = {}
+    for i, (file_name, report) in enumerate(states.items()):
+        meta[file_name] = {
+            'file': report['files'][file_name],
+            'columns': {col: {'rows': entry['rows'], 'nulls': entry['nulls']} for col, entry in report['columns'].items()}
+        }
+        for j, entry in enumerate(report['columns'].values()):
+            sketches[f"s{i}_{j}"] = entry['distinct']
+
+    tmp_path = state_path.with_name(f"{state_path.stem}.tmp.npz")
+    np.savez(tmp_path, meta=np.array(json.dumps(meta, ensure_ascii=False)), **sketches)
+    tmp_path.replace(state_path)
+
+    logger.info(f"Perfis de qualidade salvos: {len(states)} arquivos")
+
+
+def add_duplicates(report, file_name, duplicates):
+    """Soma duplicatas detectadas depois do perfil (ex.: entre arquivos)"""
+    if file_name in report['files']:
+        report['files'][file_name]['duplicates'] += int(duplicates)
+
+
+def file_issues(report, file_name):
+    """Issues de qualidade de um arquivo, no mesmo formato textual de quality_check"""
+    entry = report['files'][file_name]
+    issues = []
+
+    if entry['rows'] < QUALITY_CHECKS['min_rows_expected']:
+        issues.append(f"Poucas linhas: {entry['rows']} < {QUALITY_CHECKS['min_rows_expected']}")
+
+    if entry['rows'] > 0:
+        high_null_cols = [
+            col for col, nulls in entry['nulls'].items()
+            if nulls / entry['rows'] > QUALITY_CHECKS['max_null_percentage']
+            and col not in QUALITY_CHECKS['null_check_exclude']
+        ]
+        if high_null_cols:
+            issues.append(f"Colunas com muitos nulos: {high_null_cols}")
+
+    if entry['duplicates'] > 0:
+        issues.append(f"Registros duplicados: {entry['duplicates']}")
+
+    invalid = {col: count for col, count in entry['invalid_dates'].items() if count > 0}
+    if invalid:
+        issues.append(f"Datas inválidas ou fora do período: {invalid}")
+
+    return issues
+
+
+def finalize_quality_report(report):
+    """Converte o relatório acumulado em estrutura serializável (por arquivo e por coluna)"""
+    files = []
+    for file_name, entry in sorted(report['files'].items()):
+        rows = entry['rows']
+        files.append({
+            'file_name': file_name,
+            'rows': rows,
+            'duplicates': entry['duplicates'],
+            'null_rate': {col: round(nulls / rows, 4) if rows else None for col, nulls in entry['nulls'].items()},
+            'invalid_dates': entry['invalid_dates'],
+            'issues': file_issues(report, file_name)
+        })
+
+    columns = []
+    for col, entry in report['columns'].items():
+        rows = entry['rows']
+        null_rate = entry['nulls'] / rows if rows else None
+        cardinality, estimated = _sketch_cardinality(entry['distinct'])
+        columns.append({
+            'column': col,
+            'rows': rows,
+            'nulls': entry['nulls'],
+            'null_rate': round(null_rate, 4) if null_rate is not None else None,
+            'cardinality': cardinality,
+            'cardinality_estimated': estimated,
+            'high_nulls': (
+                null_rate is not None
+                and null_rate > QUALITY_CHECKS['max_null_percentage']
+                and col not in QUALITY_CHECKS['null_check_exclude']
+            )
+        })
+
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'thresholds': {
+            'max_null_percentage': QUALITY_CHECKS['max_null_percentage'],
+            'min_rows_expected': QUALITY_CHECKS['min_rows_expected'],
+            'date_range': [str(bound.date()) for bound in _date_bounds()]
+        },
+        'files': files,
+        'columns': columns
+    }
+
+
+def save_quality_report(report, report_path=None):
+    """Grava o relatório de qualidade (JSON)"""
+    report_path = Path(report_path or QUALITY_CHECKS['report_path'])
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+
+    summary = finalize_quality_report(report)
+
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2, default=str)
+
+    logger.info(f"Relatório de qualidade salvo: {report_path}")
+    return summary
@@ -0,0 +1,116 @@
+"""
+Schema de leitura dos arquivos Consumidor.gov - projeção de colunas e tipos
+"""
+
+import hashlib
+import json
+from pathlib import Path
+import logging
+import sys
+
+sys.path.append('..')
+from config.settings import (DATA_SOURCES, CONSUMIDOR_GOV_SCHEMA, CONSUMIDOR_GOV_DELETE_COLUMNS,
+                             SCHEMA_EXPLORATION_CONFIG)
+
+logger = logging.getLogger(__name__)
+
+
+def consumidor_gov_read_options(**overrides):
+    """Parâmetros de pd.read_csv para os arquivos brutos do Consumidor.gov
+
+    Colunas dispensáveis ficam fora de usecols (não são parseadas) e as demais
+    são lidas com o dtype declarado; colunas não declaradas seguem a inferência
+    do pandas.
+    """
+    deleted = set(CONSUMIDOR_GOV_DELETE_COLUMNS['columns'])
+
+    options = {
+        'sep': DATA_SOURCES['consumidor_gov']['separator'],
+        'encoding': DATA_SOURCES['consumidor_gov']['encoding'],
+        'usecols': lambda col: col not in deleted,
+        'dtype': dict(CONSUMIDOR_GOV_SCHEMA['dtypes'])
+    }
+    options.update(overrides)
+
+    return options
+
+
+def bronze_output_dtypes():
+    """Tipos declarados da saída Bronze: colunas da fonte + metadados da ingestão"""
+    return {**CONSUMIDOR_GOV_SCHEMA['dtypes'], **CONSUMIDOR_GOV_SCHEMA['metadata_dtypes']}
+
+
+def category_columns(columns=None):
+    """Colunas declaradas como category (filtradas pelas presentes, se informado)"""
+    declared = [col for col, dtype in CONSUMIDOR_GOV_SCHEMA['dtypes'].items() if dtype == 'category']
+
+    if columns is None:
+        return declared
+
+    return [col for col in declared if col in columns]
+
+
+def restore_categories(df):
+    """Reaplica category após concatenação de arquivos com conjuntos de categorias diferentes"""
+    for col in category_columns(df.columns):
+        if df[col].dtype.name != 'category':
+            df[col] = df[col].astype('category')
+
+    return df
+
+
+def expected_source_columns():
+    """Colunas esperadas no arquivo bruto: declaradas no schema + dispensáveis"""
+    return list(CONSUMIDOR_GOV_SCHEMA['dtypes']) + list(CONSUMIDOR_GOV_DELETE_COLUMNS['columns'])
+
+
+def schema_fingerprint(columns):
+    """Impressão digital do layout (nomes e ordem das colunas)"""
+    return hashlib.sha256('\x1f'.join(columns).encode('utf-8')).hexdigest()[:16]
+
+
+def load_schema_cache(cache_path=None):
+    """Cache de schemas por arquivo (vazio se não existir)"""
+    cache_path = Path(cache_path or SCHEMA_EXPLORATION_CONFIG['cache_path'])
+
+    if not cache_path.exists():
+        return {}
+
+    with open(cache_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_schema_cache(cache, cache_path=None):
+    cache_path = Path(cache_path or SCHEMA_EXPLORATION_CONFIG['cache_path'])
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+
+
+def detect_column_drift(infos):
+    """Compara o layout de cada arquivo com o schema declarado e com os demais meses
+
+    Retorna uma lista de dicionários (arquivo, colunas ausentes, colunas extras,
+    fingerprint); lista vazia quando todos os arquivos seguem o layout esperado.
+    """
+    expected = expected_source_columns()
+    drift = []
+
+    for info in infos:
+        missing = [col for col in expected if col not in info['columns']]
+        extra = [col for col in info['columns'] if col not in expected]
+
+        if missing or extra:
+            drift.append({
+                'file_name': info['file_name'],
+                'missing_columns': missing,
+                'extra_columns': extra,
+                'fingerprint': info['fingerprint']
+            })
+
+    fingerprints = {info['fingerprint'] for info in infos}
+    if len(fingerprints) > 1:
+        logger.warning(f"Layouts diferentes entre arquivos: {len(fingerprints)} fingerprints distintos")
+
+    return drift
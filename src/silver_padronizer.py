@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 import glob
 from pathlib import Path
 import logging
@@ -6,27 +7,67 @@ from datetime import datetime
 import sys
 
 sys.path.append('..')
-from config.settings import TEMPORAL_COLUMNS_CONFIG
+from config.settings import TEMPORAL_COLUMNS_CONFIG, INCREMENTAL_CONFIG, CONSUMIDOR_GOV_SCHEMA, CATALOG_CONFIG
+from storage import layer_stem, resolve_dataset_path, read_dataset, read_partitioned_dataset
+from catalog import publish_dataset, read_catalog_dataset, dataset_partitions
+from category_registry import load_category_registry, save_category_registry, encode_categories
+from instrumentation import instrumented, measure, start_run, finish_run
 
 logging.basicConfig( level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
+@instrumented
 def load_bronze_data():
-    """Task 1: Carregar dados da camada Bronze..."""
+    """Task 1: Carregar dados da camada Bronze...
+
+    Usa a versão mais recente registrada no catálogo (qualquer modo de execução).
+    Sem catálogo, cai nos arquivos legados: o mais recente entre o arquivo único
+    (modos batch/parallel/streaming) e as partições mensais do modo incremental.
+    """
     logger.info("Carregando dados da camada Bronze...")
 
-    version = 2
-    bronze_file = f"../data/silver/consumidor_gov_bronze_v{version}.csv"
+    # Tipos declarados do Consumidor.gov (aplicados apenas quando a Bronze está em CSV)
+    bronze_dtypes = dict(CONSUMIDOR_GOV_SCHEMA['dtypes'])
+    bronze_dtypes['is_agibank'] = 'bool'
+
+    bronze_name = CATALOG_CONFIG['datasets']['bronze']['name']
+    try:
+        dataset_partitions(bronze_name)
+    except KeyError:
+        logger.info("Bronze fora do catálogo - procurando arquivos legados")
+    else:
+        df = read_catalog_dataset(bronze_name, dtype=bronze_dtypes)
+        logger.info(f"✅ Dados carregados: {len(df)} registros, {len(df.columns)} colunas")
+        return df
+
+    bronze_stem = layer_stem('bronze')
+
+    try:
+        bronze_file = resolve_dataset_path(bronze_stem)
+    except FileNotFoundError:
+        bronze_file = None
+
+    partitions_dir = Path(INCREMENTAL_CONFIG['partitions_dir'])
+    manifest_path = Path(INCREMENTAL_CONFIG['manifest_path'])
+
+    use_partitions = partitions_dir.exists() and manifest_path.exists() and (
+        bronze_file is None or manifest_path.stat().st_mtime > bronze_file.stat().st_mtime
+    )
+
+    if use_partitions:
+        logger.info(f"Lendo partições Bronze (incremental): {partitions_dir}")
+        df = read_partitioned_dataset(partitions_dir, dtype=bronze_dtypes)
+    elif bronze_file is not None:
+        df = read_dataset(bronze_file, dtype=bronze_dtypes)
+    else:
+        raise FileNotFoundError(f"Arquivo Bronze não encontrado: {bronze_stem}")
 
-    if not Path(bronze_file).exists():
-        raise FileNotFoundError(f"Arquivo Bronze não encontrado: {bronze_file}")
-    
-    df = pd.read_csv(bronze_file, sep=';', encoding='utf-8')
     logger.info(f"✅ Dados carregados: {len(df)} registros, {len(df.columns)} colunas")
 
     return df
 
+@instrumented
 def standardize_column_names(df):
     """Task 2: Padronizar nomes das colunas"""
     logger.info("Padronizando nomes das colunas...")
@@ -70,8 +111,52 @@ def standardize_column_names(df):
     
     return df
 
+NULL_TOKENS = ['', 'nan', 'NaN', 'NaT', 'NULL', 'null', 'None']
+
+
+def parse_dates(series, date_format):
+    """Converte uma coluna de datas parseando cada valor distinto uma única vez
+
+    Usa o formato fixo informado; valores distintos que não casam com o formato
+    passam por uma segunda tentativa com inferência (dayfirst). Retorna a série
+    convertida e o número de linhas que não puderam ser convertidas.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        # Já tipada (Bronze em Parquet/Feather)
+        return series, 0
+
+    codes, uniques = pd.factorize(series)
+    uniques = pd.Index(uniques).astype(str).str.strip()
+
+    is_null_token = uniques.isin(NULL_TOKENS)
+
+    parsed = pd.to_datetime(uniques, format=date_format, errors='coerce')
+
+    retry = parsed.isna() & ~is_null_token
+    if retry.any():
+        fallback = pd.to_datetime(uniques[retry], format='mixed', dayfirst=True, errors='coerce')
+        parsed_values = parsed.to_numpy().copy()
+        parsed_values[retry] = fallback.to_numpy().astype(parsed_values.dtype)
+        parsed = pd.DatetimeIndex(parsed_values)
+
+    failed_uniques = parsed.isna() & ~is_null_token
+
+    # Código -1 (nulo original) aponta para o NaT do final do array
+    values = np.append(parsed.to_numpy(), np.datetime64('NaT'))
+    result = pd.Series(values[codes], index=series.index, name=series.name)
+
+    failures = int(np.isin(codes, np.flatnonzero(failed_uniques)).sum())
+
+    return result, failures
+
+
+@instrumented
 def convert_temporal_columns(df):
-    """Task 3: Converter colunas temporais"""
+    """Task 3: Converter colunas temporais
+
+    Formato fixo de TEMPORAL_COLUMNS_CONFIG ('processed_at_format' para processed_at,
+    'default_format' para as demais), com parse por valor distinto (parse_dates).
+    """
     logger.info("Convertendo colunas temporais...")
 
     datetime_columns = TEMPORAL_COLUMNS_CONFIG['datetime_columns']
@@ -86,14 +171,13 @@ def convert_temporal_columns(df):
 
         non_null_before = df[col].notna().sum()
 
-        df[col] = df[col].astype(str).str.strip()
-        df[col] = df[col].replace(['', 'nan', 'NaN', 'NULL', 'null', 'None'], pd.NaT)
+        if col == 'processed_at':
+            date_format = TEMPORAL_COLUMNS_CONFIG['processed_at_format']
+        else:
+            date_format = TEMPORAL_COLUMNS_CONFIG['default_format']
 
         try:
-            if col == 'processed_at':
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-            else:
-                df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
+            df[col], failures = parse_dates(df[col], date_format)
 
             non_null_after = df[col].notna().sum()
             success_rate = (non_null_after / non_null_before * 100) if non_null_before > 0 else 0
@@ -101,25 +185,38 @@ def convert_temporal_columns(df):
             conversion_stats[col] = {
                 'before': non_null_before,
                 'after': non_null_after,
+                'failures': failures,
                 'success_rate': success_rate
             }
 
-            logger.info(f"  {non_null_before:,} -> {non_null_after:,} ({success_rate:.1f}% sucesso)")
+            logger.info(f"  {non_null_before:,} -> {non_null_after:,} ({success_rate:.1f}% sucesso, {failures:,} falhas)")
         
         except Exception as e:
             logger.error(f" Erro convertendo '{col}': {str(e)}")
-            conversion_stats[col] = {'before': non_null_before, 'after': 0, 'success_rate': 0}
+            conversion_stats[col] = {'before': non_null_before, 'after': 0, 'failures': non_null_before, 'success_rate': 0}
 
     sucessful = sum(1 for stats in conversion_stats.values() if stats['success_rate'] > 0)
     logger.info(f"✅ Conversão temporais: {sucessful}/{len(conversion_stats)} bem-sucessidas")
 
     return df, conversion_stats
 
+@instrumented
 def convert_categorical_columns(df):
-    """Task 4: Converter colunas apropriadas para category"""
+    """Task 4: Converter colunas apropriadas para category
+
+    Colunas de CATEGORY_REGISTRY_CONFIG['columns'] usam o dicionário persistente (códigos
+    estáveis entre execuções); as demais candidatas seguem a regra de cardinalidade.
+    """
     logger.info("🏷️ Convertendo colunas categóricas...")
-    
-    categorical_candidates = ['regiao', 'uf', 'sexo', 'respondida', 'situacao', 'data_source']
+
+    registry = load_category_registry()
+    df, added = encode_categories(df, registry)
+    save_category_registry(registry)
+
+    for col, new_values in added.items():
+        logger.info(f"   🏷️ {col}: {len(registry['columns'][col])} categorias ({new_values} novas)")
+
+    categorical_candidates = ['data_source']
     
     for col in categorical_candidates:
         # 🔧 CORREÇÃO: Verificação segura
@@ -136,6 +233,7 @@ def convert_categorical_columns(df):
     
     return df
 
+@instrumented
 def final_cleanup(df):
     """Task 5: Limpeza final - duplicatas"""
     logger.info(" Limpeza final...")
@@ -150,16 +248,24 @@ def final_cleanup(df):
     return df_clean
 
 
-def silver_dag():
-    """DAG principal da camada silver"""
+def silver_dag(df=None, persist=True):
+    """DAG principal da camada silver
+
+    df: DataFrame Bronze já em memória (run_pipeline); None = carregar do disco
+    persist: grava a saída Silver
+    """
     logger.info("Iniciando DAG Silver...")
     start_time = datetime.now()
-    version = 2
+    run = start_run('silver')
+    status = 'erro'
 
     try: 
         # Pipeline Silver
-        logger.info("Carregando dados Bronze...")
-        df = load_bronze_data()
+        if df is None:
+            logger.info("Carregando dados Bronze...")
+            df = load_bronze_data()
+        else:
+            logger.info(f"Bronze recebida em memória: {len(df):,} registros")
 
         logger.info("   Padronizando colunas...")
         df = standardize_column_names(df)
@@ -175,9 +281,12 @@ def silver_dag():
 
 
         # Salvar resultado Silver
-        output_path = f"../data/silver/consumidor_gov_silver_v{version}.csv"
-        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(output_path, index=False, encoding='utf-8', sep=';')
+        output_path = None
+        if persist:
+            spec = CATALOG_CONFIG['datasets']['silver']
+            with measure('publish_dataset', df, __name__):
+                version = publish_dataset(spec['name'], df, partition_by=spec['partition_by'])
+            output_path = f"{spec['name']} v{version} (catálogo)"
 
         end_time = datetime.now()
         duration = end_time - start_time
@@ -189,16 +298,20 @@ def silver_dag():
         logger.info(f"Colunas finais: {len(df.columns)}")
         logger.info(f"\nRegistros Agibank: {df['is_agibank'].sum():,}")
         logger.info(f"\nConversões temporais: {sum(1 for s in conversion_stats.values() if s['success_rate'] > 0)}")
-        logger.info(f"\nArquivo salvo: {output_path}")
+        logger.info(f"\nArquivo salvo: {output_path or 'não persistido (em memória)'}")
         logger.info(f"✅    Silver DAG concluído    ")
         logger.info("-"*70)
         
+        status = 'ok'
         return df
 
     except Exception as e:
         logger.error(f"Error DAG Silver: {str(e)}")
         raise
 
+    finally:
+        finish_run(run, status)
+
 
 if __name__ == "__main__":
     silver_dag()
@@ -0,0 +1,418 @@
+"""
+Armazenamento das camadas Bronze/Silver/Gold - CSV ou formatos colunares (Parquet/Feather)
+"""
+
+import pandas as pd
+from pandas.api.types import infer_dtype
+from pathlib import Path
+import logging
+import sys
+
+sys.path.append('..')
+from config.settings import STORAGE_CONFIG, PIPELINE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+FORMAT_EXTENSIONS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'feather': '.feather'
+}
+
+
+def layer_stem(layer, version=None):
+    """Caminho (sem extensão) do dataset de uma camada na versão do pipeline
+
+    layer: 'bronze' ou 'silver'
+    """
+    version = version or PIPELINE_CONFIG['version']
+    return PIPELINE_CONFIG[f'{layer}_stem'].format(version=version)
+
+
+def _check_format(fmt):
+    if fmt not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Formato de armazenamento inválido: {fmt} (opções: {list(FORMAT_EXTENSIONS)})")
+
+    if fmt in ('parquet', 'feather'):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError(f"Formato '{fmt}' requer o pacote pyarrow (pip install pyarrow)")
+
+    return fmt
+
+
+def format_from_path(path):
+    """Identifica o formato pelo sufixo do arquivo"""
+    suffix = Path(path).suffix.lower()
+
+    for fmt, extension in FORMAT_EXTENSIONS.items():
+        if suffix == extension:
+            return fmt
+
+    raise ValueError(f"Sufixo de arquivo não suportado: {path}")
+
+
+def dataset_path(stem, fmt=None):
+    """Monta o caminho do dataset com a extensão do formato configurado
+
+    stem: caminho sem extensão, ex.: ../data/silver/consumidor_gov_silver_v2
+    """
+    fmt = _check_format(fmt or STORAGE_CONFIG['format'])
+    return Path(f"{stem}{FORMAT_EXTENSIONS[fmt]}")
+
+
+def resolve_dataset_path(stem):
+    """Localiza um dataset existente, priorizando o formato configurado
+
+    Permite que as camadas leiam tanto saídas novas (Parquet/Feather) quanto
+    arquivos CSV legados com o mesmo nome.
+    """
+    preferred = STORAGE_CONFIG['format']
+    candidates = [preferred] + [fmt for fmt in FORMAT_EXTENSIONS if fmt != preferred]
+
+    for fmt in candidates:
+        path = Path(f"{stem}{FORMAT_EXTENSIONS[fmt]}")
+        if path.exists():
+            return path
+
+    raise FileNotFoundError(f"Dataset não encontrado em nenhum formato: {stem}.*")
+
+
+def _prepare_for_columnar(df):
+    """Normaliza colunas object com tipos misturados para string
+
+    Parquet/Feather exigem um tipo por coluna; o CSV aceitava qualquer mistura.
+    """
+    df = df.copy()
+
+    for col in df.columns:
+        if df[col].dtype == object:
+            inferred = infer_dtype(df[col], skipna=True)
+            if inferred.startswith('mixed') or inferred == 'empty':
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+
+    return df
+
+
+def write_dataset(df, path, index=False, sep=None):
+    """Grava um DataFrame no formato indicado pelo sufixo do caminho
+
+    index: preserva o índice (usado nos agregados Gold indexados por dimensão)
+    sep: separador do CSV (padrão: STORAGE_CONFIG['csv_separator'])
+    """
+    path = Path(path)
+    fmt = _check_format(format_from_path(path))
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if fmt == 'csv':
+        df.to_csv(
+            path,
+            index=index,
+            encoding=STORAGE_CONFIG['csv_encoding'],
+            sep=sep or STORAGE_CONFIG['csv_separator']
+        )
+    elif fmt == 'parquet':
+        _prepare_for_columnar(df).to_parquet(
+            path,
+            index=index,
+            compression=STORAGE_CONFIG['parquet_compression']
+        )
+    else:
+        # Feather não armazena índice: ele vira coluna
+        df_out = df.reset_index() if index else df.reset_index(drop=True)
+        _prepare_for_columnar(df_out).to_feather(path)
+
+    logger.info(f"Dataset gravado ({fmt}): {path}")
+    return path
+
+
+FILTER_OPERATORS = ('==', '=', '!=', '<', '<=', '>', '>=', 'in', 'not in')
+
+
+def _check_filters(filters):
+    for column, op, _ in filters:
+        if op not in FILTER_OPERATORS:
+            raise ValueError(f"Operador de filtro inválido em '{column}': {op} (opções: {list(FILTER_OPERATORS)})")
+    return filters
+
+
+def filter_mask(df, filters):
+    """Máscara booleana das linhas que atendem a todos os filtros
+
+    filters: lista de tuplas (coluna, operador, valor) - mesmo formato do pyarrow
+    """
+    mask = pd.Series(True, index=df.index)
+
+    for column, op, value in _check_filters(filters):
+        values = df[column]
+        if op in ('==', '='):
+            mask &= values == value
+        elif op == '!=':
+            mask &= values != value
+        elif op == '<':
+            mask &= values < value
+        elif op == '<=':
+            mask &= values <= value
+        elif op == '>':
+            mask &= values > value
+        elif op == '>=':
+            mask &= values >= value
+        elif op == 'in':
+            mask &= values.isin(value)
+        else:
+            mask &= ~values.isin(value)
+
+    return mask.fillna(False).astype(bool)
+
+
+def dataset_columns(path, sep=None):
+    """Colunas de um dataset sem ler os dados"""
+    path = Path(path)
+    fmt = _check_format(format_from_path(path))
+
+    if fmt == 'csv':
+        return list(pd.read_csv(
+            path, sep=sep or STORAGE_CONFIG['csv_separator'],
+            encoding=STORAGE_CONFIG['csv_encoding'], nrows=0
+        ).columns)
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if fmt == 'parquet':
+        return list(pq.read_schema(path).names)
+
+    with pa.ipc.open_file(str(path)) as reader:
+        return list(reader.schema.names)
+
+
+def dataset_info(path, sep=None):
+    """Número de registros e esquema ({coluna: tipo}) lidos dos metadados
+
+    Parquet/Feather não leem os dados; no CSV o esquema traz só os nomes das
+    colunas e as linhas são contadas no arquivo.
+    """
+    path = Path(path)
+    fmt = _check_format(format_from_path(path))
+
+    if fmt == 'csv':
+        with open(path, 'rb') as f:
+            rows = max(sum(1 for _ in f) - 1, 0)
+        return {'rows': rows, 'schema': {col: None for col in dataset_columns(path, sep)}}
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if fmt == 'parquet':
+        metadata = pq.read_metadata(path)
+        schema = metadata.schema.to_arrow_schema()
+        rows = metadata.num_rows
+    else:
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            schema = reader.schema
+            rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+    return {'rows': int(rows), 'schema': {field.name: str(field.type) for field in schema}}
+
+
+def read_csv_filtered(path, filters=None, columns=None, chunksize=None, **options):
+    """Lê um CSV em chunks mantendo apenas as linhas que atendem aos filtros
+
+    As colunas dos filtros são lidas mesmo fora da projeção e descartadas ao final.
+    Sem filtros, é uma leitura direta com a projeção de colunas.
+    options: demais argumentos do pd.read_csv (sep, encoding, dtype...)
+    """
+    if not filters:
+        return pd.read_csv(path, usecols=columns, **options)
+
+    filter_columns = [column for column, _, _ in filters]
+    usecols = None if columns is None else list(dict.fromkeys(list(columns) + filter_columns))
+
+    chunks = pd.read_csv(
+        path,
+        usecols=usecols,
+        chunksize=chunksize or STORAGE_CONFIG['csv_chunk_size'],
+        **options
+    )
+
+    _check_filters(filters)
+    frames = [chunk[filter_mask(chunk, filters)] for chunk in chunks]
+    df = (
+        pd.concat(frames, ignore_index=options.get('index_col') is None)
+        if frames else pd.DataFrame(columns=usecols)
+    )
+
+    if columns is not None:
+        df = df[list(columns)]
+
+    return df
+
+
+def read_dataset(path, columns=None, sep=None, index_col=None, dtype=None, filters=None):
+    """Lê um dataset de qualquer formato suportado
+
+    columns: projeção de colunas aplicada na leitura (nenhuma outra coluna é materializada)
+    index_col: coluna a restaurar como índice (CSV/Feather); Parquet já guarda o índice
+    dtype: tipos das colunas no CSV (formatos colunares já trazem os tipos gravados)
+    filters: filtros de linha [(coluna, operador, valor)] aplicados na leitura -
+        pushdown do pyarrow nos formatos colunares, filtragem por chunk no CSV
+    """
+    path = Path(path)
+    fmt = _check_format(format_from_path(path))
+
+    if not path.exists():
+        raise FileNotFoundError(f"Dataset não encontrado: {path}")
+
+    if filters:
+        _check_filters(filters)
+
+    if fmt == 'csv':
+        options = {
+            'sep': sep or STORAGE_CONFIG['csv_separator'],
+            'encoding': STORAGE_CONFIG['csv_encoding'],
+            'index_col': index_col,
+            'dtype': dtype,
+            'low_memory': False
+        }
+        df = read_csv_filtered(path, filters, columns=columns, **options)
+    elif fmt == 'parquet':
+        df = pd.read_parquet(path, columns=columns, filters=filters or None)
+    else:
+        if columns is not None and index_col is not None and index_col not in columns:
+            columns = [index_col] + list(columns)
+
+        if filters:
+            import pyarrow.dataset as ds
+            import pyarrow.parquet as pq
+
+            table = ds.dataset(path, format='feather').to_table(
+                columns=columns, filter=pq.filters_to_expression(filters)
+            )
+            df = table.to_pandas()
+        else:
+            df = pd.read_feather(path, columns=columns)
+
+        if index_col is not None:
+            df = df.set_index(index_col)
+
+    logger.info(f"Dataset lido ({fmt}): {path} - {len(df):,} registros, {len(df.columns)} colunas")
+    return df
+
+
+def _arrow_type(dtype, fmt='parquet'):
+    """Tipo Arrow de um dtype pandas declarado (object = string; category = dicionário de strings)
+
+    O formato de arquivo IPC (Feather) aceita um único dicionário por coluna, e cada
+    chunk traz o seu: lá as colunas category são gravadas como string (a leitura
+    reaplica category pelos tipos declarados).
+    """
+    import pyarrow as pa
+
+    if dtype == 'object' or (dtype == 'category' and fmt == 'feather'):
+        return pa.string()
+    if dtype == 'category':
+        # Cada chunk tem seu próprio conjunto de categorias: índice int32 comporta todos
+        return pa.dictionary(pa.int32(), pa.string())
+
+    return pa.Schema.from_pandas(pd.DataFrame({'_': pd.Series(dtype=dtype)}), preserve_index=False).field('_').type
+
+
+def open_chunk_writer(path, dtypes=None):
+    """Abre um gravador incremental (modo streaming) no formato do caminho
+
+    dtypes: tipos declarados por coluna (ex.: schema.bronze_output_dtypes()). Fixam o
+        esquema colunar da saída; só colunas não declaradas têm o tipo inferido do
+        primeiro chunk (string quando inteiramente nulas nele).
+    Retorna um dicionário de estado usado por write_chunk/close_chunk_writer.
+    """
+    path = Path(path)
+    fmt = _check_format(format_from_path(path))
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if path.exists():
+        path.unlink()
+
+    return {'path': path, 'format': fmt, 'writer': None, 'schema': None, 'columns': None, 'dtypes': dtypes or {}}
+
+
+def write_chunk(state, df):
+    """Anexa um chunk ao dataset aberto por open_chunk_writer"""
+    if state['columns'] is None:
+        state['columns'] = list(df.columns)
+    elif list(df.columns) != state['columns']:
+        logger.warning(f"Layout divergente no chunk, alinhando colunas à saída: {state['path'].name}")
+        df = df.reindex(columns=state['columns'])
+
+    if state['format'] == 'csv':
+        df.to_csv(
+            state['path'],
+            mode='a',
+            header=not state['path'].exists(),
+            index=False,
+            encoding=STORAGE_CONFIG['csv_encoding'],
+            sep=STORAGE_CONFIG['csv_separator']
+        )
+        return
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    df = _prepare_for_columnar(df)
+
+    if state['schema'] is None:
+        inferred = pa.Table.from_pandas(df, preserve_index=False).schema
+        fields = []
+        for field in inferred:
+            if field.name in state['dtypes']:
+                field = pa.field(field.name, _arrow_type(state['dtypes'][field.name], state['format']))
+            elif pa.types.is_null(field.type):
+                # Coluna não declarada e inteiramente nula no primeiro chunk
+                field = pa.field(field.name, pa.string())
+            elif pa.types.is_dictionary(field.type):
+                field = pa.field(field.name, pa.dictionary(pa.int32(), field.type.value_type))
+            fields.append(field)
+        state['schema'] = pa.schema(fields, metadata=inferred.metadata)
+
+        if state['format'] == 'parquet':
+            state['writer'] = pq.ParquetWriter(
+                state['path'], state['schema'],
+                compression=STORAGE_CONFIG['parquet_compression']
+            )
+        else:
+            state['writer'] = pa.ipc.new_file(str(state['path']), state['schema'])
+
+    # Cada chunk é convertido direto para o esquema fixado (colunas nulas no chunk inclusive)
+    state['writer'].write_table(pa.Table.from_pandas(df, schema=state['schema'], preserve_index=False))
+
+
+def close_chunk_writer(state):
+    """Finaliza o gravador incremental (chamadas repetidas não fazem nada)"""
+    if state['writer'] is not None:
+        state['writer'].close()
+        state['writer'] = None
+
+    return state['path']
+
+
+def read_partitioned_dataset(directory, columns=None, dtype=None):
+    """Lê e concatena todas as partições (um arquivo por partição) de um diretório
+
+    As partições são lidas em ordem de nome, o que mantém a ordem mensal.
+    """
+    directory = Path(directory)
+
+    partitions = sorted(
+        path for path in directory.iterdir()
+        if path.suffix.lower() in FORMAT_EXTENSIONS.values() and '.tmp' not in path.suffixes
+    )
+
+    if not partitions:
+        raise FileNotFoundError(f"Nenhuma partição encontrada em: {directory}")
+
+    frames = [read_dataset(path, columns=columns, dtype=dtype) for path in partitions]
+    df = pd.concat(frames, ignore_index=True)
+
+    logger.info(f"Dataset particionado lido: {directory} - {len(partitions)} partições, {len(df):,} registros")
+    return df